@@ -0,0 +1,133 @@
+"""Compares analysis times on a simulated network filesystem, with and without --high-latency-io.
+
+Usage:
+    python benchmarks/bench_high_latency_io.py [latency_ms [directories [files_per_directory]]]
+
+The tree is on a local disk; a shim adds `latency_ms` to every call which would be a round trip on
+NFS or SMB: directory listings, stats (including DirEntry.stat) and opens. Reads of open files are not
+delayed, as read-ahead hides most of their latency. Delays are sleeps, so concurrent calls overlap
+like concurrent requests to a file server do. Every mode must produce the same dump.
+"""
+import builtins
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from unittest.mock import patch
+
+DEFAULT_LATENCY_MS = 2
+DEFAULT_DIRECTORIES = 40
+DEFAULT_FILES_PER_DIRECTORY = 25
+
+
+def create_tree(root, directories, files_per_directory):
+    for d in range(directories):
+        directory = os.path.join(root, f"package_{d // 8}", f"module_{d}")
+        os.makedirs(directory, exist_ok=True)
+        for f in range(files_per_directory):
+            with open(os.path.join(directory, f"file_{f}.py"), "w") as file:
+                file.write(f"def function_{d}_{f}(value):\n    return value * {f}\n" * 20)
+
+
+class _DelayedDirEntry:
+    def __init__(self, entry, delay):
+        self._entry = entry
+        self._delay = delay
+        self.name = entry.name
+        self.path = entry.path
+
+    def is_file(self, **kwargs):
+        return self._entry.is_file(**kwargs)
+
+    def is_dir(self, **kwargs):
+        return self._entry.is_dir(**kwargs)
+
+    def is_symlink(self):
+        return self._entry.is_symlink()
+
+    def stat(self, **kwargs):
+        time.sleep(self._delay)
+        return self._entry.stat(**kwargs)
+
+
+class _DelayedScandir:
+    def __init__(self, iterator, delay):
+        self._iterator = iterator
+        self._delay = delay
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._iterator.close()
+
+    def __iter__(self):
+        return (_DelayedDirEntry(entry, self._delay) for entry in self._iterator)
+
+
+@contextlib.contextmanager
+def high_latency_filesystem(latency_ms):
+    """Adds `latency_ms` to every listing, stat and open made by the process."""
+    delay = latency_ms / 1000
+    listdir, scandir, stat, os_open, builtin_open = os.listdir, os.scandir, os.stat, os.open, builtins.open
+
+    def delayed(function):
+        def wrapper(*args, **kwargs):
+            time.sleep(delay)
+            return function(*args, **kwargs)
+        return wrapper
+
+    def delayed_scandir(path="."):
+        time.sleep(delay)
+        return _DelayedScandir(scandir(path), delay)
+
+    with patch("os.listdir", delayed(listdir)), patch("os.scandir", delayed_scandir), patch("os.stat", delayed(stat)), \
+            patch("os.open", delayed(os_open)), patch("builtins.open", delayed(builtin_open)):
+        yield
+
+
+def run(root, high_latency_io, pipeline):
+    from codebase_dump.core.codebase_analysis import CodebaseAnalysis
+    from codebase_dump.core.ignore_patterns_manager import IgnorePatternManager
+    from codebase_dump.core.output_formatter import PlainTextOutputFormatter
+    from codebase_dump.core.pipeline import PipelinedCodebaseAnalysis
+
+    ignore_manager = IgnorePatternManager(root, load_default_ignore_patterns=False)
+    if pipeline:
+        analysis = PipelinedCodebaseAnalysis(tokenizers=["estimate"], count_tokens=False, high_latency_io=high_latency_io,
+                                             reproducible=True)
+    else:
+        analysis = CodebaseAnalysis(high_latency_io=high_latency_io, reproducible=True)
+    start = time.perf_counter()
+    data = analysis.analyze_directory(root, ignore_manager, root)
+    elapsed = time.perf_counter() - start
+    output = io.BytesIO()
+    PlainTextOutputFormatter(count_tokens=False, reproducible=True).write(data, set(), output)
+    return elapsed, output.getvalue()
+
+
+def main(latency_ms, directories, files_per_directory):
+    print(f"{directories} directories x {files_per_directory} files, {latency_ms} ms per listing, stat and open")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = os.path.join(temp_dir, "tree")
+        create_tree(root, directories, files_per_directory)
+        expected = None
+        baseline = None
+        with high_latency_filesystem(latency_ms):
+            for name, high_latency_io, pipeline in [("sequential", False, False),
+                                                    ("sequential --high-latency-io", True, False),
+                                                    ("--pipeline", False, True),
+                                                    ("--pipeline --high-latency-io", True, True)]:
+                elapsed, output = run(root, high_latency_io, pipeline)
+                if expected is None:
+                    expected, baseline = output, elapsed
+                elif output != expected:
+                    sys.exit(f"{name}: the dump differs from the sequential one")
+                print(f"{name:>30}: {elapsed:7.2f}s ({baseline / elapsed:5.1f}x)")
+
+
+if __name__ == "__main__":
+    arguments = [int(value) for value in sys.argv[1:]]
+    main(*(arguments + [DEFAULT_LATENCY_MS, DEFAULT_DIRECTORIES, DEFAULT_FILES_PER_DIRECTORY][len(arguments):]))
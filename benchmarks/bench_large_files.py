@@ -0,0 +1,78 @@
+"""Compares time and peak memory of dumping large text files with and without memory-mapping.
+
+Usage:
+    python benchmarks/bench_large_files.py [size_in_mb ...]
+
+Every measurement runs in a fresh subprocess, so peak RSS (ru_maxrss) belongs to a single run.
+Peak RSS includes file-backed mapped pages, so the Python heap peak (tracemalloc) is reported as well.
+Token counting is left out, as it needs the decoded text regardless of how the file is read.
+"""
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+DEFAULT_SIZES_MB = [1, 10, 50, 100, 500]
+LINE = b"INSERT INTO payments (id, amount, currency) VALUES (1, 100.00, 'EUR');\n"
+
+
+def create_file(directory, size_mb):
+    path = os.path.join(directory, f"dump_{size_mb}mb.sql")
+    block = LINE * (1024 * 1024 // len(LINE) + 1)
+    remaining = size_mb * 1024 * 1024
+    with open(path, "wb") as f:
+        while remaining > 0:
+            chunk = block[:remaining]
+            f.write(chunk)
+            remaining -= len(chunk)
+    return path
+
+
+def run_single(file_path, mmap_threshold):
+    """Analyzes and writes a single file, then prints elapsed seconds, peak RSS in KB and peak heap in KB."""
+    from codebase_dump.core.codebase_analysis import CodebaseAnalysis
+    from codebase_dump.core.models import DirectoryAnalysis
+    from codebase_dump.core.output_formatter import PlainTextOutputFormatter
+
+    formatter = PlainTextOutputFormatter()
+    tracemalloc.start()
+    start = time.perf_counter()
+    root = DirectoryAnalysis(name="bench")
+    root.children.append(CodebaseAnalysis(mmap_threshold=mmap_threshold)._analyze_file(file_path, False, root))
+    with open(os.devnull, "wb") as devnull:
+        for path, node in formatter.iter_content_files(root):
+            devnull.write(formatter.format_file_prefix(path).encode("utf-8"))
+            node.write_content(devnull)
+            devnull.write(formatter.format_file_suffix(path).encode("utf-8"))
+    elapsed = time.perf_counter() - start
+    heap_peak = tracemalloc.get_traced_memory()[1]
+    print(f"{elapsed:.3f} {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss} {heap_peak // 1024}")
+
+
+def measure(file_path, mmap_threshold):
+    output = subprocess.check_output([sys.executable, __file__, "--single", file_path, str(mmap_threshold)])
+    elapsed, peak_rss_kb, peak_heap_kb = output.decode().split()
+    return float(elapsed), int(peak_rss_kb), int(peak_heap_kb)
+
+
+def main(sizes_mb):
+    print(f"{'size':>8} | {'read() time':>11} | {'read() RSS':>10} | {'read() heap':>11} | "
+          f"{'mmap time':>9} | {'mmap RSS':>9} | {'mmap heap':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size_mb in sizes_mb:
+            file_path = create_file(directory, size_mb)
+            read_time, read_rss, read_heap = measure(file_path, 0)
+            mmap_time, mmap_rss, mmap_heap = measure(file_path, 1)
+            print(f"{size_mb:>6}MB | {read_time:>10.3f}s | {read_rss / 1024:>8.1f}MB | {read_heap / 1024:>9.1f}MB | "
+                  f"{mmap_time:>8.3f}s | {mmap_rss / 1024:>7.1f}MB | {mmap_heap / 1024:>7.1f}MB")
+            os.remove(file_path)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--single":
+        run_single(sys.argv[2], int(sys.argv[3]))
+    else:
+        main([int(size) for size in sys.argv[1:]] or DEFAULT_SIZES_MB)
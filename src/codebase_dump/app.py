@@ -1,24 +1,76 @@
 import argparse
 import sys
 import os
+import time
 
 from codebase_dump.core.ignore_patterns_manager import IgnorePatternManager
-from codebase_dump.core.codebase_analysis import CodebaseAnalysis
-from codebase_dump.core.audit_api_uploader import AuditApiUploader
+from codebase_dump.core.codebase_analysis import CodebaseAnalysis, OVERSIZE_EXCERPT, OVERSIZE_SKIP
+from codebase_dump.core.file_classifier import FileClassifier
+from codebase_dump.core.path_filter import PathFilter
+from codebase_dump.core.outline import CONTENT_FULL, CONTENT_OUTLINE
+from codebase_dump.core.dependency_graph import ORDER_CLUSTERS, ORDER_DEPENDENCIES, ORDER_TREE
+from codebase_dump.core.dump_digest import DumpDigest
+from codebase_dump.core.dump_index import DumpIndex, extract_section
+from codebase_dump.core.memory_budget import MemoryBudget, generate_memory_string, parse_size
+from codebase_dump.core.git_changes import ChangedFilesFilter, get_changed_files, read_changed_files_list
+from codebase_dump.core.generated_detector import GeneratedFileDetector, GENERATED_KEEP, GENERATED_EXCLUDE, GENERATED_COLLAPSE
+from codebase_dump.core.tokenizers import ESTIMATE_TOKENIZER, normalize_tokenizer_names, validate_tokenizer_name
+from codebase_dump.core.batch import BatchRunner, read_manifest
+from codebase_dump.core.pipeline import PipelinedCodebaseAnalysis, BackgroundUpload, QueueStream, TeeStream
 from codebase_dump.core.output_formatter import OutputFormatterBase, MarkdownOutputFormatter, PlainTextOutputFormatter
 
 
 def main():
+    command = get_subcommand(sys.argv[1:])
+    if command is not None:
+        SUBCOMMANDS[command](sys.argv[2:])
+        return
+
     parser = argparse.ArgumentParser(
         description="Generate a single-file dump of your repository, so you can use it as LLM input.",
         formatter_class=argparse.RawTextHelpFormatter
     )
-    parser.add_argument("path", nargs="?", help="Path to the directory to analyze")
+    parser.add_argument("path", nargs="?", help="Path to the directory to analyze, or to a .zip or tar archive (.tar, .tar.gz, .tgz, .tar.bz2, .tar.xz)\nto analyze without extracting it")
     parser.add_argument("-o", "--output-format", choices=["text", "markdown"], default="text", help="Output format (default: text)")
     parser.add_argument("-f", "--file", help="Output file name (default: <directory_name>_codebase_dump.<format_extension>)")
     parser.add_argument("--audit-upload", help="Send the output to the audits API", action="store_true")
     parser.add_argument("--audit-base-url", default="https://codeaudits.ai/", help="API URL to send the audit to (default: https://codeaudits.ai/)")
     parser.add_argument("--ignore-top-large-files", type=int, default=0, help="Number of largest files to ignore (default: 0)")
+    parser.add_argument("--rank-largest-by", choices=["size", "tokens"], default="size", help="Rank the largest files and directories by size in bytes or by tokens (default: size)")
+    parser.add_argument("--no-tokens", action="store_true", help="Skip token counting (tokenizers are never loaded)")
+    parser.add_argument("--tokenizer", action="append", type=parse_tokenizer_name, default=None, help="Tokenizer used to count tokens: a tiktoken encoding (e.g. cl100k_base, o200k_base),\nhf:<path to tokenizer.json> or estimate. Repeat to report several budgets (default: cl100k_base)")
+    parser.add_argument("--include", action="append", default=None, help="Only dump files matching this glob, relative to the path (e.g. 'src/payments/**', '**/*.toml').\nA directory selects its whole subtree. Repeat to select several paths")
+    parser.add_argument("--changed-since", default=None, help="Only dump files changed since this git revision, including uncommitted and untracked files.\nA range (e.g. main..feature) compares the two revisions")
+    parser.add_argument("--changed-files", default=None, help="Only dump the files listed in this file, one path per line relative to the path")
+    parser.add_argument("--changed-siblings", action="store_true", help="With --changed-since or --changed-files, list unchanged files next to the changed ones by name")
+    parser.add_argument("--query", default=None, help="Only dump the files most relevant to this query (e.g. 'payment retry logic'), ranked locally\nwith BM25 over identifiers and paths plus import proximity. Other files are listed by name")
+    parser.add_argument("--max-tokens", type=int, default=None, help="With --query, dump the best ranked files whose contents fit in this many tokens")
+    parser.add_argument("--order", choices=[ORDER_TREE, ORDER_DEPENDENCIES, ORDER_CLUSTERS], default=ORDER_TREE, help="Order of the files in the output: directory tree order, imported files before the files\nimporting them, or grouped by clusters of files importing each other.\nThe dependency orders add the import graph of Python, JS/TS, Go, Java and C/C++ files (default: tree)")
+    parser.add_argument("--strip-license-headers", action="store_true", help="Leave out the license header (a leading comment mentioning a copyright or license) of every file")
+    parser.add_argument("--strip-comments", action="store_true", help="Leave out comments, recognized by file extension (C-like, #, -- and <!-- --> comments).\nDocstrings, string and regular expression literals, heredocs and compiler directives are kept")
+    parser.add_argument("--normalize-indentation", action="store_true", help="Indent with a tab per indentation level instead of spaces, in languages where indentation carries no meaning (C-like, JavaScript, CSS, SQL, Lua).\nLines inside multi-line strings are kept")
+    parser.add_argument("--strip-trailing-whitespace", action="store_true", help="Remove whitespace at the end of lines")
+    parser.add_argument("--collapse-blank-lines", action="store_true", help="Collapse runs of blank lines into a single blank line")
+    parser.add_argument("--outline", action="store_true", help="Write files as outlines (signatures, class outlines and docstrings) instead of their full content.\nPython is parsed with ast, other languages with declaration patterns")
+    parser.add_argument("--skip-binary-files", action="store_true", help="Leave binary files out of the dump instead of listing them as [Non-text file]")
+    parser.add_argument("--binary-extensions", type=parse_extensions, default=None, help="Comma-separated extensions to always treat as binary (e.g. dat,blob)")
+    parser.add_argument("--text-extensions", type=parse_extensions, default=None, help="Comma-separated extensions to always treat as text (e.g. bin)")
+    parser.add_argument("--max-file-bytes", type=int, default=None, help="Files larger than this are not read in full (see --oversize)")
+    parser.add_argument("--max-file-tokens", type=int, default=None, help="Files estimated from their size to exceed this many tokens are not read in full (see --oversize)")
+    parser.add_argument("--oversize", choices=[OVERSIZE_EXCERPT, OVERSIZE_SKIP], default=OVERSIZE_EXCERPT, help="What to do with files over --max-file-bytes or --max-file-tokens:\ninclude a head/tail excerpt or skip them (default: excerpt)")
+    parser.add_argument("--generated", choices=[GENERATED_KEEP, GENERATED_EXCLUDE, GENERATED_COLLAPSE], default=GENERATED_KEEP, help="What to do with lockfiles, minified and generated files:\nkeep them, exclude them or collapse them to a placeholder (default: keep)")
+    parser.add_argument("--generated-max-line-length", type=int, default=1000, help="Files with a longer line in their first 8 KB are treated as minified (default: 1000)")
+    parser.add_argument("--generated-max-average-line-length", type=int, default=200, help="Files with a longer average line length in their first 8 KB are treated as minified (default: 200)")
+    parser.add_argument("--save-snapshot", default=None, help="Also save the analysis into this binary snapshot file, to render it again later with --load-snapshot")
+    parser.add_argument("--snapshot-without-content", action="store_true", help="Leave file contents out of the snapshot (the tree, sizes and token counts are kept)")
+    parser.add_argument("--load-snapshot", default=None, help="Render a snapshot saved with --save-snapshot instead of analyzing a path")
+    parser.add_argument("--section-index", action="store_true", help="Also write <output>.sections.json with the byte range (and token range) of every file section,\nso single files can be read back with 'codebase-dump extract'")
+    parser.add_argument("--search-index", action="store_true", help="Also build or update a full-text search index of the dumped files in <output>.search.db (SQLite FTS5),\nto query with 'codebase-dump search'. Only files changed since the last run are reindexed")
+    parser.add_argument("--reproducible", action="store_true", help="Make the output depend only on the analyzed content: sorted traversal, LF line endings and '/' paths.\nA digest of the dump and of every directory is saved in <output>.digest.json; an identical dump\nis not rewritten and, if it was already uploaded, not uploaded again")
+    parser.add_argument("--memory-limit", type=parse_size, default=None, help="Keep memory use under this size (e.g. 2G, 512M): file contents which do not fit are\nspilled to temporary files, and readers wait while the budget is in use. Peak RSS is reported")
+    parser.add_argument("--high-latency-io", action="store_true", help="For network filesystems (NFS, SMB): list directories and stat files concurrently ahead of the walk,\nwith read-ahead hints, and read each file with a single open and read. Best combined with --pipeline")
+    parser.add_argument("--pipeline", action="store_true", help="Read and tokenize files concurrently with the directory walk,\nand upload the output while it is being written")
+    parser.add_argument("--workers", type=int, default=None, help="Number of reader/tokenizer threads in --pipeline mode (default: CPU count + 4, up to 32)")
     parser.add_argument("--api-key", type=str, default=None, help="Your private API key to assign submitted repository to your account on https://codeaudits.ai/")
 
     if len(sys.argv) == 1:
@@ -27,62 +79,372 @@ def main():
 
     args = parser.parse_args()
 
-    if not args.path:
+    if not args.path and not args.load_snapshot:
         print("Error: Path argument is required.")
         parser.print_help(sys.stderr)
         sys.exit(1)
 
-    ignore_patterns_manager = IgnorePatternManager(args.path)
-    codebase_analysis = CodebaseAnalysis()
+    if args.no_tokens and (args.rank_largest_by == "tokens" or args.tokenizer):
+        parser.error("--no-tokens cannot be combined with --tokenizer or --rank-largest-by tokens")
 
-    print("Codebase Digest")
-    print("Analyzing directory: " + args.path)
-    
-    data = codebase_analysis.analyze_directory(path=args.path, 
-                                               ignore_patterns_manager=ignore_patterns_manager, 
-                                               base_path=args.path, 
-                                               ignore_top_files=args.ignore_top_large_files)
+    if args.load_snapshot and args.path:
+        parser.error("--load-snapshot renders a saved analysis and cannot be combined with a path")
+
+    # Modules used by a single option are imported where the option is handled, to keep the startup short.
+    from codebase_dump.core.archive_source import is_archive
+
+    if args.changed_since and args.changed_files:
+        parser.error("--changed-since cannot be combined with --changed-files")
+    if args.changed_since and args.path and is_archive(args.path):
+        parser.error("--changed-since needs a git checkout and cannot be used with an archive")
+    if (args.changed_since or args.changed_files) and args.include:
+        parser.error("--include cannot be combined with --changed-since or --changed-files")
+    if args.max_tokens is not None and not args.query:
+        parser.error("--max-tokens requires --query")
+
+    memory_budget = MemoryBudget(args.memory_limit) if args.memory_limit else None
+    if args.load_snapshot:
+        from codebase_dump.core.snapshot import load_snapshot
+
+        try:
+            snapshot = load_snapshot(args.load_snapshot)
+        except ValueError as e:
+            parser.error(str(e))
+        data = snapshot.data
+        ignore_patterns = snapshot.ignore_patterns
+        tokenizers = normalize_tokenizer_names(args.tokenizer or snapshot.tokenizers)
+        print(f"Loaded snapshot: {args.load_snapshot}")
+        if not snapshot.has_content:
+            print("Warning: the snapshot was saved with --snapshot-without-content, file contents are replaced by a placeholder")
+    else:
+        tokenizers = normalize_tokenizer_names(args.tokenizer)
+        data, ignore_patterns = analyze(args, parser, tokenizers, memory_budget)
+        if args.save_snapshot:
+            from codebase_dump.core.snapshot import save_snapshot
+
+            save_snapshot(data, args.save_snapshot, tokenizers=[] if args.no_tokens else tokenizers,
+                          ignore_patterns=ignore_patterns, include_content=not args.snapshot_without_content)
+            print(f"Snapshot saved to: {os.path.abspath(args.save_snapshot)}")
+
+    from codebase_dump.core.normalizer import ContentNormalizer, generate_normalization_string
+
+    normalizer = ContentNormalizer(strip_license_headers=args.strip_license_headers, strip_comments=args.strip_comments,
+                                   normalize_indentation=args.normalize_indentation,
+                                   strip_trailing_whitespace=args.strip_trailing_whitespace,
+                                   collapse_blank_lines=args.collapse_blank_lines)
+    if normalizer.enabled:
+        normalization_tokenizer = None if args.no_tokens else tokenizers[0]
+        report = normalizer.normalize_tree(data, normalization_tokenizer)
+        print(generate_normalization_string(report, normalization_tokenizer))
     
+    if args.query:
+        from codebase_dump.core.relevance import apply_selection, generate_selection_string, select_relevant_files
+
+        selection_tokenizer = ESTIMATE_TOKENIZER if args.no_tokens else tokenizers[0]
+        selection = select_relevant_files(data, args.query, args.max_tokens, selection_tokenizer)
+        apply_selection(data, selection)
+        print(generate_selection_string(selection, args.query, selection_tokenizer))
+
     estimated_output_size = data.get_non_ignored_text_content_size()
     estimated_output_size += len(data.get_all_non_ignored_files()) * 100  # Assume 100 bytes per file for structure
     estimated_output_size += 1000  # Add 1KB for summary
     print(f"Estimated output size: {estimated_output_size / 1024:.2f} KB")
     
     output_formatter: OutputFormatterBase = None
+    formatter_options = dict(tokenizers=tokenizers,
+                             rank_by=args.rank_largest_by,
+                             count_tokens=not args.no_tokens,
+                             content_mode=CONTENT_OUTLINE if args.outline else CONTENT_FULL,
+                             order=args.order,
+                             reproducible=args.reproducible,
+                             max_buffered_bytes=memory_budget.reading_limit if memory_budget else None)
     if args.output_format == "markdown":
-        output_formatter = MarkdownOutputFormatter()
+        output_formatter = MarkdownOutputFormatter(**formatter_options)
     else:
-        output_formatter = PlainTextOutputFormatter()
-
-    output = output_formatter.format(data, ignore_patterns_manager.ignore_patterns_as_str)
+        output_formatter = PlainTextOutputFormatter(**formatter_options)
 
     # Save the output to a file
-    file_name = args.file or f"{os.path.basename(args.path)}_codebase_dump{output_formatter.output_file_extension()}"
+    project_name = os.path.basename(args.path) if args.path and not is_archive(args.path) else data.name
+    file_name = args.file or f"{project_name}_codebase_dump{output_formatter.output_file_extension()}"
     full_path = os.path.abspath(file_name)
     os.makedirs(os.path.dirname(full_path), exist_ok=True)
-    with open(full_path, 'w', encoding='utf-8') as f:
-        f.write(output)
-    print(f"\nAnalysis saved to: {full_path}")
+    submitted_by = get_submitted_by()
+    background_upload = None
+    if args.audit_upload and args.pipeline:
+        max_chunks = max(1, min(64, memory_budget.reading_limit // QueueStream.MAX_CHUNK_SIZE)) if memory_budget else 64
+        background_upload = BackgroundUpload(create_audit_api_uploader(args, submitted_by), max_chunks).start()
+
+    section_index = DumpIndex(root_name=data.name) if args.section_index else None
+    digest = DumpDigest() if args.reproducible else None
+    digest_path = DumpDigest.get_digest_path(full_path)
+    previous_digest = DumpDigest.load(digest_path) if digest is not None else None
+    # In reproducible mode, the dump is written aside first, so an identical previous dump is left untouched.
+    write_path = full_path + ".tmp" if digest is not None else full_path
+    search_index = None
+    if args.search_index:
+        from codebase_dump.core.search_index import SearchIndex
+
+        try:
+            search_index = SearchIndex(SearchIndex.get_index_path(full_path))
+        except ValueError as e:
+            parser.error(str(e))
+    try:
+        # The search index is fed with every file section while the dump is written
+        with open(write_path, 'wb') as f:
+            if background_upload is None:
+                output_formatter.write(data, ignore_patterns, f, section_index, digest, search_index)
+            else:
+                try:
+                    output_formatter.write(data, ignore_patterns, TeeStream(f, background_upload.stream), section_index, digest,
+                                           search_index)
+                except BaseException as e:
+                    background_upload.finish(e)
+                    raise
+        if search_index is not None:
+            partial = bool(args.include or args.changed_since or args.changed_files)
+            search_update = search_index.finish_update(data, remove_missing=not partial)
+    finally:
+        if search_index is not None:
+            search_index.close()
+
+    output_unchanged = False
+    if digest is not None:
+        output_unchanged = digest.is_same_dump(previous_digest, full_path)
+        if output_unchanged:
+            os.remove(write_path)
+            digest.uploaded_to = previous_digest.uploaded_to
+        else:
+            os.replace(write_path, full_path)
+        digest.save(digest_path)
+    print(f"\nAnalysis {'unchanged since the last run, kept' if output_unchanged else 'saved to'}: {full_path}")
+    if digest is not None:
+        print(f"Dump digest: sha256:{digest.dump_digest}")
+        if previous_digest is not None:
+            changed = digest.changed_directories(previous_digest)
+            print(f"Directories changed since the last run: {len(changed)} of {len(digest.directories)}")
+    if section_index is not None:
+        section_index.save(DumpIndex.get_index_path(full_path))
+        print(f"Section index saved to: {DumpIndex.get_index_path(full_path)}")
+    if search_index is not None:
+        print(f"Search index updated: {search_index.path} ({search_update.added} added, {search_update.updated} updated, "
+              f"{search_update.removed} removed, {search_update.unchanged} unchanged)")
     
     print("Analysis Summary\n")
     print(output_formatter.generate_tree_string(data, show_ignored=False))
     print(output_formatter.generate_summary_string(data))
     print("Ignore summary:\n")
-    print(output_formatter.generate_ignored_files_summary(data, ignore_patterns_manager.ignore_patterns_as_str))
+    print(output_formatter.generate_ignored_files_summary(data, ignore_patterns))
+    if memory_budget is not None:
+        print(generate_memory_string(memory_budget))
+
+    if args.audit_upload and background_upload is None and output_unchanged and digest.uploaded_to == args.audit_base_url:
+        print("The same dump was already uploaded, skipping the upload")
+    elif args.audit_upload:
+        audit_api_uploader = create_audit_api_uploader(args, submitted_by)
+        try:
+            if background_upload is None:
+                audit_api_uploader.upload_audit_file(full_path)
+            else:
+                upload_error = background_upload.finish()
+                if upload_error is not None:
+                    if isinstance(upload_error, ValueError):
+                        raise upload_error
+                    print(f"Streaming upload failed: {str(upload_error)}. Uploading the saved output...")
+                    audit_api_uploader.upload_audit_file(full_path)
+            if digest is not None:
+                digest.uploaded_to = args.audit_base_url
+                digest.save(digest_path)
+        finally:
+            audit_api_uploader.close()
+            if background_upload is not None:
+                background_upload.uploader.close()
+    if memory_budget is not None:
+        memory_budget.close()
+
+def get_subcommand(argv):
+    """Returns the subcommand selected by the first argument, if any.
+
+    An existing path with the name of a subcommand (e.g. a directory named `batch`) is dumped instead.
+    """
+    if argv and argv[0] in SUBCOMMANDS and not os.path.exists(argv[0]):
+        return argv[0]
+    return None
+
+
+def batch_main(argv):
+    parser = argparse.ArgumentParser(
+        prog="codebase-dump batch",
+        description="Dump many repositories in one process, sharing workers, tokenizers and a token cache.",
+        formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument("manifest", help="File listing one repository path per line, optionally followed by a tab and the output file")
+    parser.add_argument("-o", "--output-format", choices=["text", "markdown"], default="text", help="Output format (default: text)")
+    parser.add_argument("--output-dir", default=".", help="Directory for outputs without an explicit file in the manifest (default: current directory)")
+    parser.add_argument("--tokenizer", action="append", type=parse_tokenizer_name, default=None, help="Tokenizer used to count tokens, see codebase-dump --help (default: cl100k_base)")
+    parser.add_argument("--workers", type=int, default=None, help="Number of reader/tokenizer threads shared by all repositories (default: CPU count + 4, up to 32)")
+    parser.add_argument("--jobs", type=int, default=2, help="Number of repositories processed at the same time (default: 2)")
+    args = parser.parse_args(argv)
+
+    tokenizers = normalize_tokenizer_names(args.tokenizer)
+    if args.output_format == "markdown":
+        output_formatter = MarkdownOutputFormatter(tokenizers=tokenizers)
+    else:
+        output_formatter = PlainTextOutputFormatter(tokenizers=tokenizers)
+
+    entries = read_manifest(args.manifest)
+    print(f"Codebase Digest: dumping {len(entries)} repositories")
+    runner = BatchRunner(output_formatter, output_dir=args.output_dir, workers=args.workers, jobs=args.jobs)
+    start = time.perf_counter()
+    results = runner.run(entries)
+    print(runner.generate_report(results, time.perf_counter() - start))
+
+    if any(result.error for result in results):
+        sys.exit(1)
+
+def extract_main(argv):
+    parser = argparse.ArgumentParser(
+        prog="codebase-dump extract",
+        description="Print one file from a dump written with --section-index, reading only its section.",
+        formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument("dump", help="Dump file written with --section-index")
+    parser.add_argument("path", help="Path of the file in the dump, with or without the root directory name")
+    parser.add_argument("--section", action="store_true", help="Print the whole section, including the file header, instead of the content only")
+    args = parser.parse_args(argv)
+
+    try:
+        content = extract_section(args.dump, args.path, whole_section=args.section)
+    except ValueError as e:
+        parser.error(str(e))
+    sys.stdout.buffer.write(content)
+    sys.stdout.buffer.flush()
+
+
+def search_main(argv):
+    parser = argparse.ArgumentParser(
+        prog="codebase-dump search",
+        description="Search the files of a dump written with --search-index.",
+        formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument("index", help="Dump file written with --search-index, or its .search.db index")
+    parser.add_argument("query", help="Terms which must all appear in a file. With the trigram index (SQLite 3.34+),\nany substring of at least 3 characters matches")
+    parser.add_argument("--limit", type=int, default=20, help="Maximum number of files to list (default: 20)")
+    parser.add_argument("--raw", action="store_true", help="Pass the query to SQLite FTS5 as is (e.g. 'payment NOT refund')")
+    parser.add_argument("--paths-only", action="store_true", help="Print only the matching paths relative to the analyzed directory, one per line (e.g. for --changed-files)")
+    args = parser.parse_args(argv)
+
+    from codebase_dump.core.search_index import SEARCH_INDEX_SUFFIX, SearchIndex
+
+    index_path = args.index if args.index.endswith(SEARCH_INDEX_SUFFIX) else SearchIndex.get_index_path(args.index)
+    if not os.path.exists(index_path):
+        parser.error(f"No search index found at {index_path}. Write the dump with --search-index to create it")
+    try:
+        with SearchIndex(index_path) as search_index:
+            results = search_index.search(args.query, limit=args.limit, raw=args.raw)
+    except ValueError as e:
+        parser.error(str(e))
+
+    for result in results:
+        if args.paths_only:
+            # Indexed paths start with the root directory name, as in the dump
+            print(result.path.split(os.sep, 1)[-1])
+        else:
+            print(f"{result.path} ({result.score:.2f}): {result.snippet}")
+
+
+def analyze(args, parser, tokenizers, memory_budget=None):
+    """Analyzes `args.path` with the options given on the command line. Returns the tree and the ignore patterns."""
+    try:
+        path_filter = create_path_filter(args)
+    except ValueError as e:
+        parser.error(str(e))
+
+    analysis_options = dict(file_classifier=FileClassifier(binary_extensions=args.binary_extensions, text_extensions=args.text_extensions),
+                            skip_binary_files=args.skip_binary_files,
+                            max_file_bytes=args.max_file_bytes,
+                            max_file_tokens=args.max_file_tokens,
+                            oversize_policy=args.oversize,
+                            generated_detector=GeneratedFileDetector(max_line_length=args.generated_max_line_length,
+                                                                     max_average_line_length=args.generated_max_average_line_length),
+                            generated_policy=args.generated,
+                            path_filter=path_filter,
+                            reproducible=args.reproducible,
+                            memory_budget=memory_budget,
+                            high_latency_io=args.high_latency_io)
+    from codebase_dump.core.archive_source import is_archive
+
+    if is_archive(args.path):
+        from codebase_dump.core.archive_source import ArchiveAnalysis
+
+        print("Codebase Digest")
+        print("Analyzing archive: " + args.path)
+        try:
+            data, ignore_patterns_manager = ArchiveAnalysis(**analysis_options).analyze_archive(args.path,
+                                                                                                ignore_top_files=args.ignore_top_large_files,
+                                                                                                rank_by=args.rank_largest_by,
+                                                                                                tokenizer=tokenizers[0])
+        except ValueError as e:
+            parser.error(str(e))
+        return data, ignore_patterns_manager.ignore_patterns_as_str
+
+    ignore_patterns_manager = IgnorePatternManager(args.path)
+    if args.pipeline:
+        codebase_analysis = PipelinedCodebaseAnalysis(workers=args.workers, tokenizers=tokenizers, count_tokens=not args.no_tokens, **analysis_options)
+    else:
+        codebase_analysis = CodebaseAnalysis(**analysis_options)
+
+    print("Codebase Digest")
+    print("Analyzing directory: " + args.path)
+    
+    data = codebase_analysis.analyze_directory(path=args.path, 
+                                               ignore_patterns_manager=ignore_patterns_manager, 
+                                               base_path=args.path, 
+                                               ignore_top_files=args.ignore_top_large_files,
+                                               rank_by=args.rank_largest_by,
+                                               tokenizer=tokenizers[0])
+    return data, ignore_patterns_manager.ignore_patterns_as_str
+
+def create_path_filter(args):
+    if args.changed_since:
+        changed_paths = get_changed_files(args.path, args.changed_since)
+        print(f"Files changed since {args.changed_since}: {len(changed_paths)}")
+        return ChangedFilesFilter(changed_paths, include_siblings=args.changed_siblings)
+    if args.changed_files:
+        return ChangedFilesFilter(read_changed_files_list(args.changed_files), include_siblings=args.changed_siblings)
+    if args.include:
+        return PathFilter(args.include)
+    return None
 
+
+def parse_extensions(value):
+    return [extension.strip() for extension in value.split(",") if extension.strip()]
+
+
+def parse_tokenizer_name(value):
+    try:
+        return validate_tokenizer_name(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def get_submitted_by():
     try:
         from codebase_dump._version import __version__ as app_version
     except ImportError:
         app_version = None
 
-    submitted_by = f"codebase-dump-v{app_version}" if app_version else "codebase-dump"
-    if args.audit_upload:
-        audit_api_uploader = AuditApiUploader(
-            api_key=args.api_key,
-            api_url=args.audit_base_url,
-            api_submitted_by=submitted_by
-        )
-        audit_api_uploader.upload_audit(output)
+    return f"codebase-dump-v{app_version}" if app_version else "codebase-dump"
+
+def create_audit_api_uploader(args, submitted_by):
+    from codebase_dump.core.audit_api_uploader import AuditApiUploader
+
+    return AuditApiUploader(
+        api_key=args.api_key,
+        api_url=args.audit_base_url,
+        api_submitted_by=submitted_by
+    )
+
+SUBCOMMANDS = {"batch": batch_main, "extract": extract_main, "search": search_main}
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,258 @@
+import mmap
+import os
+import posixpath
+import shutil
+import stat
+import tarfile
+import tempfile
+import weakref
+import zipfile
+import zlib
+from typing import BinaryIO, Dict, Iterator, Optional, Tuple
+
+from codebase_dump.core.codebase_analysis import CodebaseAnalysis, OVERSIZE_SKIP
+from codebase_dump.core.generated_detector import GENERATED_KEEP
+from codebase_dump.core.high_latency_io import decode_text
+from codebase_dump.core.ignore_patterns_manager import IgnorePatternManager
+from codebase_dump.core.memory_budget import SpilledTextFileAnalysis
+from codebase_dump.core.models import DirectoryAnalysis, NodeAnalysis, TextFileAnalysis, RANK_BY_SIZE
+from codebase_dump.core.tokenizers import DEFAULT_TOKENIZER
+
+ZIP_EXTENSIONS = (".zip",)
+TAR_EXTENSIONS = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tbz", ".tar.xz", ".txz")
+IGNORE_FILE_NAMES = (".cdigestignore", ".gitignore")
+
+# (path inside the archive, is a directory, size, content stream of a file)
+ArchiveMember = Tuple[str, bool, int, Optional[BinaryIO]]
+
+
+def get_archive_extension(path) -> Optional[str]:
+    lower = os.path.basename(path).lower()
+    for extension in sorted(ZIP_EXTENSIONS + TAR_EXTENSIONS, key=len, reverse=True):
+        if lower.endswith(extension) and len(lower) > len(extension):
+            return extension
+    return None
+
+
+def is_archive(path) -> bool:
+    """Tells whether `path` is a .zip or tar archive (by its extension), rather than a directory to walk."""
+    return get_archive_extension(path) is not None and os.path.isfile(path)
+
+
+def iter_archive_members(path) -> Iterator[ArchiveMember]:
+    """Yields the directories and regular files of an archive, in archive order.
+
+    Tar archives, compressed or not, are read as a stream in a single sequential pass, so a file's
+    content stream is only valid until the next member is requested. Links and special files are skipped.
+    Raises ValueError for files which are not archives, corrupt or truncated ones, and encrypted zip members.
+    """
+    try:
+        if get_archive_extension(path) in ZIP_EXTENSIONS:
+            with zipfile.ZipFile(path) as archive:
+                for info in archive.infolist():
+                    if info.is_dir():
+                        yield info.filename, True, 0, None
+                    elif info.flag_bits & 0x1:
+                        raise ValueError(f"Cannot read archive {path}: {info.filename} is encrypted")
+                    elif not stat.S_ISLNK(info.external_attr >> 16):
+                        with archive.open(info) as stream:
+                            yield info.filename, False, info.file_size, stream
+        else:
+            with tarfile.open(path, mode="r|*") as archive:
+                for member in archive:
+                    if member.isdir():
+                        yield member.name, True, 0, None
+                    elif member.isfile():
+                        yield member.name, False, member.size, archive.extractfile(member)
+    except (tarfile.TarError, zipfile.BadZipFile, zlib.error, EOFError) as e:
+        raise ValueError(f"Cannot read archive {path}: {e}") from e
+
+
+def normalize_member_path(name: str) -> Optional[Tuple[str, ...]]:
+    """Returns the parts of a member path, or None for paths which are empty or escape the archive root."""
+    path = posixpath.normpath(name.replace("\\", "/")).lstrip("/")
+    if path in ("", ".") or path == ".." or path.startswith("../"):
+        return None
+    return tuple(path.split("/"))
+
+
+class ArchiveAnalysis(CodebaseAnalysis):
+    """Analyzes a .zip or tar archive (plain, gzip, bzip2 or xz) into a tree, without extracting it.
+
+    Members are read in a single pass in archive order, which compressed tar archives require:
+    binary files are recognized by name or from their first bytes, files over the size limits are
+    reduced to an excerpt while streaming, and other contents are decoded like files read from disk.
+    An archive with a single top-level directory (a typical source drop) is analyzed from that
+    directory. Its .gitignore and .cdigestignore are only known once the archive was read, so
+    ignore patterns, the path filter and the generated files policy are applied to the tree afterwards.
+    """
+
+    STREAM_CHUNK_SIZE = 1024 * 1024
+
+    def analyze_archive(self,
+                        path,
+                        load_default_ignore_patterns=True,
+                        ignore_top_files=0,
+                        rank_by=RANK_BY_SIZE,
+                        tokenizer=DEFAULT_TOKENIZER) -> Tuple[DirectoryAnalysis, IgnorePatternManager]:
+        """Returns the tree of the archive's files, and the ignore patterns applied to it."""
+        name = os.path.basename(path)
+        top = DirectoryAnalysis(name=name[:-len(get_archive_extension(path))])
+        nodes: Dict[Tuple[str, ...], NodeAnalysis] = {(): top}
+
+        for member_name, is_dir, size, stream in iter_archive_members(path):
+            parts = normalize_member_path(member_name)
+            if parts is None:
+                continue
+            if is_dir:
+                self._get_directory(nodes, parts)
+                continue
+            parent = self._get_directory(nodes, parts[:-1])
+            if not isinstance(parent, DirectoryAnalysis):
+                continue
+            node = self._analyze_member(parts[-1], size, stream, parent)
+            previous = nodes.get(parts)
+            if previous is not None:
+                # A later member with the same path replaces the earlier one, as when extracting
+                if node is None or isinstance(previous, DirectoryAnalysis):
+                    continue
+                parent.children[parent.children.index(previous)] = node
+            elif node is not None:
+                parent.children.append(node)
+            if node is not None:
+                nodes[parts] = node
+
+        root = top
+        if len(top.children) == 1 and isinstance(top.children[0], DirectoryAnalysis):
+            root = top.children[0]
+            root.parent = None
+
+        base_path = os.path.abspath(path)
+        ignore_patterns_manager = IgnorePatternManager(base_path,
+                                                       load_default_ignore_patterns=load_default_ignore_patterns,
+                                                       load_gitignore=False,
+                                                       load_cdigestignore=False,
+                                                       extra_ignore_patterns=self._read_ignore_patterns(root))
+        root.is_ignored = ignore_patterns_manager.should_ignore(base_path, is_dir=True)
+        self._finish_directory(root, "", base_path, ignore_patterns_manager)
+        self._prune_unselected_directories(root)
+
+        if ignore_top_files > 0:
+            self._ignore_largest_files(root.get_largest_files(ignore_top_files, rank_by, tokenizer))
+        return root, ignore_patterns_manager
+
+    @staticmethod
+    def _get_directory(nodes: Dict[Tuple[str, ...], NodeAnalysis], parts: Tuple[str, ...]) -> NodeAnalysis:
+        node = nodes.get(parts)
+        if node is None:
+            parent = ArchiveAnalysis._get_directory(nodes, parts[:-1])
+            node = nodes[parts] = DirectoryAnalysis(name=parts[-1], parent=parent)
+            if isinstance(parent, DirectoryAnalysis):
+                parent.children.append(node)
+        return node
+
+    def _analyze_member(self, name, size, stream: BinaryIO, parent) -> Optional[TextFileAnalysis]:
+        """Analyzes a file member into a node, reading its content from the archive stream."""
+        if self.memory_budget is None:
+            return self._read_member_node(name, size, stream, parent)
+        # Members streamed to a temporary file are never read into memory, so they only take a reader's slot.
+        reading_size = min(size, self.mmap_threshold) if self.mmap_threshold else size
+        with self.memory_budget.reading_file(reading_size):
+            return self.memory_budget.retain(self._read_member_node(name, size, stream, parent))
+
+    def _read_member_node(self, name, size, stream: BinaryIO, parent) -> Optional[TextFileAnalysis]:
+        by_name = self.file_classifier.classify_by_name(name)
+        if by_name is False:
+            return self._binary_file_node(name, False, parent)
+
+        limit = self.file_size_limit
+        if limit is not None and size > limit:
+            if self.oversize_policy == OVERSIZE_SKIP:
+                return TextFileAnalysis(name=name, is_ignored=True, parent=parent, original_size=size)
+            head, tail = self._read_member_excerpt(stream, limit)
+            return self._excerpt_file_node(name, head, tail, size, False, parent)
+        if self.mmap_threshold and size >= self.mmap_threshold:
+            return self._stream_large_member(name, stream, by_name is None, parent)
+
+        data = stream.read()
+        if by_name is None and self.file_classifier.is_binary_header(data[:self.SNIFF_SIZE]):
+            return self._binary_file_node(name, False, parent)
+        content = decode_text(data)
+        if content is None:
+            return self._binary_file_node(name, False, parent)
+        return TextFileAnalysis(name=name, file_content=content, parent=parent)
+
+    def _stream_large_member(self, name, stream: BinaryIO, sniff, parent) -> Optional[TextFileAnalysis]:
+        """Copies a member of at least `mmap_threshold` bytes to a temporary file, memory-mapped like a large file on disk.
+
+        The file is created in the memory budget's spill directory, removed by `MemoryBudget.close`;
+        without a budget, it is removed once its node is garbage collected.
+        """
+        head = stream.read(self.SNIFF_SIZE)
+        if sniff and self.file_classifier.is_binary_header(head):
+            return self._binary_file_node(name, False, parent)
+        fd, path = self.memory_budget.create_spill_file() if self.memory_budget is not None else tempfile.mkstemp(suffix=".txt")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(head)
+                shutil.copyfileobj(stream, f, self.STREAM_CHUNK_SIZE)
+                byte_size = f.tell()
+            with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                scanned = self._scan_mapped_text(mapped)
+        except BaseException:
+            os.remove(path)
+            raise
+        if scanned is None:
+            os.remove(path)
+            return self._binary_file_node(name, False, parent)
+        content_size, has_cr = scanned
+        node = SpilledTextFileAnalysis(name=name, parent=parent, file_path=path, byte_size=byte_size,
+                                       normalize_newlines=has_cr, content_size=content_size)
+        if self.memory_budget is None:
+            weakref.finalize(node, os.remove, path)
+        return node
+
+    def _read_member_excerpt(self, stream: BinaryIO, limit) -> Tuple[bytes, bytes]:
+        """Reads the first and last `limit / 2` bytes of a member, streaming over the rest."""
+        head = stream.read(limit // 2)
+        tail_size = limit - len(head)
+        tail = b""
+        while True:
+            chunk = stream.read(self.STREAM_CHUNK_SIZE)
+            if not chunk:
+                return head, tail
+            tail = (tail + chunk)[-tail_size:] if tail_size else b""
+
+    @staticmethod
+    def _read_ignore_patterns(root: DirectoryAnalysis):
+        patterns = set()
+        for child in root.children:
+            if child.name in IGNORE_FILE_NAMES and isinstance(child, TextFileAnalysis) and child.file_content != "[Non-text file]":
+                patterns.update(IgnorePatternManager.parse_ignore_lines(child.get_content().splitlines()))
+        return patterns
+
+    def _finish_directory(self, directory: DirectoryAnalysis, relative_dir, base_path, ignore_patterns_manager):
+        """Applies ignore patterns, the path filter and the generated files policy below a directory."""
+        if self.reproducible:
+            directory.children.sort(key=lambda child: child.name)
+        children = []
+        for child in directory.children:
+            relative_path = f"{relative_dir}/{child.name}" if relative_dir else child.name
+            is_dir = isinstance(child, DirectoryAnalysis)
+            # Files over the size limits may already be skipped (ignored) while reading
+            child.is_ignored = child.is_ignored or ignore_patterns_manager.should_ignore(
+                os.path.join(base_path, *relative_path.split("/")), is_dir=is_dir)
+            if is_dir:
+                if self.path_filter is None or self.path_filter.could_contain_matches(relative_path):
+                    self._finish_directory(child, relative_path, base_path, ignore_patterns_manager)
+                    children.append(child)
+                continue
+
+            if self.path_filter is not None and not self.path_filter.matches(relative_path):
+                if not self.path_filter.matches_name_only(relative_path):
+                    continue
+                child = self._name_only_file_node(child.name, child.is_ignored, directory)
+            elif self.generated_policy != GENERATED_KEEP and not child.is_ignored:
+                child = self._apply_generated_policy(relative_path, child)
+            children.append(child)
+        directory.children = children
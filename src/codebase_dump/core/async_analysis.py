@@ -0,0 +1,117 @@
+import asyncio
+import itertools
+import os
+import threading
+from concurrent.futures import Executor
+from typing import List, Set
+
+from codebase_dump.core.codebase_analysis import CodebaseAnalysis
+from codebase_dump.core.ignore_patterns_manager import IgnorePatternManager
+from codebase_dump.core.models import DirectoryAnalysis, FileRecord, RANK_BY_SIZE
+from codebase_dump.core.tokenizers import DEFAULT_TOKENIZER, normalize_tokenizer_names
+
+
+class AsyncCodebaseAnalysis(CodebaseAnalysis):
+    """asyncio entry point to the analysis, for embedding in async servers.
+
+    The walk of `CodebaseAnalysis`, file reads and tokenization run in an executor, so they never
+    block the event loop. Every `analyze_directory_async` call has its own concurrency limit, and at
+    most twice as many files are in flight, so the walk waits for reads instead of creating a task
+    per file of the tree. Cancelling the call cancels all of its pending reads and stops the walk.
+    """
+
+    WALK_BATCH_SIZE = 64
+
+    def __init__(self, max_concurrency=16, executor: Executor = None, tokenizers: List[str] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.max_concurrency = max_concurrency
+        self.executor = executor
+        self.tokenizers = normalize_tokenizer_names(tokenizers)
+
+    async def analyze_directory_async(self,
+                                      path,
+                                      ignore_patterns_manager: IgnorePatternManager,
+                                      ignore_top_files=0,
+                                      rank_by=RANK_BY_SIZE,
+                                      tokenizer=DEFAULT_TOKENIZER,
+                                      max_concurrency=None) -> DirectoryAnalysis:
+        """Analyzes a directory like `analyze_directory`, with at most `max_concurrency` blocking calls in flight."""
+        if path == ".":
+            path = os.getcwd()
+
+        loop = asyncio.get_running_loop()
+        concurrency = max_concurrency or self.max_concurrency
+        limiter = asyncio.Semaphore(concurrency)
+
+        async def run_blocking(func, *args):
+            async with limiter:
+                return await loop.run_in_executor(self.executor, func, *args)
+
+        result = DirectoryAnalysis(name=os.path.basename(path), is_ignored=ignore_patterns_manager.should_ignore(path, is_dir=True))
+        directories = {path: result}
+        # The walk is a blocking generator: batches of its records are pulled in the executor, one at a time.
+        records = self._iter_entries(path, ignore_patterns_manager, path)
+        records_lock = threading.Lock()
+
+        def next_records():
+            with records_lock:
+                return list(itertools.islice(records, self.WALK_BATCH_SIZE))
+
+        def close_records():
+            with records_lock:
+                records.close()
+
+        in_flight: Set[asyncio.Future] = set()
+        try:
+            while True:
+                batch = await run_blocking(next_records)
+                if not batch:
+                    break
+                for record in batch:
+                    directory = directories[record.directory]
+                    if record.is_dir:
+                        node = DirectoryAnalysis(name=os.path.basename(record.full_path), is_ignored=record.is_ignored, parent=directory)
+                        directories[record.full_path] = node
+                        directory.children.append(node)
+                        continue
+                    directory.children.append(None)
+                    if len(in_flight) >= 2 * concurrency:
+                        await self._wait_for_slot(in_flight)
+                    in_flight.add(asyncio.ensure_future(
+                        self._analyze_file_into_slot(record, directory, len(directory.children) - 1, run_blocking)))
+            if in_flight:
+                await asyncio.gather(*in_flight)
+        except BaseException:
+            for task in in_flight:
+                task.cancel()
+            # Closing the walk stops its scanner threads; it waits for a batch still being pulled. The call
+            # only returns once the walk is closed, even while it is being cancelled.
+            await asyncio.shield(loop.run_in_executor(self.executor, close_records))
+            raise
+
+        self._remove_empty_slots(result)
+        self._prune_unselected_directories(result)
+
+        if ignore_top_files > 0:
+            largest_files = await run_blocking(result.get_largest_files, ignore_top_files, rank_by, tokenizer)
+            self._ignore_largest_files(largest_files)
+        return result
+
+    @staticmethod
+    async def _wait_for_slot(in_flight: Set[asyncio.Future]):
+        """Waits until at least one file in flight is done, and drops the done ones, raising their errors."""
+        done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+        in_flight.difference_update(done)
+        for task in done:
+            task.result()
+
+    async def _analyze_file_into_slot(self, record: FileRecord, parent, slot, run_blocking):
+        try:
+            node = await run_blocking(record.to_node, parent)
+        except FileNotFoundError:
+            self._report_missing_file(record.full_path)
+            return
+
+        if node is not None and not node.is_ignored and not node.name_only:
+            await run_blocking(node.count_tokens_multi, self.tokenizers)
+        parent.children[slot] = node
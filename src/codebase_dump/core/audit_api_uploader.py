@@ -1,10 +1,24 @@
-import requests
+import codecs
+import itertools
+import json
+import os
+import time
+from typing import Callable, Iterable
 
 class AuditApiUploader:
-    def __init__(self, api_key, api_url, api_submitted_by):
+    """Uploads dumps to the audits API. `requests` is imported only when uploading, to keep CLI startup fast."""
+
+    UPLOAD_CHUNK_SIZE = 64 * 1024
+    RETRY_STATUS_CODES = {500, 502, 503, 504}
+
+    def __init__(self, api_key, api_url, api_submitted_by, timeout=(10, 300), max_retries=3, backoff_factor=1.0):
         self.api_key = api_key
         self.api_url = api_url
         self.api_submitted_by = api_submitted_by
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self._session = None
         
     def upload_audit(self, audit: str):
         if not audit:
@@ -12,20 +26,138 @@ class AuditApiUploader:
 
         print("Uploading to audits API...")        
                 
+        headers = self._build_headers()
+
+        payload = {
+            "text": audit
+        }
+
+        url = self.api_url + "api/repo/add"
+        response = self._post_with_retries(url, headers, lambda: {"json": payload})
+        self._handle_response(response)
+
+    def upload_audit_file(self, file_path: str):
+        """Uploads the dump stored in a file without loading it into memory.
+
+        The JSON body is streamed from the file with chunked transfer encoding over a pooled session.
+        Timeouts, connection errors and 5xx responses are retried with exponential backoff.
+        """
+        if os.path.getsize(file_path) == 0:
+            raise ValueError("Repo content is required to upload")
+
+        print("Uploading to audits API...")
+
+        headers = self._build_headers()
+        headers["Content-Type"] = "application/json"
+        url = self.api_url + "api/repo/add"
+
+        progress = {}
+
+        def request_body():
+            # The body is streamed again from the start of the file on every attempt
+            progress.update(bytes=0, start=time.perf_counter())
+            return {"data": self._stream_json_body(file_path, progress)}
+
+        response = self._post_with_retries(url, headers, request_body)
+        self._print_throughput(progress, progress["start"])
+        self._handle_response(response)
+
+    def _post_with_retries(self, url, headers, request_body: Callable[[], dict]):
+        """Posts over the pooled session, and returns the last response.
+
+        `request_body` returns the body arguments of `post` for each attempt. Timeouts, connection
+        errors and 5xx responses are retried with exponential backoff.
+        """
+        import requests
+
+        for attempt in range(self.max_retries + 1):
+            is_last_attempt = attempt == self.max_retries
+            try:
+                response = self.session.post(url, headers=headers, timeout=self.timeout, **request_body())
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if is_last_attempt:
+                    raise
+                print(f"Upload failed: {str(e)}")
+            else:
+                if response.status_code not in self.RETRY_STATUS_CODES or is_last_attempt:
+                    return response
+                print(f"Upload failed with status {response.status_code}")
+
+            delay = self.backoff_factor * (2 ** attempt)
+            print(f"Retrying in {delay:.1f}s ({attempt + 1}/{self.max_retries})...")
+            time.sleep(delay)
+
+    @property
+    def session(self):
+        """Pooled `requests.Session`, created on first use."""
+        if self._session is None:
+            import requests
+
+            self._session = requests.Session()
+        return self._session
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def upload_audit_chunks(self, chunks: Iterable[bytes]):
+        """Uploads the dump while it is being produced, e.g. by a formatter writing in another thread.
+
+        The chunks can be consumed only once, so this upload is not retried.
+        """
+        print("Uploading to audits API...")
+
+        headers = self._build_headers()
+        headers["Content-Type"] = "application/json"
+        url = self.api_url + "api/repo/add"
+
+        progress = {"bytes": 0}
+        start = time.perf_counter()
+        response = self.session.post(url, data=self._json_body(chunks, progress), headers=headers, timeout=self.timeout)
+        self._print_throughput(progress, start)
+        self._handle_response(response)
+
+    def _read_file_chunks(self, file_path):
+        with open(file_path, 'rb') as f:
+            while True:
+                raw = f.read(self.UPLOAD_CHUNK_SIZE)
+                if not raw:
+                    break
+                yield raw
+
+    def _stream_json_body(self, file_path, progress):
+        return self._json_body(self._read_file_chunks(file_path), progress)
+
+    def _json_body(self, raw_chunks, progress):
+        """Yields the `{"text": ...}` JSON body, escaping the raw UTF-8 content chunk by chunk."""
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        yield b'{"text": "'
+        progress["bytes"] += 10
+        for raw in itertools.chain(raw_chunks, [b""]):
+            text = decoder.decode(raw, final=not raw)
+            if text:
+                chunk = json.dumps(text)[1:-1].encode("ascii")
+                progress["bytes"] += len(chunk)
+                yield chunk
+        yield b'"}'
+        progress["bytes"] += 2
+
+    def _print_throughput(self, progress, start):
+        elapsed = time.perf_counter() - start
+        print(f"Sent {progress['bytes'] / 1024:.2f} KB in {elapsed:.2f}s "
+              f"({progress['bytes'] / 1024 / max(elapsed, 1e-6):.2f} KB/s)")
+
+    def _build_headers(self):
         headers = {
             "x-submitted-by": self.api_submitted_by
         }
 
         if self.api_key:
             headers["x-api-key"] = self.api_key
+        return headers
 
-        payload = {
-            "text": audit
-        }
-
-        url = self.api_url + "api/repo/add"
-        response = requests.post(url, json=payload, headers=headers)
-        
+    def _handle_response(self, response):
         if response.status_code != 200:
             if response.status_code == 413:
                 print(f"Parsed codebase is too big. Please reduce the size. You can use --ignore-top-large-files param to ignore the largest files or use ignore patterns.")
@@ -0,0 +1,125 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional
+
+from codebase_dump.core.ignore_patterns_manager import IgnorePatternManager
+from codebase_dump.core.output_formatter import OutputFormatterBase
+from codebase_dump.core.pipeline import PipelinedCodebaseAnalysis
+from codebase_dump.core.tokenizers import TokenCountCache, normalize_tokenizer_names, set_token_count_cache
+
+
+@dataclass
+class BatchEntry:
+    path: str
+    output_file: Optional[str] = None
+
+
+@dataclass
+class BatchResult:
+    path: str
+    output_file: Optional[str] = None
+    file_count: int = 0
+    text_size: int = 0
+    tokens: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+def read_manifest(manifest_path) -> List[BatchEntry]:
+    """Reads a batch manifest: one repository path per line, optionally followed by a tab and the output file.
+
+    Empty lines and lines starting with # are skipped. Relative paths are resolved against the manifest's directory.
+    """
+    manifest_dir = os.path.dirname(os.path.abspath(manifest_path))
+    entries = []
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+
+            path, _, output_file = line.partition("\t")
+            path = os.path.join(manifest_dir, path.strip())
+            output_file = output_file.strip() or None
+            if output_file:
+                output_file = os.path.join(manifest_dir, output_file)
+            entries.append(BatchEntry(path=os.path.normpath(path), output_file=output_file))
+    return entries
+
+
+class BatchRunner:
+    """Dumps many repositories in one process.
+
+    All repositories share a pool of reader/tokenizer threads, the tokenizers and a token count cache,
+    so files duplicated across repositories are tokenized once. Every repository gets its own
+    `IgnorePatternManager` and output file.
+    """
+
+    def __init__(self, formatter: OutputFormatterBase, output_dir=".", workers=None, jobs=2):
+        self.formatter = formatter
+        self.output_dir = output_dir
+        self.workers = workers or min(32, (os.cpu_count() or 1) + 4)
+        self.jobs = jobs
+        self.tokenizers = normalize_tokenizer_names(formatter.tokenizers)
+        self.token_count_cache = TokenCountCache()
+
+    def run(self, entries: List[BatchEntry]) -> List[BatchResult]:
+        set_token_count_cache(self.token_count_cache)
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="codebase-dump") as file_executor, \
+                    ThreadPoolExecutor(max_workers=self.jobs, thread_name_prefix="codebase-dump-repo") as repo_executor:
+                analysis = PipelinedCodebaseAnalysis(tokenizers=self.tokenizers, executor=file_executor)
+                futures = [repo_executor.submit(self._dump_repository, entry, analysis) for entry in entries]
+                return [future.result() for future in futures]
+        finally:
+            set_token_count_cache(None)
+
+    def get_output_path(self, entry: BatchEntry) -> str:
+        if entry.output_file:
+            return os.path.abspath(entry.output_file)
+        file_name = f"{os.path.basename(entry.path)}_codebase_dump{self.formatter.output_file_extension()}"
+        return os.path.abspath(os.path.join(self.output_dir, file_name))
+
+    def _dump_repository(self, entry: BatchEntry, analysis: PipelinedCodebaseAnalysis) -> BatchResult:
+        result = BatchResult(path=entry.path, output_file=self.get_output_path(entry))
+        start = time.perf_counter()
+        try:
+            if not os.path.isdir(entry.path):
+                raise FileNotFoundError(f"Directory not found: {entry.path}")
+            ignore_patterns_manager = IgnorePatternManager(entry.path)
+            data = analysis.analyze_directory(entry.path, ignore_patterns_manager, entry.path)
+
+            os.makedirs(os.path.dirname(result.output_file), exist_ok=True)
+            with open(result.output_file, 'wb') as f:
+                self.formatter.write(data, ignore_patterns_manager.ignore_patterns_as_str, f)
+
+            result.file_count = data.get_non_ignored_file_count()
+            result.text_size = data.get_non_ignored_text_content_size()
+            result.tokens = data.get_total_tokens(self.tokenizers[0])
+        except Exception as e:
+            result.error = str(e)
+        result.seconds = time.perf_counter() - start
+        return result
+
+    def generate_report(self, results: List[BatchResult], total_seconds: float) -> str:
+        output = "Batch summary\n\n"
+        for result in results:
+            if result.error:
+                output += f"- {result.path}: FAILED ({result.error})\n"
+            else:
+                output += (f"- {result.path}: {result.file_count} files, {result.text_size / 1024:.2f} KB, "
+                           f"{result.tokens} tokens in {result.seconds:.2f}s -> {result.output_file}\n")
+
+        succeeded = [result for result in results if not result.error]
+        file_count = sum(result.file_count for result in succeeded)
+        text_size = sum(result.text_size for result in succeeded)
+        elapsed = max(total_seconds, 1e-6)
+        output += f"\n- Repositories: {len(succeeded)} succeeded, {len(results) - len(succeeded)} failed\n"
+        output += f"- Total files: {file_count}\n"
+        output += f"- Total text content size: {text_size / 1024 / 1024:.2f} MB\n"
+        output += f"- Total tokens: {sum(result.tokens for result in succeeded)}\n"
+        output += f"- Total time: {total_seconds:.2f}s ({file_count / elapsed:.1f} files/s, {text_size / 1024 / 1024 / elapsed:.2f} MB/s)\n"
+        output += f"- Token cache: {self.token_count_cache.hits} hits, {self.token_count_cache.misses} misses\n"
+        return output
@@ -1,11 +1,104 @@
+import codecs
+import mmap
 import os
+from codebase_dump.core.file_classifier import FileClassifier
+from codebase_dump.core.generated_detector import GeneratedFileDetector, GENERATED_KEEP, GENERATED_EXCLUDE, GENERATED_COLLAPSE
+from codebase_dump.core.high_latency_io import DEFAULT_IO_WORKERS, DirectoryScanner, read_text_file
 from codebase_dump.core.ignore_patterns_manager import IgnorePatternManager
-from codebase_dump.core.models import DirectoryAnalysis, TextFileAnalysis
+from codebase_dump.core.memory_budget import MemoryBudget
+from codebase_dump.core.path_filter import PathFilter
+from typing import Iterator
+from codebase_dump.core.models import DirectoryAnalysis, TextFileAnalysis, MappedTextFileAnalysis, FileRecord, RANK_BY_SIZE
+from codebase_dump.core.tokenizers import DEFAULT_TOKENIZER, EstimateTokenizer
+from codebase_dump.core.top_k import TopK
+
+OVERSIZE_EXCERPT = "excerpt"
+OVERSIZE_SKIP = "skip"
 
 class CodebaseAnalysis:
 
-    def is_text_file(self, file_path):
+    DEFAULT_MMAP_THRESHOLD = 4 * 1024 * 1024
+    SNIFF_SIZE = 8192
+    VALIDATE_CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self,
+                 mmap_threshold=DEFAULT_MMAP_THRESHOLD,
+                 file_classifier: FileClassifier = None,
+                 skip_binary_files=False,
+                 max_file_bytes=None,
+                 max_file_tokens=None,
+                 oversize_policy=OVERSIZE_EXCERPT,
+                 generated_detector: GeneratedFileDetector = None,
+                 generated_policy=GENERATED_KEEP,
+                 path_filter: PathFilter = None,
+                 reproducible=False,
+                 memory_budget: MemoryBudget = None,
+                 high_latency_io=False,
+                 io_workers=DEFAULT_IO_WORKERS):
+        """Files of at least `mmap_threshold` bytes are memory-mapped instead of being read into memory.
+
+        Binary files recognized by `file_classifier` are never read. With `skip_binary_files`,
+        they are left out of the analysis instead of being stored as "[Non-text file]" nodes.
+
+        Files over `max_file_bytes`, or estimated from their size to be over `max_file_tokens`,
+        are never read in full: they are either skipped (marked as ignored) or replaced by an
+        excerpt of their head and tail, depending on `oversize_policy`.
+
+        Files recognized by `generated_detector` (lockfiles, minified and generated code) are
+        kept, excluded (marked as ignored) or collapsed to a placeholder, depending on `generated_policy`.
+
+        With a `path_filter`, only the selected files are analyzed, and directories which cannot
+        contain any of them are not entered.
+
+        With `reproducible`, directories are listed in sorted order and line endings of all files are
+        normalized to LF, so the analysis does not depend on the filesystem or the checkout's line endings.
+
+        With a `memory_budget`, file contents which do not fit in it are spilled to temporary files,
+        and reading waits while other files being read use up the budget.
+
+        With `high_latency_io`, for network filesystems, directories are listed and their files stat'ed
+        ahead of the walk by `io_workers` threads, with read-ahead hints for the files to be read,
+        and files are read with a single open and read each.
+        """
+        if oversize_policy not in (OVERSIZE_EXCERPT, OVERSIZE_SKIP):
+            raise ValueError(f"Unknown oversize policy: {oversize_policy}")
+        if generated_policy not in (GENERATED_KEEP, GENERATED_EXCLUDE, GENERATED_COLLAPSE):
+            raise ValueError(f"Unknown generated files policy: {generated_policy}")
+
+        self.mmap_threshold = mmap_threshold
+        self.file_classifier = file_classifier or FileClassifier()
+        self.skip_binary_files = skip_binary_files
+        self.max_file_bytes = max_file_bytes
+        self.max_file_tokens = max_file_tokens
+        self.oversize_policy = oversize_policy
+        self.generated_detector = generated_detector or GeneratedFileDetector()
+        self.generated_policy = generated_policy
+        self.path_filter = path_filter
+        self.reproducible = reproducible
+        self.memory_budget = memory_budget
+        self.high_latency_io = high_latency_io
+        self.io_workers = io_workers
+
+    @property
+    def file_size_limit(self):
+        """Size in bytes over which files are not read in full, or None without limits."""
+        limits = []
+        if self.max_file_bytes:
+            limits.append(self.max_file_bytes)
+        if self.max_file_tokens:
+            limits.append(self.max_file_tokens * EstimateTokenizer.CHARS_PER_TOKEN)
+        return min(limits) if limits else None
+
+    def is_text_file(self, file_path, file_size=None):
+        if self.file_classifier.is_binary(file_path):
+            return False
+        return self._is_utf8_file(file_path, file_size)
+
+    def _is_utf8_file(self, file_path, file_size=None):
         try:
+            if file_size is not None and self.mmap_threshold and file_size >= self.mmap_threshold:
+                with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    return self._scan_mapped_text(mapped) is not None
             with open(file_path, 'r') as file:
                 file.read()
             return True
@@ -26,7 +119,10 @@ class CodebaseAnalysis:
 
     def _list_directory_items(self, path):
          try:
-            return [os.path.join(path, item) for item in os.listdir(path)]
+            items = os.listdir(path)
+            if self.reproducible:
+                items.sort()
+            return [os.path.join(path, item) for item in items]
          except FileNotFoundError:
              print(f"Directory not found: {path}")
              return []
@@ -34,59 +130,303 @@ class CodebaseAnalysis:
              print(f"Permission denied for: {path}")
              return []
 
-    def _analyze_file(self, item_path, is_ignored, parent):
-        file_size = os.path.getsize(item_path)
-        if self.is_text_file(item_path):
+    def _scan_mapped_text(self, mapped):
+        """Returns (size in characters, has CR characters) of memory-mapped UTF-8 content, or None if it is not UTF-8.
+
+        Like files read in text mode, content with invalid UTF-8 is not text, and the size counts
+        CRLF line endings as a single character. UTF-8 is decoded chunk by chunk, so no string of
+        the full file size is created.
+        """
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        size = 0
+        crlf_count = 0
+        has_cr = False
+        ends_with_cr = False
+        try:
+            for offset in range(0, len(mapped), self.VALIDATE_CHUNK_SIZE):
+                text = decoder.decode(mapped[offset:offset + self.VALIDATE_CHUNK_SIZE])
+                if not text:
+                    continue
+                size += len(text)
+                if "\r" in text:
+                    has_cr = True
+                    crlf_count += text.count("\r\n")
+                if ends_with_cr and text[0] == "\n":
+                    crlf_count += 1  # Split across chunks
+                ends_with_cr = text[-1] == "\r"
+            decoder.decode(b"", final=True)
+        except UnicodeDecodeError:
+            return None
+        return size - crlf_count, has_cr
+
+    def _analyze_large_file(self, item_path, file_size, is_ignored, parent):
+        with open(item_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            scanned = self._scan_mapped_text(mapped)
+
+        if scanned is None:
+            return self._binary_file_node(item_path, is_ignored, parent)
+        content_size, has_cr = scanned
+        return MappedTextFileAnalysis(name=os.path.basename(item_path), is_ignored=is_ignored, parent=parent,
+                                      file_path=item_path, byte_size=file_size, normalize_newlines=has_cr,
+                                      content_size=content_size)
+
+    def _binary_file_node(self, item_path, is_ignored, parent):
+        if self.skip_binary_files:
+            return None
+        return TextFileAnalysis(name=os.path.basename(item_path), file_content="[Non-text file]", is_ignored=is_ignored, parent=parent)
+
+    def _read_excerpt(self, item_path, file_size, limit):
+        """Reads the first and last `limit / 2` bytes of a file, seeking over the rest."""
+        head_size = limit // 2
+        tail_size = limit - head_size
+        with open(item_path, 'rb') as f:
+            head = f.read(head_size)
+            f.seek(max(file_size - tail_size, head_size))
+            tail = f.read(tail_size)
+        return head, tail
+
+    def _analyze_oversize_file(self, item_path, file_size, limit, is_ignored, parent):
+        name = os.path.basename(item_path)
+        if self.oversize_policy == OVERSIZE_SKIP:
+            return TextFileAnalysis(name=name, is_ignored=True, parent=parent, original_size=file_size)
+
+        head, tail = self._read_excerpt(item_path, file_size, limit)
+        return self._excerpt_file_node(item_path, head, tail, file_size, is_ignored, parent)
+
+    def _excerpt_file_node(self, item_path, head: bytes, tail: bytes, file_size, is_ignored, parent):
+        name = os.path.basename(item_path)
+        if self.file_classifier.is_binary_header(head[:self.SNIFF_SIZE]):
+            return self._binary_file_node(item_path, is_ignored, parent)
+
+        omitted = file_size - len(head) - len(tail)
+        head, tail = head.decode('utf-8', errors='ignore'), tail.decode('utf-8', errors='ignore')
+        if self.reproducible:
+            head, tail = (text.replace("\r\n", "\n").replace("\r", "\n") for text in (head, tail))
+        content = head + f"\n\n[... {omitted} bytes truncated ...]\n\n" + tail
+        return TextFileAnalysis(name=name, file_content=content, is_ignored=is_ignored, parent=parent, original_size=file_size)
+
+    def _apply_generated_policy(self, item_path, node):
+        """Excludes or collapses the node if the file looks generated, inspecting only a prefix of its content."""
+        if self.generated_policy == GENERATED_KEEP or node is None or node.is_ignored or node.file_content == "[Non-text file]":
+            return node
+
+        detector = self.generated_detector
+        reason = detector.detect_by_name(item_path)
+        if reason is None:
+            reason = detector.detect_by_content(node.get_content_head(detector.prefix_size))
+        if reason is None:
+            return node
+        return self._generated_file_node(node.name, reason, node.original_size or node.size, node.parent)
+
+    def _generated_file_node(self, name, reason, generated_size, parent):
+        if self.generated_policy == GENERATED_EXCLUDE:
+            node = TextFileAnalysis(name=name, is_ignored=True, parent=parent)
+        else:
+            node = TextFileAnalysis(name=name, file_content=f"[Generated file: {reason}, {generated_size} bytes collapsed]", parent=parent)
+        node.generated_reason = reason
+        node.generated_size = generated_size
+        return node
+
+    def _analyze_file(self, item_path, is_ignored, parent, file_size=None):
+        """Analyzes a file into a node. Returns None for binary files when `skip_binary_files` is set."""
+        if self.memory_budget is None:
+            return self._analyze_file_content(item_path, is_ignored, parent, file_size)
+        if file_size is None:
+            file_size = os.path.getsize(item_path)
+        # Memory-mapped files are never read into memory, so they only take a reader's slot.
+        reading_size = min(file_size, self.mmap_threshold) if self.mmap_threshold else file_size
+        with self.memory_budget.reading_file(reading_size):
+            return self.memory_budget.retain(self._analyze_file_content(item_path, is_ignored, parent, file_size))
+
+    def _analyze_file_content(self, item_path, is_ignored, parent, file_size=None):
+        if self.generated_policy == GENERATED_EXCLUDE and not is_ignored:
+            reason = self.generated_detector.detect_by_name(item_path)
+            if reason is not None:
+                # Excluded by name: the file is never read.
+                size = file_size if file_size is not None else os.path.getsize(item_path)
+                return self._generated_file_node(os.path.basename(item_path), reason, size, parent)
+        return self._apply_generated_policy(item_path, self._read_file_node(item_path, is_ignored, parent, file_size))
+
+    def _read_file_node(self, item_path, is_ignored, parent, file_size=None):
+        if file_size is None:
+            file_size = os.path.getsize(item_path)
+        if self.file_classifier.is_binary(item_path):
+            return self._binary_file_node(item_path, is_ignored, parent)
+        limit = self.file_size_limit
+        if limit is not None and file_size > limit:
+            return self._analyze_oversize_file(item_path, file_size, limit, is_ignored, parent)
+        if self.mmap_threshold and file_size >= self.mmap_threshold:
+            return self._analyze_large_file(item_path, file_size, is_ignored, parent)
+        if self.high_latency_io:
+            content = read_text_file(item_path)
+            if content is None:
+                return self._binary_file_node(item_path, is_ignored, parent)
+        elif self._is_utf8_file(item_path):
              content = self.read_file_content(item_path)
         else:
-             content = "[Non-text file]"
+             return self._binary_file_node(item_path, is_ignored, parent)
         return TextFileAnalysis(name=os.path.basename(item_path), file_content=content, is_ignored=is_ignored, parent=parent)
     
-    def _create_node(self, item_path, ignore_patterns_manager, parent):
-        """Creates a node (file or directory) for a given path."""
+    def _iter_entries(self, path, ignore_patterns_manager, base_path, sort_entries=False, skip_ignored_dirs=False,
+                      scanner: DirectoryScanner = None) -> Iterator[FileRecord]:
+        """Yields records of files and directories below `path` in depth-first pre-order."""
+        if self.high_latency_io and scanner is None:
+            with DirectoryScanner(self.io_workers, prefetch_file=self._should_prefetch) as scanner:
+                yield from self._iter_entries(path, ignore_patterns_manager, base_path, sort_entries, skip_ignored_dirs, scanner)
+            return
+
+        for item_path, is_file, is_dir, size in self._list_directory_entries(path, base_path, sort_entries, scanner):
+            if is_file:
+                selected, name_only = self._select_file(item_path, base_path)
+                if selected:
+                    yield FileRecord(item_path, path, base_path, ignore_patterns_manager.should_ignore(item_path, is_dir=False),
+                                     is_dir=False, analysis=self, name_only=name_only, size=size)
+            elif is_dir:
+                if not self._is_selected_directory(item_path, base_path):
+                    continue
+                is_ignored = ignore_patterns_manager.should_ignore(item_path, is_dir=True)
+                yield FileRecord(item_path, path, base_path, is_ignored, is_dir=True, analysis=self)
+                if not (skip_ignored_dirs and is_ignored):
+                    yield from self._iter_entries(item_path, ignore_patterns_manager, base_path, sort_entries, skip_ignored_dirs, scanner)
+
+    def _list_directory_entries(self, path, base_path, sort_entries=False, scanner: DirectoryScanner = None):
+        """Returns (path, is_file, is_dir, size or None) for the entries of a directory.
+
+        With a `scanner`, the listing comes from it, and the subdirectories to be walked are submitted to it right away.
+        """
+        if scanner is None:
+            item_paths = self._list_directory_items(path)
+            if sort_entries:
+                item_paths = sorted(item_paths)
+            return ((item_path, True, False, None) if os.path.isfile(item_path) else (item_path, False, os.path.isdir(item_path), None)
+                    for item_path in item_paths)
+
+        try:
+            entries = scanner.scan(path)
+        except FileNotFoundError:
+            print(f"Directory not found: {path}")
+            return []
+        except PermissionError:
+            print(f"Permission denied for: {path}")
+            return []
+        if sort_entries or self.reproducible:
+            entries.sort(key=lambda entry: entry.path)
+        for entry in entries:
+            if entry.is_dir and self._is_selected_directory(entry.path, base_path):
+                scanner.prefetch(entry.path)
+        return [(entry.path, entry.is_file, entry.is_dir, entry.size) for entry in entries]
+
+    def _should_prefetch(self, item_path, size) -> bool:
+        """Whether a file found by the scanner will be read in full, so its content is worth prefetching."""
+        limit = self.file_size_limit
+        if limit is not None and size > limit:
+            return False
+        if self.mmap_threshold and size >= self.mmap_threshold:
+            return False
+        return size > 0 and not self.file_classifier.is_binary(item_path)
+
+    def _select_file(self, item_path, base_path):
+        """Returns (selected, name_only): whether the path filter selects a file, and whether only by its name."""
+        if self.path_filter is None:
+            return True, False
+        relative_path = PathFilter.relative_path(item_path, base_path)
+        if self.path_filter.matches(relative_path):
+            return True, False
+        if self.path_filter.matches_name_only(relative_path):
+            return True, True
+        return False, False
+
+    def _is_selected_directory(self, item_path, base_path):
+        """Tells whether a directory can contain files selected by the path filter."""
+        if self.path_filter is None:
+            return True
+        return self.path_filter.could_contain_matches(PathFilter.relative_path(item_path, base_path))
+
+    def _name_only_file_node(self, item_path, is_ignored, parent):
+        return TextFileAnalysis(name=os.path.basename(item_path), is_ignored=is_ignored, parent=parent, name_only=True)
+
+    def _prune_unselected_directories(self, directory: DirectoryAnalysis):
+        """Removes directories left without files by the path filter, so the tree only shows the selection."""
+        if self.path_filter is None:
+            return
+        for child in directory.children:
+            if isinstance(child, DirectoryAnalysis):
+                self._prune_unselected_directories(child)
+        directory.children = [child for child in directory.children
+                              if not isinstance(child, DirectoryAnalysis) or child.children]
+
+    def _remove_empty_slots(self, directory: DirectoryAnalysis):
+        """Removes the slots left empty by files which gave no node (e.g. skipped binary files), in concurrent walks."""
+        directory.children = [child for child in directory.children if child is not None]
+        for child in directory.children:
+            if isinstance(child, DirectoryAnalysis):
+                self._remove_empty_slots(child)
+
+    def iter_files(self, path, ignore_patterns_manager: IgnorePatternManager, include_ignored=False) -> Iterator[FileRecord]:
+        """Yields records of the files below `path`, sorted by path, without building the analysis tree.
+
+        Ignored directories are not entered unless `include_ignored` is set. Records are cheap:
+        size, text classification and content are read only when accessed.
+        """
+        if path == ".":
+            path = os.getcwd()
+
+        for record in self._iter_entries(path, ignore_patterns_manager, path, sort_entries=True, skip_ignored_dirs=not include_ignored):
+            if not record.is_dir and (include_ignored or not record.is_ignored):
+                yield record
 
-        is_ignored = ignore_patterns_manager.should_ignore(item_path)
-        
-        if os.path.isfile(item_path):
-            try:
-              return self._analyze_file(item_path, is_ignored, parent)
-            except FileNotFoundError:
-              print(f"File not found {item_path}")
-              return None
-        elif os.path.isdir(item_path):
-            return DirectoryAnalysis(name=os.path.basename(item_path), is_ignored=is_ignored, parent=parent)
-        
-        return None
-    
     def analyze_directory(self, 
                           path, 
                           ignore_patterns_manager: IgnorePatternManager, 
                           base_path, 
                           parent=None, 
-                          ignore_top_files=0) -> DirectoryAnalysis:
-        """Recursively analyzes a directory and its contents."""
+                          ignore_top_files=0,
+                          rank_by=RANK_BY_SIZE,
+                          tokenizer=DEFAULT_TOKENIZER) -> DirectoryAnalysis:
+        """Analyzes a directory and its contents into a tree, consuming the walk records in order.
+
+        With `ignore_top_files`, the largest non-ignored files (ranked by size or tokens) are
+        collected in a bounded heap during the walk and marked as ignored once it is done.
+        """
 
         if path == ".":
             path = os.getcwd()
+
+        largest_files = TopK(ignore_top_files) if parent is None and ignore_top_files > 0 else None
         
-        result = DirectoryAnalysis(name=os.path.basename(path), is_ignored=ignore_patterns_manager.should_ignore(path), parent=parent)
-        
-        for item_path in self._list_directory_items(path):
-            node = self._create_node(item_path, ignore_patterns_manager, result)
-            if node:
-                if isinstance(node, DirectoryAnalysis):
-                   subdir = self.analyze_directory(item_path, ignore_patterns_manager, base_path, result, ignore_top_files=ignore_top_files)
-                   if subdir:
-                        result.children.append(subdir)
-                else:
-                    result.children.append(node)
+        result = DirectoryAnalysis(name=os.path.basename(path), is_ignored=ignore_patterns_manager.should_ignore(path, is_dir=True), parent=parent)
+        directories = {path: result}
+
+        for record in self._iter_entries(path, ignore_patterns_manager, base_path):
+            directory = directories[record.directory]
+            if record.is_dir:
+                node = DirectoryAnalysis(name=os.path.basename(record.full_path), is_ignored=record.is_ignored, parent=directory)
+                directories[record.full_path] = node
+            else:
+                try:
+                    node = record.to_node(directory)
+                except FileNotFoundError:
+                    self._report_missing_file(record.full_path)
+                    continue
+                if node is None:
+                    continue
+                if largest_files is not None and not node.is_ignored:
+                    largest_files.push(node.size if rank_by == RANK_BY_SIZE else node.count_tokens(tokenizer), node)
+            directory.children.append(node)
         
-        is_root_dir = parent is None
-        if is_root_dir and ignore_top_files > 0:
-            largest_files = result.get_largest_files(ignore_top_files)
-            print(f"Ignoring {ignore_top_files} largest files:")
-            for file in largest_files:
-                print(f"  {file.get_full_path()} ({file.size} bytes)")
-                file.is_ignored = True
-
-        return result
\ No newline at end of file
+        self._prune_unselected_directories(result)
+        if largest_files is not None:
+            self._ignore_largest_files(largest_files.items())
+
+        return result
+
+    @staticmethod
+    def _report_missing_file(item_path):
+        """Reports a file removed between the directory listing and its read, which is left out of the tree."""
+        print(f"File not found {item_path}")
+
+    def _ignore_largest_files(self, files):
+        print(f"Ignoring {len(files)} largest files:")
+        for file in files:
+            print(f"  {file.get_full_path()} ({file.size} bytes)")
+            file.is_ignored = True
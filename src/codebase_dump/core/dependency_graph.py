@@ -0,0 +1,288 @@
+import heapq
+import posixpath
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from codebase_dump.core.models import TextFileAnalysis
+
+ORDER_TREE = "tree"
+ORDER_DEPENDENCIES = "dependencies"
+ORDER_CLUSTERS = "clusters"
+
+# Import of a module (a file) or of a package (a directory), as a "/"-separated path without extension.
+# Relative imports start with "./" or "../".
+Import = Tuple[str, bool]
+
+_LANGUAGES_BY_EXTENSION = {
+    ".py": "python", ".pyi": "python",
+    ".js": "javascript", ".jsx": "javascript", ".mjs": "javascript", ".cjs": "javascript",
+    ".ts": "javascript", ".tsx": "javascript", ".mts": "javascript", ".cts": "javascript",
+    ".go": "go",
+    ".java": "java",
+    ".c": "c", ".h": "c", ".cc": "c", ".cpp": "c", ".cxx": "c", ".hh": "c", ".hpp": "c", ".hxx": "c",
+}
+_PACKAGE_ENTRY_NAMES = {"__init__", "index", "mod"}
+
+# Imports are looked for in this many first characters of a file. Larger files are data or generated
+# code, whose imports, if any, are at the top, and are not decoded whole just for their imports.
+IMPORT_SCAN_SIZE = 256 * 1024
+
+_PYTHON_FROM_IMPORT = re.compile(r"^[ \t]*from[ \t]+(\.*)([\w.]*)[ \t]+import[ \t]+\(?([\w, \t]+)", re.MULTILINE)
+_PYTHON_IMPORT = re.compile(r"^[ \t]*import[ \t]+([\w.]+(?:[ \t]*,[ \t]*[\w.]+)*)", re.MULTILINE)
+_JAVASCRIPT_IMPORT = re.compile(r"""(?:\bfrom|\brequire\(|\bimport\(|^[ \t]*import)[ \t]*['"]([^'"\n]+)['"]""", re.MULTILINE)
+_GO_IMPORT = re.compile(r"""^import[ \t]+(?:[\w.]+[ \t]+)?"([^"\n]+)"|^import[ \t]*\(([^)]*)\)""", re.MULTILINE)
+_GO_IMPORT_PATH = re.compile(r'"([^"\n]+)"')
+_JAVA_IMPORT = re.compile(r"^[ \t]*import[ \t]+(static[ \t]+)?([\w.]+?)(\.\*)?[ \t]*;", re.MULTILINE)
+_C_INCLUDE = re.compile(r"""^[ \t]*#[ \t]*include[ \t]*["<]([^">\n]+)[">]""", re.MULTILINE)
+
+
+def get_import_language(path: str) -> Optional[str]:
+    return _LANGUAGES_BY_EXTENSION.get(posixpath.splitext(path)[1].lower())
+
+
+def _strip_extension(module: str) -> str:
+    head, ext = posixpath.splitext(module)
+    return head if ext.lower() in _LANGUAGES_BY_EXTENSION else module
+
+
+def _python_relative(dots: str) -> str:
+    return "./" if len(dots) == 1 else "../" * (len(dots) - 1)
+
+
+def extract_imports(path: str, content: str) -> List[Import]:
+    """Returns the imports of a Python, JavaScript/TypeScript, Go, Java or C/C++ file, parsed with regular expressions.
+
+    `from shop.payments import gateway` gives both shop/payments and shop/payments/gateway, since
+    the imported name may be a module; names which are not files of the codebase are dropped when resolving.
+    """
+    language = get_import_language(path)
+    imports: List[Import] = []
+    if language == "python":
+        if "import" not in content:
+            return imports
+        for dots, module, names in _PYTHON_FROM_IMPORT.findall(content):
+            base = (_python_relative(dots) if dots else "") + module.replace(".", "/")
+            if module:
+                imports.append((base, False))
+            for name in names.split(","):
+                name = name.split()[0] if name.split() else ""
+                if name and name != "*":
+                    imports.append((base.rstrip("/") + "/" + name if base else name, False))
+        for modules in _PYTHON_IMPORT.findall(content):
+            imports.extend((module.strip().replace(".", "/"), False) for module in modules.split(","))
+    elif language == "javascript":
+        imports.extend((_strip_extension(module), False) for module in _JAVASCRIPT_IMPORT.findall(content))
+    elif language == "go":
+        for single, block in _GO_IMPORT.findall(content):
+            modules = [single] if single else _GO_IMPORT_PATH.findall(block)
+            imports.extend((module, True) for module in modules)
+    elif language == "java":
+        for is_static, module, wildcard in _JAVA_IMPORT.findall(content):
+            module = module.replace(".", "/")
+            if is_static:
+                module = posixpath.dirname(module) if not wildcard else module
+                imports.append((module, False))
+            else:
+                imports.append((module, bool(wildcard)))
+    elif language == "c":
+        imports.extend((_strip_extension(module), False) for module in _C_INCLUDE.findall(content))
+    return imports
+
+
+def _is_suffix(path: str, module: str) -> bool:
+    """Whether a path of the codebase and a module path name the same thing, either one being nested deeper."""
+    return path == module or path.endswith("/" + module) or module.endswith("/" + path)
+
+
+def extract_file_imports(path: str, node: TextFileAnalysis) -> List[Import]:
+    """Returns the imports of a file node, reading at most `IMPORT_SCAN_SIZE` characters of its content.
+
+    Files of languages whose imports are not parsed are not read at all.
+    """
+    if get_import_language(path) is None:
+        return []
+    return extract_imports(path, node.get_content_head(IMPORT_SCAN_SIZE))
+
+
+class DependencyGraph:
+    """Graph of the imports between the files of a codebase.
+
+    Imports are resolved to files of the codebase by path suffix: `shop.payments` matches
+    src/shop/payments.py, and the Go package github.com/org/repo/internal/db matches the files in internal/db.
+    Imports which do not resolve (the standard library, third party packages) are dropped.
+    Building the graph is linear in the number of files and imports.
+    """
+
+    def __init__(self, paths: Sequence[str], imports: Sequence[Iterable[Import]]):
+        self.paths = [path.replace("\\", "/") for path in paths]
+        self._modules = [_strip_extension(path) for path in self.paths]
+        self._files_by_stem: Dict[str, List[int]] = defaultdict(list)
+        self._files_by_module: Dict[str, int] = {}
+        self._files_by_directory: Dict[str, List[int]] = defaultdict(list)
+        self._directories_by_name: Dict[str, List[str]] = defaultdict(list)
+        for index, module in enumerate(self._modules):
+            self._files_by_stem[posixpath.basename(module)].append(index)
+            self._files_by_module.setdefault(module, index)
+            directory = posixpath.dirname(module)
+            if directory not in self._files_by_directory:
+                self._directories_by_name[posixpath.basename(directory)].append(directory)
+            self._files_by_directory[directory].append(index)
+
+        self.imports: List[List[int]] = []
+        for index, file_imports in enumerate(imports):
+            resolved = set()
+            for module, is_package in file_imports:
+                resolved.update(self.resolve(index, module, is_package))
+            resolved.discard(index)
+            self.imports.append(sorted(resolved, key=self.paths.__getitem__))
+
+    @classmethod
+    def build(cls, files: Iterable[Tuple[str, str]]) -> "DependencyGraph":
+        """Builds the graph from (path relative to the analyzed root, content) pairs."""
+        paths, imports = [], []
+        for path, content in files:
+            paths.append(path)
+            imports.append(extract_imports(path, content))
+        return cls(paths, imports)
+
+    def _package_files(self, importer: int, directory: str, is_package: bool) -> List[int]:
+        files = self._files_by_directory.get(directory, ())
+        if is_package:
+            language = get_import_language(self.paths[importer])
+            return [index for index in files if get_import_language(self.paths[index]) == language]
+        return [index for index in files if posixpath.basename(self._modules[index]) in _PACKAGE_ENTRY_NAMES]
+
+    def resolve(self, importer: int, module: str, is_package=False) -> List[int]:
+        """Returns the files an import of the file `importer` refers to."""
+        if module.startswith("./") or module.startswith("../"):
+            target = posixpath.normpath(posixpath.join(posixpath.dirname(self.paths[importer]), module))
+            if not is_package and target in self._files_by_module:
+                return [self._files_by_module[target]]
+            return self._package_files(importer, target, is_package)
+
+        module = module.strip("/")
+        name = module.rpartition("/")[2]
+        if not is_package:
+            files = [index for index in self._files_by_stem.get(name, ()) if _is_suffix(self._modules[index], module)]
+            if files:
+                return files
+        return [index
+                for directory in self._directories_by_name.get(name, ()) if _is_suffix(directory, module)
+                for index in self._package_files(importer, directory, is_package)]
+
+    @property
+    def edge_count(self) -> int:
+        return sum(len(imports) for imports in self.imports)
+
+    def neighbors(self) -> List[set]:
+        """Returns the files each file imports or is imported by."""
+        neighbors = [set(imports) for imports in self.imports]
+        for index, imports in enumerate(self.imports):
+            for imported in imports:
+                neighbors[imported].add(index)
+        return neighbors
+
+    def _strongly_connected_components(self) -> List[List[int]]:
+        """Tarjan's algorithm, iterative. Components are returned dependencies first."""
+        index_of: Dict[int, int] = {}
+        low: Dict[int, int] = {}
+        stack: List[int] = []
+        on_stack = set()
+        components: List[List[int]] = []
+        counter = 0
+        for root in range(len(self.paths)):
+            if root in index_of:
+                continue
+            work = [(root, 0)]
+            while work:
+                node, child_position = work.pop()
+                if child_position == 0:
+                    index_of[node] = low[node] = counter
+                    counter += 1
+                    stack.append(node)
+                    on_stack.add(node)
+                imports = self.imports[node]
+                if child_position < len(imports):
+                    work.append((node, child_position + 1))
+                    child = imports[child_position]
+                    if child not in index_of:
+                        work.append((child, 0))
+                    elif child in on_stack:
+                        low[node] = min(low[node], index_of[child])
+                    continue
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index_of[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+        return components
+
+    def topological_order(self) -> List[int]:
+        """Returns the files with every file after the files it imports, ties broken by path.
+
+        Files in an import cycle are kept together, in path order.
+        """
+        components = [sorted(component, key=self.paths.__getitem__) for component in self._strongly_connected_components()]
+        component_of = {}
+        for component_index, component in enumerate(components):
+            for index in component:
+                component_of[index] = component_index
+
+        dependents: List[set] = [set() for _ in components]
+        pending = [0] * len(components)
+        for index, imports in enumerate(self.imports):
+            for imported in imports:
+                source, target = component_of[index], component_of[imported]
+                if source != target and source not in dependents[target]:
+                    dependents[target].add(source)
+                    pending[source] += 1
+
+        ready = [(self.paths[component[0]], component_index) for component_index, component in enumerate(components)
+                 if pending[component_index] == 0]
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            _, component_index = heapq.heappop(ready)
+            order.extend(components[component_index])
+            for dependent in dependents[component_index]:
+                pending[dependent] -= 1
+                if pending[dependent] == 0:
+                    heapq.heappush(ready, (self.paths[components[dependent][0]], dependent))
+        return order
+
+    def clusters(self) -> List[List[int]]:
+        """Returns the groups of files connected by imports, each in topological order.
+
+        Larger clusters come first; files without any import between them and other files come last, one per cluster.
+        """
+        parent = list(range(len(self.paths)))
+
+        def find(index):
+            while parent[index] != index:
+                parent[index] = parent[parent[index]]
+                index = parent[index]
+            return index
+
+        for index, imports in enumerate(self.imports):
+            for imported in imports:
+                parent[find(index)] = find(imported)
+
+        clusters: Dict[int, List[int]] = defaultdict(list)
+        for index in self.topological_order():
+            clusters[find(index)].append(index)
+        return sorted(clusters.values(), key=lambda cluster: (-len(cluster), self.paths[cluster[0]]))
+
+    def order(self, order: str) -> List[int]:
+        if order == ORDER_DEPENDENCIES:
+            return self.topological_order()
+        if order == ORDER_CLUSTERS:
+            return [index for cluster in self.clusters() for index in cluster]
+        return list(range(len(self.paths)))
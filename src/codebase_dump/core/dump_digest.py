@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+from typing import BinaryIO, Dict, List, Optional
+
+from codebase_dump.core.models import DirectoryAnalysis, NodeAnalysis, TextFileAnalysis
+
+DIGEST_VERSION = 1
+DIGEST_SUFFIX = ".digest.json"
+
+# Leaf digests of files listed in the dump without their content
+_NAME_ONLY_DIGEST = hashlib.sha256(b"name-only").hexdigest()
+_NON_TEXT_DIGEST = hashlib.sha256(b"non-text").hexdigest()
+
+
+class HashingStream:
+    """Write-only binary stream which passes data through and hashes it."""
+
+    def __init__(self, stream: BinaryIO, hasher=None):
+        self.stream = stream
+        self.hasher = hasher or hashlib.sha256()
+        self.size = 0
+
+    def write(self, data) -> int:
+        self.stream.write(data)
+        self.hasher.update(data)
+        self.size += memoryview(data).nbytes
+        return len(data)
+
+
+class DumpDigest:
+    """Content digests of a dump: a SHA-256 of the whole output, and a Merkle hash of every directory.
+
+    Built by `OutputFormatterBase.write` while the dump is streamed: every written file content is
+    hashed on its way to the output, and directory hashes are then combined from their children's
+    names and hashes. Saved next to the dump as `<dump>.digest.json`, so the next run can tell
+    whether the dump changed at all, and which directories did.
+    """
+
+    def __init__(self, dump_digest: Optional[str] = None, dump_size: Optional[int] = None,
+                 directories: Dict[str, str] = None, uploaded_to: Optional[str] = None):
+        self.dump_digest = dump_digest
+        self.dump_size = dump_size
+        self.directories: Dict[str, str] = directories or {}
+        self.uploaded_to = uploaded_to
+        self.root_digest: Optional[str] = None
+        self.file_digests: Dict[str, str] = {}
+        self._stream: Optional[HashingStream] = None
+
+    def wrap(self, stream: BinaryIO) -> HashingStream:
+        """Returns a stream hashing everything written into the dump."""
+        self._stream = HashingStream(stream)
+        return self._stream
+
+    def add_file(self, path, digest: str):
+        self.file_digests[path] = digest
+
+    def finish(self, data: DirectoryAnalysis):
+        """Computes the directory hashes once all files were written, and the digest of the whole dump."""
+        self.directories = {}
+        self.root_digest = self._hash_node(data, data.name)
+        if self._stream is not None:
+            self.dump_digest = self._stream.hasher.hexdigest()
+            self.dump_size = self._stream.size
+
+    def _hash_node(self, node: NodeAnalysis, path) -> Optional[str]:
+        if node.is_ignored:
+            return None
+        if isinstance(node, TextFileAnalysis):
+            if node.name_only:
+                return _NAME_ONLY_DIGEST
+            if node.file_content == "[Non-text file]":
+                return _NON_TEXT_DIGEST
+            return self.file_digests.get(path, _NAME_ONLY_DIGEST)
+
+        hasher = hashlib.sha256()
+        for child in sorted(node.children, key=lambda child: child.name):
+            child_digest = self._hash_node(child, os.path.join(path, child.name))
+            if child_digest is not None:
+                kind = "d" if isinstance(child, DirectoryAnalysis) else "f"
+                hasher.update(f"{kind} {child_digest} {child.name}\n".encode("utf-8", errors="surrogatepass"))
+        digest = hasher.hexdigest()
+        self.directories[path.replace(os.sep, "/")] = digest
+        return digest
+
+    def changed_directories(self, previous: "DumpDigest") -> List[str]:
+        """Returns the directories whose content differs from the previous dump, or which are new in this one."""
+        return sorted(path for path, digest in self.directories.items() if previous.directories.get(path) != digest)
+
+    def is_same_dump(self, previous: Optional["DumpDigest"], dump_path) -> bool:
+        """Whether the dump written at `dump_path` by the previous run is identical to this one."""
+        return (previous is not None and previous.dump_digest == self.dump_digest
+                and os.path.exists(dump_path) and os.path.getsize(dump_path) == self.dump_size)
+
+    @staticmethod
+    def get_digest_path(dump_path) -> str:
+        return dump_path + DIGEST_SUFFIX
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": DIGEST_VERSION,
+                "dump_sha256": self.dump_digest,
+                "dump_size": self.dump_size,
+                "root_sha256": self.root_digest,
+                "uploaded_to": self.uploaded_to,
+                "directories": self.directories,
+            }, f, indent=1, sort_keys=True)
+
+    @classmethod
+    def load(cls, path) -> Optional["DumpDigest"]:
+        """Loads the digests saved by a previous run, or returns None if there are none (or in an older format)."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != DIGEST_VERSION:
+            return None
+        digest = cls(dump_digest=data["dump_sha256"], dump_size=data["dump_size"],
+                     directories=data["directories"], uploaded_to=data.get("uploaded_to"))
+        digest.root_digest = data.get("root_sha256")
+        return digest
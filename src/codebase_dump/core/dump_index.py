@@ -0,0 +1,113 @@
+import json
+import os
+from dataclasses import asdict, dataclass
+from typing import BinaryIO, Dict, List, Optional
+
+INDEX_VERSION = 1
+INDEX_SUFFIX = ".sections.json"
+
+
+@dataclass
+class SectionEntry:
+    """Location of one file's section in a dump.
+
+    `offset`/`length` span the whole section including its header, `content_offset`/`content_length`
+    only the file content. `token_start`/`token_end` is the range of the file's content tokens among
+    all file contents of the dump, or None when tokens were not counted.
+    """
+    path: str
+    offset: int
+    length: int
+    content_offset: int
+    content_length: int
+    token_start: Optional[int] = None
+    token_end: Optional[int] = None
+
+
+class CountingStream:
+    """Write-only binary stream which passes data through and keeps track of the number of bytes written."""
+
+    def __init__(self, stream: BinaryIO):
+        self.stream = stream
+        self.position = 0
+
+    def write(self, data) -> int:
+        self.stream.write(data)
+        self.position += memoryview(data).nbytes
+        return len(data)
+
+
+class DumpIndex:
+    """Sidecar index of a dump, mapping every file path to the byte range of its section.
+
+    Built by `OutputFormatterBase.write` while the dump is streamed, and saved next to the dump
+    as `<dump>.sections.json`, so one file can be extracted with a single seek.
+    """
+
+    def __init__(self, root_name="", tokenizer: Optional[str] = None, dump_size: Optional[int] = None,
+                 entries: List[SectionEntry] = None):
+        self.root_name = root_name
+        self.tokenizer = tokenizer
+        self.dump_size = dump_size
+        self.entries: List[SectionEntry] = entries or []
+        self._by_path: Dict[str, SectionEntry] = {entry.path: entry for entry in self.entries}
+        self._tokens = 0
+
+    def add(self, path, offset, content_offset, content_end, end, tokens: Optional[int] = None):
+        entry = SectionEntry(path=path, offset=offset, length=end - offset,
+                             content_offset=content_offset, content_length=content_end - content_offset)
+        if tokens is not None:
+            entry.token_start = self._tokens
+            entry.token_end = self._tokens + tokens
+            self._tokens += tokens
+        self.entries.append(entry)
+        self._by_path[path] = entry
+
+    def find(self, path) -> Optional[SectionEntry]:
+        """Finds a section by its path in the dump, or by its path relative to the analyzed root."""
+        path = os.path.normpath(path)
+        return self._by_path.get(path) or self._by_path.get(os.path.join(self.root_name, path))
+
+    @staticmethod
+    def get_index_path(dump_path) -> str:
+        return dump_path + INDEX_SUFFIX
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": INDEX_VERSION,
+                "root": self.root_name,
+                "tokenizer": self.tokenizer,
+                "dump_size": self.dump_size,
+                "files": [asdict(entry) for entry in self.entries],
+            }, f)
+
+    @classmethod
+    def load(cls, path) -> "DumpIndex":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported dump index version: {path}")
+        return cls(root_name=data["root"], tokenizer=data["tokenizer"], dump_size=data["dump_size"],
+                   entries=[SectionEntry(**entry) for entry in data["files"]])
+
+
+def extract_section(dump_path, file_path, index: DumpIndex = None, whole_section=False) -> bytes:
+    """Reads one file's content (or whole section) from a dump, seeking straight to it with the sidecar index."""
+    if index is None:
+        index_path = DumpIndex.get_index_path(dump_path)
+        if not os.path.exists(index_path):
+            raise ValueError(f"No index found for {dump_path}. Write the dump with --section-index to create {index_path}")
+        index = DumpIndex.load(index_path)
+
+    if index.dump_size is not None and os.path.getsize(dump_path) != index.dump_size:
+        raise ValueError(f"The index does not match {dump_path}: the dump was changed after it was written")
+
+    entry = index.find(file_path)
+    if entry is None:
+        raise ValueError(f"File not found in the dump: {file_path}")
+
+    offset, length = (entry.offset, entry.length) if whole_section else (entry.content_offset, entry.content_length)
+    with open(dump_path, "rb") as f:
+        f.seek(offset)
+        return f.read(length)
@@ -0,0 +1,138 @@
+import os
+from typing import Iterable, Optional
+
+# Control characters found in text files; any other byte below 0x20, or DEL, is a binary hint
+TEXT_CONTROL_BYTES = b'\t\n\r\x0c\x1b'
+BINARY_CONTROL_BYTES = bytes(byte for byte in list(range(0x20)) + [0x7f] if byte not in TEXT_CONTROL_BYTES)
+
+
+class FileClassifier:
+    """Decides cheaply whether a file is binary, before its content is read.
+
+    Files are classified by extension (or well-known file name) first. Files with unknown names
+    are classified by sniffing the first few bytes for magic numbers and NUL bytes. Magic numbers
+    made only of printable characters (e.g. `RIFF`, `BZh`) could start a plain text file, so they
+    only count when the sniffed bytes also contain a control character. Anything not recognized
+    as binary is left to the full UTF-8 check of `CodebaseAnalysis.is_text_file`.
+    """
+
+    DEFAULT_BINARY_EXTENSIONS = {
+        # Images
+        'png', 'jpg', 'jpeg', 'gif', 'bmp', 'ico', 'icns', 'webp', 'tif', 'tiff', 'psd', 'heic', 'avif',
+        # Audio and video
+        'mp3', 'mp4', 'm4a', 'wav', 'ogg', 'flac', 'aac', 'avi', 'mov', 'mkv', 'webm',
+        # Archives and packages
+        'zip', 'tar', 'gz', 'tgz', 'bz2', 'xz', '7z', 'rar', 'zst', 'lz4', 'jar', 'war', 'ear', 'whl', 'egg', 'apk', 'aar',
+        # Compiled code and libraries
+        'class', 'pyc', 'pyo', 'pyd', 'so', 'dll', 'dylib', 'exe', 'o', 'a', 'lib', 'obj', 'bin', 'wasm',
+        # Fonts
+        'woff', 'woff2', 'ttf', 'otf', 'eot',
+        # Documents
+        'pdf', 'doc', 'docx', 'xls', 'xlsx', 'ppt', 'pptx', 'odt', 'ods', 'odp',
+        # Databases, disk images and data
+        'sqlite', 'sqlite3', 'db', 'iso', 'dmg', 'img', 'pkl', 'pickle', 'npy', 'npz', 'h5', 'parquet', 'onnx', 'pt', 'pth',
+        'ckpt', 'safetensors',
+    }
+
+    DEFAULT_TEXT_EXTENSIONS = {
+        'py', 'pyi', 'js', 'mjs', 'cjs', 'jsx', 'ts', 'tsx', 'java', 'kt', 'kts', 'scala', 'groovy', 'gradle', 'go', 'rs',
+        'c', 'h', 'cc', 'cpp', 'cxx', 'hpp', 'hh', 'cs', 'fs', 'm', 'mm', 'swift', 'rb', 'php', 'pl', 'lua', 'r', 'dart',
+        'ex', 'exs', 'erl', 'hs', 'clj', 'sh', 'bash', 'zsh', 'fish', 'ps1', 'bat', 'cmd', 'sql', 'graphql', 'proto',
+        'md', 'rst', 'txt', 'adoc', 'json', 'yaml', 'yml', 'toml', 'ini', 'cfg', 'conf', 'properties', 'env', 'xml',
+        'html', 'htm', 'css', 'scss', 'sass', 'less', 'svg', 'vue', 'svelte', 'csv', 'tsv', 'tf', 'hcl', 'lock', 'log',
+    }
+
+    DEFAULT_TEXT_FILE_NAMES = {
+        'Makefile', 'Dockerfile', 'LICENSE', 'README', 'CHANGELOG', 'NOTICE', 'AUTHORS', 'CODEOWNERS', 'Gemfile',
+        'Rakefile', 'Procfile', 'Jenkinsfile', 'Vagrantfile', '.gitignore', '.gitattributes', '.dockerignore',
+        '.editorconfig', '.cdigestignore',
+    }
+
+    MAGIC_NUMBERS = [
+        b'\x89PNG\r\n\x1a\n',   # PNG
+        b'\xff\xd8\xff',        # JPEG
+        b'GIF87a', b'GIF89a',   # GIF
+        b'PK\x03\x04',          # ZIP, JAR, DOCX, ...
+        b'\x1f\x8b',            # gzip
+        b'BZh',                 # bzip2
+        b'\xfd7zXZ\x00',        # xz
+        b'7z\xbc\xaf\x27\x1c',  # 7-Zip
+        b'Rar!\x1a\x07',        # RAR
+        b'\x28\xb5\x2f\xfd',    # Zstandard
+        b'\x7fELF',             # ELF
+        b'MZ',                  # Windows executable
+        b'\xca\xfe\xba\xbe',    # Java class, Mach-O fat binary
+        b'\xcf\xfa\xed\xfe', b'\xce\xfa\xed\xfe',  # Mach-O
+        b'\x00asm',             # WebAssembly
+        b'%PDF-',               # PDF
+        b'wOFF', b'wOF2',       # WOFF fonts
+        b'OTTO', b'\x00\x01\x00\x00',  # OpenType/TrueType fonts
+        b'SQLite format 3\x00',  # SQLite
+        b'RIFF',                # WAV, AVI, WebP
+        b'OggS', b'fLaC', b'ID3',  # Audio
+        b'II*\x00', b'MM\x00*',  # TIFF
+        b'\x00\x00\x01\x00',    # ICO
+    ]
+
+    def __init__(self,
+                 binary_extensions: Iterable[str] = None,
+                 text_extensions: Iterable[str] = None,
+                 sniff_size=16):
+        """Extensions are given without the leading dot and extend the default tables."""
+        self.binary_extensions = set(self.DEFAULT_BINARY_EXTENSIONS)
+        self.text_extensions = set(self.DEFAULT_TEXT_EXTENSIONS)
+        for extension in binary_extensions or []:
+            self.binary_extensions.add(extension.lstrip('.').lower())
+            self.text_extensions.discard(extension.lstrip('.').lower())
+        for extension in text_extensions or []:
+            self.text_extensions.add(extension.lstrip('.').lower())
+            self.binary_extensions.discard(extension.lstrip('.').lower())
+        self.sniff_size = sniff_size
+
+    def classify_by_name(self, file_path) -> Optional[bool]:
+        """Returns True for known text files, False for known binary files and None when unknown."""
+        name = os.path.basename(file_path)
+        if name in self.DEFAULT_TEXT_FILE_NAMES:
+            return True
+
+        extension = os.path.splitext(name)[1][1:].lower()
+        if extension in self.binary_extensions:
+            return False
+        if extension in self.text_extensions:
+            return True
+        return None
+
+    def is_binary_header(self, header: bytes) -> bool:
+        """Checks the first bytes of a file for magic numbers of binary formats and NUL bytes."""
+        if b'\x00' in header:
+            return True
+        has_control_bytes = None
+        for magic in self.MAGIC_NUMBERS:
+            if not header.startswith(magic):
+                continue
+            if not self._is_printable(magic):
+                return True
+            if has_control_bytes is None:
+                has_control_bytes = len(header.translate(None, BINARY_CONTROL_BYTES)) < len(header)
+            if has_control_bytes:
+                return True
+        return False
+
+    @staticmethod
+    def _is_printable(magic: bytes) -> bool:
+        return all(0x20 <= byte < 0x7f for byte in magic)
+
+    def is_binary(self, file_path) -> bool:
+        """Decides whether a file is binary, reading at most `sniff_size` bytes of it.
+
+        Unreadable files are not treated as binary, so the full text check reports the error.
+        """
+        by_name = self.classify_by_name(file_path)
+        if by_name is not None:
+            return not by_name
+
+        try:
+            with open(file_path, 'rb') as f:
+                return self.is_binary_header(f.read(self.sniff_size))
+        except OSError:
+            return False
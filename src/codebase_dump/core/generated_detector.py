@@ -0,0 +1,79 @@
+import os
+import re
+from typing import Optional
+
+GENERATED_KEEP = "keep"
+GENERATED_EXCLUDE = "exclude"
+GENERATED_COLLAPSE = "collapse"
+
+
+class GeneratedFileDetector:
+    """Recognizes generated and minified files, which cost many tokens and tell little about a codebase.
+
+    Lockfiles and well-known generated file suffixes are recognized by name. Other files are
+    classified from a bounded prefix of their content: a standard generated-code marker (`@generated`,
+    `Code generated ... DO NOT EDIT.`, `This file was automatically generated`, ...) in a comment of the
+    first lines, or line lengths typical for minified code. The cost does not grow with file size.
+    """
+
+    DEFAULT_LOCKFILE_NAMES = {
+        'package-lock.json', 'npm-shrinkwrap.json', 'yarn.lock', 'pnpm-lock.yaml', 'bun.lock', 'poetry.lock',
+        'Pipfile.lock', 'pdm.lock', 'uv.lock', 'Cargo.lock', 'composer.lock', 'Gemfile.lock', 'go.sum',
+        'mix.lock', 'pubspec.lock', 'Podfile.lock', 'packages.lock.json', 'flake.lock',
+    }
+
+    DEFAULT_GENERATED_SUFFIXES = (
+        '.min.js', '.min.mjs', '.min.css', '.map', '.bundle.js', '.chunk.js',
+        '_pb2.py', '_pb2.pyi', '_pb2_grpc.py', '.pb.go', '.pb.gw.go', '.pb.h', '.pb.cc', '_pb.js', '_pb.d.ts',
+        '.g.dart', '.freezed.dart', '.designer.cs', '.generated.cs', '.g.cs',
+    )
+
+    # Comment lines, where generators write their markers: //, #, /* and * continuations, --, ;, <!--, %
+    COMMENT_LINE_PATTERN = re.compile(r"^\s*(//|#|/\*|\*|--|;|<!--|%)")
+    # Standard markers only: a loose "generated by" would match prose like "IDs are generated by the database"
+    HEADER_PATTERN = re.compile(r"@generated\b"
+                                r"|\bcode generated\b.*\bdo not edit\b"
+                                r"|\bgenerated by\b.*\bdo not edit\b"
+                                r"|\b(this|the following) (file|code|source)( file)? (is|was|has been) (automatically |auto-?)?generated\b"
+                                r"|<auto-generated\b"
+                                r"|\bauto-?generated (file|code)\b",
+                                re.IGNORECASE)
+
+    def __init__(self, prefix_size=8192, header_lines=10, max_line_length=1000, max_average_line_length=200):
+        """Only the first `prefix_size` characters of a file are inspected.
+
+        The header markers are looked for in its first `header_lines` lines. A prefix with a line
+        longer than `max_line_length`, or an average line length over `max_average_line_length`,
+        is considered minified.
+        """
+        self.prefix_size = prefix_size
+        self.header_lines = header_lines
+        self.max_line_length = max_line_length
+        self.max_average_line_length = max_average_line_length
+
+    def detect_by_name(self, file_path) -> Optional[str]:
+        name = os.path.basename(file_path)
+        if name in self.DEFAULT_LOCKFILE_NAMES:
+            return "lockfile"
+        if name.lower().endswith(self.DEFAULT_GENERATED_SUFFIXES):
+            return "generated file name"
+        return None
+
+    def detect_by_content(self, prefix: str) -> Optional[str]:
+        """Classifies a file from the beginning of its content."""
+        prefix = prefix[:self.prefix_size]
+        lines = prefix.split("\n")
+        # The last line is either empty or may be cut at the prefix boundary, so it only counts when it is the only one.
+        complete_lines = lines[:-1] if len(lines) > 1 else lines
+
+        if any(self.COMMENT_LINE_PATTERN.match(line) and self.HEADER_PATTERN.search(line) for line in lines[:self.header_lines]):
+            return "generated header"
+        if max(len(line) for line in lines) > self.max_line_length:
+            return "minified"
+        if complete_lines and sum(len(line) for line in complete_lines) / len(complete_lines) > self.max_average_line_length:
+            return "minified"
+        return None
+
+    def detect(self, file_path, prefix: str) -> Optional[str]:
+        """Returns why the file looks generated, or None for regular files."""
+        return self.detect_by_name(file_path) or self.detect_by_content(prefix)
@@ -0,0 +1,67 @@
+import os
+import subprocess
+from typing import Iterable, List
+
+from codebase_dump.core.path_filter import PathFilter
+
+
+def _run_git(repo_path, *args) -> str:
+    try:
+        completed = subprocess.run(["git", "-C", repo_path, *args], capture_output=True, text=True)
+    except FileNotFoundError:
+        raise ValueError("--changed-since requires git to be installed")
+    if completed.returncode != 0:
+        raise ValueError(f"git {args[0]} failed: {completed.stderr.strip()}")
+    return completed.stdout
+
+
+def get_changed_files(repo_path, since_rev) -> List[str]:
+    """Returns paths, relative to `repo_path`, of files changed since `since_rev`.
+
+    A single revision is compared with the working tree, so uncommitted and untracked files are
+    included. A range (`main..feature`, `main...feature`) is compared between the two revisions only.
+    Deleted files are left out, since there is nothing to dump.
+    """
+    output = _run_git(repo_path, "diff", "--name-only", "--relative", "--diff-filter=d", "-z", since_rev, "--")
+    paths = [path for path in output.split("\0") if path]
+    if ".." not in since_rev:
+        output = _run_git(repo_path, "ls-files", "--others", "--exclude-standard", "-z")
+        paths.extend(path for path in output.split("\0") if path)
+    return sorted(set(paths))
+
+
+def read_changed_files_list(list_path) -> List[str]:
+    """Reads changed paths from a file with one path per line, e.g. the output of `git diff --name-only`."""
+    with open(list_path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+class ChangedFilesFilter(PathFilter):
+    """Selects an exact set of files, e.g. the files changed on a branch.
+
+    Only directories on the way to a changed file are walked. With `include_siblings`, the other
+    files in those directories are listed in the tree by name, without reading their content.
+    """
+
+    def __init__(self, changed_paths: Iterable[str], include_siblings=False):
+        super().__init__([])
+        self.changed_paths = {self._normalize(path) for path in changed_paths if path.strip()}
+        self.include_siblings = include_siblings
+        self.changed_directories = set()
+        for path in self.changed_paths:
+            directory = os.path.dirname(path)
+            while directory and directory not in self.changed_directories:
+                self.changed_directories.add(directory)
+                directory = os.path.dirname(directory)
+        self._sibling_directories = {os.path.dirname(path) for path in self.changed_paths}
+
+    def matches(self, relative_path: str) -> bool:
+        return relative_path in self.changed_paths
+
+    def matches_name_only(self, relative_path: str) -> bool:
+        return self.include_siblings and os.path.dirname(relative_path) in self._sibling_directories
+
+    def could_contain_matches(self, relative_dir: str) -> bool:
+        if relative_dir in ("", "."):
+            return bool(self.changed_paths)
+        return relative_dir in self.changed_directories
@@ -0,0 +1,125 @@
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+DEFAULT_IO_WORKERS = 32
+
+_FADVISE = getattr(os, "posix_fadvise", None)
+
+
+@dataclass
+class ScannedEntry:
+    path: str
+    is_file: bool
+    is_dir: bool
+    size: Optional[int] = None  # Size of a file, read by the scan
+
+
+def advise(fd, advice_name):
+    """Passes an `os.POSIX_FADV_*` read-ahead hint for the whole file, where the platform supports it."""
+    advice = getattr(os, advice_name, None)
+    if _FADVISE is None or advice is None:
+        return
+    try:
+        _FADVISE(fd, 0, 0, advice)
+    except OSError:
+        pass
+
+
+def decode_text(data: bytes) -> Optional[str]:
+    """Decodes file content as UTF-8, or returns None if it is not UTF-8.
+
+    Line endings are translated like in text mode, so the content is the same as the one read by
+    `CodebaseAnalysis.read_file_content`.
+    """
+    try:
+        text = data.decode("utf-8")
+    except UnicodeDecodeError:
+        return None
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def read_text_file(path) -> Optional[str]:
+    """Reads a file in a single open and a single read, and decodes it as UTF-8. Returns None if it is not UTF-8.
+
+    The unbuffered read is sized from the file size, so the whole file is requested at once instead of
+    in 8 KB buffers.
+    """
+    with open(path, "rb", buffering=0) as f:
+        advise(f.fileno(), "POSIX_FADV_SEQUENTIAL")
+        data = f.read()
+    return decode_text(data)
+
+
+class DirectoryScanner:
+    """Lists directories ahead of a depth-first walk, with a pool of threads.
+
+    On network filesystems every listing and stat is a round trip. The scanner lists a directory
+    and stats its files in one task, and the walk submits the subdirectories of every listing it
+    gets, so listings of sibling directories are in flight at the same time. The walk still consumes
+    them in its own order. At most `max_prefetched` listings are kept ahead of the walk.
+
+    With `prefetch_file`, the scan also hints the kernel to start reading the files it accepts
+    (`POSIX_FADV_WILLNEED`), so their contents are on their way by the time the walk reads them.
+    """
+
+    def __init__(self, workers=DEFAULT_IO_WORKERS, max_prefetched=1024, prefetch_file: Callable[[str, int], bool] = None):
+        self.max_prefetched = max_prefetched
+        self.prefetch_file = prefetch_file if _FADVISE is not None else None
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="codebase-dump-scan")
+        self._scans: Dict[str, Future] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        for future in self._scans.values():
+            future.cancel()
+        self._scans.clear()
+        self._executor.shutdown(wait=True)
+
+    def prefetch(self, path):
+        if path not in self._scans and len(self._scans) < self.max_prefetched:
+            self._scans[path] = self._executor.submit(self._scan, path)
+
+    def scan(self, path) -> List[ScannedEntry]:
+        """Returns the entries of a directory, in listing order. Raises the error of the listing, if any."""
+        future = self._scans.pop(path, None)
+        if future is None:
+            return self._scan(path)
+        return future.result()
+
+    def _scan(self, path) -> List[ScannedEntry]:
+        entries = []
+        with os.scandir(path) as iterator:
+            for entry in iterator:
+                # File types come with the listing; only files need a stat, for their size.
+                try:
+                    is_file = entry.is_file()
+                    is_dir = not is_file and entry.is_dir()
+                    size = entry.stat().st_size if is_file else None
+                except OSError:
+                    continue
+                entries.append(ScannedEntry(entry.path, is_file, is_dir, size))
+        if self.prefetch_file is not None:
+            for entry in entries:
+                if entry.is_file and self.prefetch_file(entry.path, entry.size):
+                    self._advise_will_need(entry.path)
+        return entries
+
+    @staticmethod
+    def _advise_will_need(path):
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            advise(fd, "POSIX_FADV_WILLNEED")
+        finally:
+            os.close(fd)
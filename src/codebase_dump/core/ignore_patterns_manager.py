@@ -1,4 +1,7 @@
+import copy
 import os
+from pathlib import Path
+from typing import Iterable, List, Optional
 
 from py_walk import get_parser_from_list
 
@@ -41,6 +44,9 @@ class IgnorePatternManager:
         self.init_ignore_patterns()
         
         self.parser = get_parser_from_list(self.ignore_patterns_as_str, base_dir=self.base_path)
+        # Same patterns, matched against relative paths whose trailing separator tells directories apart
+        self._relative_parser = copy.copy(self.parser)
+        self._relative_parser.base_dir = None
 
     def init_ignore_patterns(self):
         """Initializes the ignore patterns based on the configuration."""
@@ -63,12 +69,33 @@ class IgnorePatternManager:
     def parse_gitignore(self, gitignore_path=".gitignore"):
         """Parses a .gitignore file and returns a list of compiled regex patterns."""
         with open(gitignore_path, "r") as f:
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith("#"):
-                    continue
-                                
-                self.ignore_patterns_as_str.add(line)
+            self.ignore_patterns_as_str.update(self.parse_ignore_lines(f))
+
+    @staticmethod
+    def parse_ignore_lines(lines: Iterable[str]) -> List[str]:
+        """Returns the patterns of .gitignore-style lines, without blank lines and comments."""
+        patterns = []
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            patterns.append(line)
+        return patterns
    
-    def should_ignore(self, path):
+    def should_ignore(self, path, is_dir: Optional[bool] = None):
+        """Tells whether a path matches the ignore patterns.
+
+        Pass `is_dir` when it is known from a directory listing, so the path is not stat'ed again,
+        which is a round trip on network filesystems.
+        """
+        if is_dir is not None:
+            base_dir = Path(self.base_path)
+            full_path = base_dir / Path(path)
+            # The parser stats base_dir / path, which is the path itself unless both are relative
+            if os.path.abspath(full_path) == os.path.abspath(path):
+                try:
+                    relative_path = str(full_path.relative_to(base_dir))
+                except ValueError:
+                    return self.parser.match(path)
+                return self._relative_parser.match(relative_path + os.sep if is_dir else relative_path)
         return self.parser.match(path)
\ No newline at end of file
@@ -0,0 +1,158 @@
+import contextlib
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from codebase_dump.core.models import MappedTextFileAnalysis, TextFileAnalysis
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_SIZE_PATTERN = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([kmgt]?)i?b?\s*$", re.IGNORECASE)
+_SIZE_UNITS = {"": 1, "k": 1024, "m": 1024 ** 2, "g": 1024 ** 3, "t": 1024 ** 4}
+
+
+def parse_size(value: str) -> int:
+    """Parses a size in bytes, with an optional K, M, G or T suffix (powers of 1024): 512M, 2G, 1.5GB."""
+    match = _SIZE_PATTERN.match(value)
+    if match is None:
+        raise ValueError(f"Invalid size: {value!r} (expected e.g. 512M or 2G)")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).lower()])
+
+
+def get_current_rss() -> Optional[int]:
+    """Returns the resident set size of this process in bytes, or None where it cannot be read."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return get_peak_rss()
+
+
+def get_peak_rss() -> Optional[int]:
+    """Returns the peak resident set size of this process in bytes, or None where it is not available."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # bytes on macOS, kilobytes elsewhere
+
+
+@dataclass
+class SpilledTextFileAnalysis(MappedTextFileAnalysis):
+    """File whose content was moved out of memory into a temporary file, which is memory-mapped when needed."""
+
+    def replace_content(self, content: str):
+        """Rewrites the spilled content, for passes which change file contents after the analysis."""
+        data = content.encode("utf-8", errors="replace")
+        with open(self.file_path, "wb") as f:
+            f.write(data)
+        self.byte_size = len(data)
+        self.content_size = len(content)
+        self._token_counts = {}
+
+
+class MemoryBudget:
+    """Bounds the memory used by file contents during an analysis, spilling the rest to temporary files.
+
+    Half of the budget left over by the process at start holds file contents in memory; contents read
+    once it is full are written to temporary files, and their nodes replaced by memory-mapped ones.
+    The other half bounds the contents being read at the same time: readers block until enough of
+    it is released, so concurrent readers cannot overshoot the budget. Spilled files are removed by `close`.
+    """
+
+    MIN_CONTENT_LIMIT = 16 * 1024 * 1024
+
+    def __init__(self, limit: int, spill_dir=None):
+        self.limit = limit
+        available = limit - (get_current_rss() or 0)
+        content_limit = max(available // 2, min(self.MIN_CONTENT_LIMIT, limit // 4))
+        self.resident_limit = content_limit
+        self.reading_limit = content_limit
+        self.resident = 0
+        self.reading = 0
+        self.spilled_files = 0
+        self.spilled_bytes = 0
+        self._spill_parent = spill_dir
+        self._spill_dir: Optional[str] = None
+        self._cleanup = None
+        self._condition = threading.Condition()
+
+    @contextlib.contextmanager
+    def reading_file(self, size: int):
+        """Reserves `size` bytes while a file is being read, waiting for other readers to release enough.
+
+        A file larger than the whole reading budget is still read, once no other file is.
+        """
+        size = min(size, self.reading_limit)
+        with self._condition:
+            while self.reading and self.reading + size > self.reading_limit:
+                self._condition.wait()
+            self.reading += size
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.reading -= size
+                self._condition.notify_all()
+
+    def retain(self, node: Optional[TextFileAnalysis]) -> Optional[TextFileAnalysis]:
+        """Keeps the node's content in memory if it fits in the budget, or returns a spilled copy of the node."""
+        if (type(node) is not TextFileAnalysis or node.name_only or not node.file_content
+                or node.file_content == "[Non-text file]"):
+            return node
+        size = sys.getsizeof(node.file_content)
+        with self._condition:
+            if self.resident + size <= self.resident_limit:
+                self.resident += size
+                return node
+        return self._spill(node)
+
+    def _get_spill_dir(self) -> str:
+        with self._condition:
+            if self._spill_dir is None:
+                self._spill_dir = tempfile.mkdtemp(prefix="codebase-dump-spill-", dir=self._spill_parent)
+                # Also removed at exit if `close` is never reached, like a `tempfile.TemporaryDirectory`
+                self._cleanup = weakref.finalize(self, shutil.rmtree, self._spill_dir, ignore_errors=True)
+            return self._spill_dir
+
+    def create_spill_file(self) -> Tuple[int, str]:
+        """Creates a temporary file in the spill directory, removed by `close`. Returns its descriptor and path."""
+        return tempfile.mkstemp(suffix=".txt", dir=self._get_spill_dir())
+
+    def _spill(self, node: TextFileAnalysis) -> SpilledTextFileAnalysis:
+        data = node.file_content.encode("utf-8", errors="replace")
+        fd, path = self.create_spill_file()
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        spilled = SpilledTextFileAnalysis(name=node.name, is_ignored=node.is_ignored, parent=node.parent,
+                                          original_size=node.original_size, generated_reason=node.generated_reason,
+                                          generated_size=node.generated_size, file_path=path, byte_size=len(data),
+                                          content_size=len(node.file_content))
+        with self._condition:
+            self.spilled_files += 1
+            self.spilled_bytes += len(data)
+        return spilled
+
+    def close(self):
+        """Removes the spilled files. Nodes spilled by this budget cannot be read anymore."""
+        if self._cleanup is not None:
+            self._cleanup()
+            self._spill_dir = self._cleanup = None
+
+
+def generate_memory_string(budget: Optional[MemoryBudget]) -> str:
+    peak = get_peak_rss()
+    output = f"Peak memory (RSS): {peak / 1024 ** 2:.1f} MB" if peak is not None else "Peak memory (RSS): not available"
+    if budget is not None:
+        output += f" of {budget.limit / 1024 ** 2:.1f} MB allowed"
+        output += (f"\nFile contents kept in memory: {budget.resident / 1024 ** 2:.1f} MB, "
+                   f"spilled to disk: {budget.spilled_files} files ({budget.spilled_bytes / 1024 ** 2:.1f} MB)")
+    return output + "\n"
@@ -1,8 +1,15 @@
 from dataclasses import dataclass, field
-from typing import List, Union, Optional
-import tiktoken
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Union, Optional
+import codecs
+import mmap
 import os
 
+from codebase_dump.core.tokenizers import DEFAULT_TOKENIZER, count_tokens, get_tokenizer
+from codebase_dump.core.top_k import TopK
+
+RANK_BY_SIZE = "size"
+RANK_BY_TOKENS = "tokens"
+
 @dataclass
 class NodeAnalysis:
     name: str = ""
@@ -29,23 +36,68 @@ class NodeAnalysis:
 @dataclass
 class TextFileAnalysis(NodeAnalysis):
     file_content: str = ""
+    _token_counts: Dict[str, int] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _token_counts_source: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    original_size: Optional[int] = None  # Size on disk of a file over the size limit, which was not read in full
+    generated_reason: Optional[str] = None  # Why the file was excluded or collapsed as generated
+    generated_size: int = 0  # Size of a generated file's content before it was excluded or collapsed
+    name_only: bool = False  # Listed in the tree for context, without reading its content
 
     @property
     def type(self) -> str:
         return "text_file"
+
+    @property
+    def is_oversize(self) -> bool:
+        return self.original_size is not None
     
     @property
     def size(self) -> int:
         return len(self.file_content)
     
-    def count_tokens(self):
+    def count_tokens(self, tokenizer=DEFAULT_TOKENIZER):
         """Counts the number of tokens in a text string."""
-        enc = tiktoken.get_encoding("cl100k_base")
-        try:
-            return len(enc.encode(self.file_content, disallowed_special=()))
-        except Exception as e:
-            print(f"Warning: Error counting tokens: {str(e)}")
-            return 0
+        return self.count_tokens_multi([tokenizer])[tokenizer]
+
+    def count_tokens_multi(self, tokenizers: Iterable[str]) -> Dict[str, int]:
+        """Counts tokens for several tokenizers in a single pass over the content.
+
+        Counts are cached per tokenizer until the content changes.
+        """
+        if self._token_counts_source is not self.file_content:
+            self._token_counts = {}
+            self._token_counts_source = self.file_content
+
+        missing = [name for name in tokenizers if name not in self._token_counts]
+        if missing:
+            for name in missing:
+                get_tokenizer(name)
+            try:
+                self._token_counts.update(count_tokens(self.get_content(), missing))
+            except Exception as e:
+                print(f"Warning: Error counting tokens: {str(e)}")
+                return {name: 0 for name in tokenizers}
+        return {name: self._token_counts[name] for name in tokenizers}
+
+    def has_content(self) -> bool:
+        return bool(self.file_content)
+
+    def get_content(self) -> str:
+        return self.file_content
+
+    def get_content_head(self, size) -> str:
+        """Returns at most the first `size` characters of the content, without reading the rest."""
+        return self.get_content()[:size]
+
+    def iter_content_chunks(self) -> Iterator[str]:
+        """Yields the content in chunks of whole lines. Contents held in memory are a single chunk."""
+        content = self.get_content()
+        if content:
+            yield content
+
+    def write_content(self, stream: BinaryIO):
+        """Writes the content, encoded as UTF-8, into a binary stream."""
+        stream.write(self.file_content.encode("utf-8", errors="replace"))
         
     def to_dict(self):
         return {
@@ -56,6 +108,107 @@ class TextFileAnalysis(NodeAnalysis):
             "content": self.file_content
         }
 
+@dataclass
+class MappedTextFileAnalysis(TextFileAnalysis):
+    """Large UTF-8 text file whose content stays on disk and is memory-mapped when needed.
+
+    The content is the one of the file read in text mode: with `normalize_newlines` (the file has CR
+    characters), CRLF and CR line endings are written as LF, otherwise the mapped bytes are written
+    as they are. `content_size` is the size of that content in characters, so sizes match the ones of
+    files read into memory; without it, the size is the one of the file.
+    """
+    file_path: str = ""
+    byte_size: int = 0
+    normalize_newlines: bool = False
+    content_size: Optional[int] = None
+
+    WRITE_CHUNK_SIZE = 1024 * 1024
+
+    @property
+    def size(self) -> int:
+        return self.byte_size if self.content_size is None else self.content_size
+
+    def has_content(self) -> bool:
+        return self.byte_size > 0
+
+    def get_content(self) -> str:
+        with open(self.file_path, 'r', encoding='utf-8', errors='replace') as f:
+            return f.read()
+
+    def get_content_head(self, size) -> str:
+        with open(self.file_path, 'rb') as f:
+            data = f.read(size)
+        # Not final, so a character cut by the end of the read is left out rather than replaced
+        text = codecs.getincrementaldecoder("utf-8")(errors="replace").decode(data)
+        return text.replace("\r\n", "\n").replace("\r", "\n") if self.normalize_newlines else text
+
+    def iter_content_chunks(self) -> Iterator[str]:
+        return self._iter_lines_chunks()
+
+    def count_tokens_multi(self, tokenizers: Iterable[str]) -> Dict[str, int]:
+        """Counts tokens chunk by chunk from the mapping, so the content is never decoded into a single string.
+
+        Chunks end at line boundaries, where tokenizers do not merge characters into one token.
+        """
+        missing = [name for name in tokenizers if name not in self._token_counts]
+        if missing:
+            for name in missing:
+                get_tokenizer(name)
+            counts = dict.fromkeys(missing, 0)
+            try:
+                for chunk in self._iter_lines_chunks():
+                    for name, count in count_tokens(chunk, missing).items():
+                        counts[name] += count
+            except Exception as e:
+                print(f"Warning: Error counting tokens: {str(e)}")
+                return {name: 0 for name in tokenizers}
+            self._token_counts.update(counts)
+        return {name: self._token_counts[name] for name in tokenizers}
+
+    def write_content(self, stream: BinaryIO):
+        if not self.normalize_newlines:
+            with open(self.file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                stream.write(mapped)
+            return
+        for text in self._iter_text_chunks(self.normalize_newlines):
+            stream.write(text.encode("utf-8"))
+
+    def _iter_text_chunks(self, normalize_newlines):
+        """Yields the content decoded chunk by chunk, replacing invalid UTF-8 sequences."""
+        if self.byte_size == 0:
+            return
+        with open(self.file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+            pending_cr = ""
+            for offset in range(0, len(mapped) + 1, self.WRITE_CHUNK_SIZE):
+                chunk = mapped[offset:offset + self.WRITE_CHUNK_SIZE]
+                text = decoder.decode(chunk, final=offset + self.WRITE_CHUNK_SIZE > len(mapped))
+                if normalize_newlines:
+                    # A CR ending the chunk may be the first half of a CRLF split across chunks.
+                    text = pending_cr + text
+                    pending_cr = "\r" if text.endswith("\r") and offset + self.WRITE_CHUNK_SIZE <= len(mapped) else ""
+                    text = (text[:-1] if pending_cr else text).replace("\r\n", "\n").replace("\r", "\n")
+                yield text
+
+    def _iter_lines_chunks(self):
+        """Yields the content as returned by `get_content`, in chunks of whole lines."""
+        remainder = ""
+        for text in self._iter_text_chunks(normalize_newlines=True):
+            text = remainder + text
+            end = text.rfind("\n") + 1
+            if not end and len(text) >= self.WRITE_CHUNK_SIZE:
+                end = len(text)  # A very long line is split rather than held whole
+            if end:
+                yield text[:end]
+            remainder = text[end:]
+        if remainder:
+            yield remainder
+
+    def to_dict(self):
+        result = super().to_dict()
+        result["content"] = self.get_content()
+        return result
+
 @dataclass
 class DirectoryAnalysis(NodeAnalysis):
     children: List[Union["DirectoryAnalysis", TextFileAnalysis]] = field(default_factory=list)
@@ -86,17 +239,26 @@ class DirectoryAnalysis(NodeAnalysis):
                 all_children.extend(child.get_all_children())
         return all_children
 
-    def get_total_tokens(self) -> int:
-        tokens = 0
+    def get_total_tokens(self, tokenizer=DEFAULT_TOKENIZER) -> int:
+        return self.get_total_tokens_multi([tokenizer])[tokenizer]
+
+    def get_total_tokens_multi(self, tokenizers: Iterable[str]) -> Dict[str, int]:
+        """Sums tokens of non-ignored files for several tokenizers, reading each file's content once."""
+        tokenizers = list(tokenizers)
+        totals = {name: 0 for name in tokenizers}
         for child in self.children:
             if child.is_ignored:
                 continue
 
             if isinstance(child, TextFileAnalysis):
-                tokens += child.count_tokens()
+                counts = child.count_tokens_multi(tokenizers)
             elif isinstance(child, DirectoryAnalysis):
-                tokens += child.get_total_tokens()
-        return tokens
+                counts = child.get_total_tokens_multi(tokenizers)
+            else:
+                continue
+            for name in tokenizers:
+                totals[name] += counts[name]
+        return totals
 
     @property
     def size(self) -> int:
@@ -115,8 +277,8 @@ class DirectoryAnalysis(NodeAnalysis):
             if child.is_ignored:
                 continue    
 
-            if isinstance(child, TextFileAnalysis) and child.file_content:
-                size += len(child.file_content)
+            if isinstance(child, TextFileAnalysis):
+                size += child.size
             elif isinstance(child, DirectoryAnalysis):
                size += child.get_non_ignored_text_content_size()
         return size
@@ -135,6 +297,22 @@ class DirectoryAnalysis(NodeAnalysis):
                 files.append(child)
         return files
 
+    def get_all_oversize_files(self):
+        """Returns files over the size limit, which were either skipped or replaced by an excerpt."""
+        files = []
+        for child in self.get_all_children():
+            if isinstance(child, TextFileAnalysis) and child.is_oversize:
+                files.append(child)
+        return files
+
+    def get_all_generated_files(self):
+        """Returns files which were excluded or collapsed as generated."""
+        files = []
+        for child in self.get_all_children():
+            if isinstance(child, TextFileAnalysis) and child.generated_reason is not None:
+                files.append(child)
+        return files
+
     def get_all_non_ignored_directories(self):
         directories = []
         for child in self.get_all_children():
@@ -149,18 +327,49 @@ class DirectoryAnalysis(NodeAnalysis):
                 directories.append(child)
         return directories
 
-    def get_largest_files(self, n=10) -> List[TextFileAnalysis]:
+    def get_largest_files(self, n=10, rank_by=RANK_BY_SIZE, tokenizer=DEFAULT_TOKENIZER) -> List[TextFileAnalysis]:
         """Returns a list of the n largest non-ignored files in this directory and its subdirectories."""
-        all_files = self.get_all_non_ignored_files()
-        sorted_files = sorted(all_files, key=lambda file: file.size, reverse=True)
-        return sorted_files[:n]
+        return self.get_largest_entries(n, rank_by, tokenizer)[0]
 
-    def get_largest_directories(self, n=10) -> List["DirectoryAnalysis"]:
+    def get_largest_directories(self, n=10, rank_by=RANK_BY_SIZE, tokenizer=DEFAULT_TOKENIZER) -> List["DirectoryAnalysis"]:
         """Returns a list of the n largest non-ignored directories in this directory and its subdirectories."""
-        all_directories = self.get_all_non_ignored_directories()
-        sorted_directories = sorted(all_directories, key=lambda directory: directory.size, reverse=True)
-        return sorted_directories[:n]
+        return self.get_largest_entries(n, rank_by, tokenizer)[1]
+
+    def get_largest_entries(self, n=10, rank_by=RANK_BY_SIZE, tokenizer=DEFAULT_TOKENIZER):
+        """Returns (largest files, largest directories) collected with bounded heaps in a single traversal.
+
+        Files and directories can be ranked by size in bytes or by tokens. Directory tokens only
+        include non-ignored content, the same way as `get_total_tokens`.
+        """
+        if rank_by not in (RANK_BY_SIZE, RANK_BY_TOKENS):
+            raise ValueError(f"Unknown ranking: {rank_by}")
+
+        largest_files = TopK(n)
+        largest_directories = TopK(n)
+
+        def visit(directory: "DirectoryAnalysis"):
+            """Returns (size, tokens) of the directory, pushing its descendants into the heaps."""
+            size = 0
+            tokens = 0
+            for child in directory.children:
+                if isinstance(child, TextFileAnalysis):
+                    child_size = child.size
+                    child_tokens = child.count_tokens(tokenizer) if rank_by == RANK_BY_TOKENS and not child.is_ignored else 0
+                    largest = largest_files
+                elif isinstance(child, DirectoryAnalysis):
+                    child_size, child_tokens = visit(child)
+                    largest = largest_directories
+                else:
+                    continue
 
+                size += child_size
+                if not child.is_ignored:
+                    tokens += child_tokens
+                    largest.push(child_size if rank_by == RANK_BY_SIZE else child_tokens, child)
+            return size, tokens
+
+        visit(self)
+        return largest_files.items(), largest_directories.items()
 
     def to_dict(self):
         return {
@@ -173,4 +382,51 @@ class DirectoryAnalysis(NodeAnalysis):
             "file_count": self.get_non_ignored_file_count(),
             "dir_count": self.get_non_ignored_dir_count(),
             "children": [child.to_dict() for child in self.children]
-        }
\ No newline at end of file
+        }
+
+class FileRecord:
+    """Lightweight description of a file or directory found while walking a codebase.
+
+    Size, text classification and content are only read from disk when they are asked for.
+    """
+
+    def __init__(self, full_path: str, directory: str, base_path: str, is_ignored: bool, is_dir: bool, analysis, name_only=False,
+                 size: Optional[int] = None):
+        self.full_path = full_path
+        self.directory = directory
+        self.base_path = base_path
+        self.is_ignored = is_ignored
+        self.is_dir = is_dir
+        self.name_only = name_only
+        self._analysis = analysis
+        self._size = size  # Known from the directory scan, or read on first access
+        self._is_text = None
+
+    @property
+    def path(self) -> str:
+        """Path relative to the analyzed root."""
+        return os.path.relpath(self.full_path, self.base_path)
+
+    @property
+    def size(self) -> int:
+        if self._size is None:
+            self._size = os.path.getsize(self.full_path)
+        return self._size
+
+    @property
+    def is_text(self) -> bool:
+        if self._is_text is None:
+            self._is_text = self._analysis.is_text_file(self.full_path, self.size)
+        return self._is_text
+
+    def read_content(self) -> str:
+        return self.to_node().get_content()
+
+    def to_node(self, parent: Optional["DirectoryAnalysis"] = None) -> TextFileAnalysis:
+        """Reads the file into a node of the analysis tree. Files selected by name only are not read."""
+        if self.name_only:
+            return self._analysis._name_only_file_node(self.full_path, self.is_ignored, parent)
+        return self._analysis._analyze_file(self.full_path, self.is_ignored, parent, file_size=self.size)
+
+    def __repr__(self):
+        return f"FileRecord(path={self.path!r}, is_dir={self.is_dir}, is_ignored={self.is_ignored})"
@@ -0,0 +1,342 @@
+import hashlib
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Optional, Pattern
+
+from codebase_dump.core.memory_budget import SpilledTextFileAnalysis
+from codebase_dump.core.models import DirectoryAnalysis, MappedTextFileAnalysis, TextFileAnalysis
+
+COMMENTS_C = "c"  # // and /* */ (C, C++, Objective-C, Java, Go, Protocol Buffers)
+COMMENTS_C_NESTED = "c_nested"  # // and nesting /* */ (Rust, Kotlin, Scala, Swift)
+COMMENTS_CSHARP = "csharp"  # // and /* */, with verbatim @"..." strings
+COMMENTS_DART = "dart"  # // and nesting /* */, with single-quoted and raw strings
+COMMENTS_JS = "js"  # // and /* */, with single-quoted strings, template and regular expression literals
+COMMENTS_SCSS = "scss"  # // and /* */, with unquoted url(...)
+COMMENTS_CSS = "css"  # /* */
+COMMENTS_HASH = "hash"  # #
+COMMENTS_SHELL = "shell"  # #, with multi-line strings and heredocs
+COMMENTS_YAML = "yaml"  # #, with block scalars
+COMMENTS_CMAKE = "cmake"  # # and #[[ ]]
+COMMENTS_HASH_LINES = "hash_lines"  # # on whole lines only (INI files, Makefiles, Dockerfiles)
+COMMENTS_SQL = "sql"  # -- and /* */
+COMMENTS_LUA = "lua"  # -- and --[[ ]]
+COMMENTS_DASH = "dash"  # -- (Ada)
+COMMENTS_XML = "xml"  # <!-- -->
+
+# Languages with comment syntaxes the patterns can't scan safely (Haskell and Elm nested {- -} and
+# --> operators, PowerShell <# #>, Nim #[ ]#, Julia #= =#) are left out, so their comments are kept.
+_COMMENT_STYLES_BY_EXTENSION = {
+    **dict.fromkeys([".c", ".h", ".cc", ".cpp", ".cxx", ".hh", ".hpp", ".hxx", ".m", ".mm", ".java", ".go", ".proto"],
+                    COMMENTS_C),
+    **dict.fromkeys([".rs", ".kt", ".kts", ".scala", ".swift"], COMMENTS_C_NESTED),
+    ".cs": COMMENTS_CSHARP,
+    ".dart": COMMENTS_DART,
+    **dict.fromkeys([".js", ".jsx", ".mjs", ".cjs", ".ts", ".tsx", ".mts", ".cts", ".php", ".groovy", ".gradle"], COMMENTS_JS),
+    **dict.fromkeys([".scss", ".less"], COMMENTS_SCSS),
+    ".css": COMMENTS_CSS,
+    **dict.fromkeys([".py", ".pyi", ".r", ".toml", ".ex", ".exs"], COMMENTS_HASH),
+    **dict.fromkeys([".sh", ".bash", ".zsh", ".rb", ".pl", ".pm", ".tf"], COMMENTS_SHELL),
+    **dict.fromkeys([".yaml", ".yml"], COMMENTS_YAML),
+    ".cmake": COMMENTS_CMAKE,
+    **dict.fromkeys([".cfg", ".ini", ".conf", ".mk"], COMMENTS_HASH_LINES),
+    ".sql": COMMENTS_SQL,
+    ".lua": COMMENTS_LUA,
+    **dict.fromkeys([".ada", ".adb", ".ads"], COMMENTS_DASH),
+    **dict.fromkeys([".html", ".htm", ".xml", ".xhtml", ".svg", ".vue", ".md", ".markdown"], COMMENTS_XML),
+}
+_COMMENT_STYLES_BY_NAME = {"Makefile": COMMENTS_HASH_LINES, "Dockerfile": COMMENTS_HASH_LINES, "CMakeLists.txt": COMMENTS_CMAKE,
+                           "Gemfile": COMMENTS_SHELL, "Rakefile": COMMENTS_SHELL}
+
+_DOUBLE_QUOTED = r'"(?:\\[\s\S]|[^"\\\n])*"'
+_SINGLE_QUOTED = r"'(?:\\[\s\S]|[^'\\\n])*'"
+_TRIPLE_QUOTED = r'"""[\s\S]*?"""|' + r"'{3}[\s\S]*?'{3}"
+# A one character literal, so a lone quote (a Rust lifetime, a C++ digit separator) starts no string
+_CHAR_LITERAL = r"'(?:\\[^'\n]{1,10}|[^'\\\n])'"
+_C_BLOCK = r"/\*(?:(?!\*/)[\s\S])*\*/"
+# Without nested comments, so the inner comment of a nesting block comment is removed, never the outer one
+_C_NESTED_BLOCK = r"/\*(?:(?!/\*|\*/)[\s\S])*\*/"
+# Comments read by compilers and tools: Go directives and cgo preambles, TypeScript triple-slash
+# directives, source maps, PHP comments closing the PHP block, line comments continued by a
+# backslash, and /*! */, license and bundler annotations
+_C_DIRECTIVES = (r"(?=[ \t]*/)(?:[ \t]*//(?:go:|export |line |[ \t]*\+build |/[ \t]*<|[ \t]*@ts-|[ \t]*[@#] source(?:Mapping)?URL=)[^\n]*"
+                 r"|[ \t]*//[^\n]*\?>[^\n]*"
+                 r"|[ \t]*//(?:[^\n]*\\\n)+[^\n]*"
+                 r"|(?:[ \t]*(?://[^\n]*|" + _C_BLOCK + r")[ \t]*\n)+(?=import[ \t]*\"C\")"
+                 r"|/\*(?:!|(?:(?!\*/)[\s\S])*?(?:@license|@preserve|[@#]__PURE__|webpackChunkName|@vite-ignore))"
+                 r"(?:(?!\*/)[\s\S])*\*/)")
+_C_STRINGS = (r'(?<!\w)(?:u8|[uUL])?R"(?P<raw_delimiter>[^()\\\s"]{0,16})\([\s\S]*?\)(?P=raw_delimiter)"',  # C++ raw strings
+              r'"""[\s\S]*?"""', _DOUBLE_QUOTED, _CHAR_LITERAL, r"`[^`]*`")
+_C_NESTED_STRINGS = (r'(?<!\w)b?r(?P<raw_hashes>#*)"[\s\S]*?"(?P=raw_hashes)',  # Rust raw strings
+                     r'(?P<swift_hashes>#+)"[\s\S]*?"(?P=swift_hashes)',  # Swift raw strings
+                     r'"""[\s\S]*?"""', _DOUBLE_QUOTED, _CHAR_LITERAL, r"`[^`\n]*`")
+_CSHARP_STRINGS = (r'"""[\s\S]*?"""', r'\$?@\$?"(?:[^"]|"")*"', _DOUBLE_QUOTED, _CHAR_LITERAL)
+_DART_STRINGS = (r'(?<!\w)r(?:"""[\s\S]*?"""|' + r"'{3}[\s\S]*?'{3}|'[^'\n]*'|" + r'"[^"\n]*")', _TRIPLE_QUOTED,
+                 _DOUBLE_QUOTED, _SINGLE_QUOTED)
+# A slash starts a regular expression literal after an operator or a keyword, and a division otherwise
+_REGEX_LITERAL = (r"(?=[ \t]*/)(?:(?<=[(,=:\[!&|?{;])|(?<==>)|"
+                  + "|".join(rf"(?<=\b{keyword})" for keyword in ["return", "typeof", "case", "do", "else", "in", "of", "new",
+                                                                  "delete", "void", "throw", "yield", "await"])
+                  + r")[ \t]*/(?![*/])(?:\\.|\[(?:\\.|[^\]\\\n])*\]|[^/\\\n\[])+/[A-Za-z]*")
+_JS_STRINGS = (r"<<<[ \t]*(?P<php_quote>['\"]?)(?P<php_heredoc>\w+)(?P=php_quote)\n[\s\S]*?^[ \t]*(?P=php_heredoc)\b",  # PHP heredocs
+               _TRIPLE_QUOTED, _DOUBLE_QUOTED, _SINGLE_QUOTED, r"`(?:\\[\s\S]|[^`\\])*`", _REGEX_LITERAL)
+_CSS_STRINGS = (_DOUBLE_QUOTED, _SINGLE_QUOTED, r"url\((?:\\.|[^)\\\n])*\)")
+
+_PYTHON_STRINGS = (_TRIPLE_QUOTED, _DOUBLE_QUOTED, _SINGLE_QUOTED)
+_SHELL_STRINGS = (r"^__(?:END|DATA)__\n[\s\S]*",  # Ruby and Perl data sections
+                  r"^=begin\b[\s\S]*?^=end\b[^\n]*|^=[A-Za-z]\w*[\s\S]*?^=cut\b[^\n]*",  # Ruby block comments, Perl POD
+                  # Heredocs, named by a quoted or an upper case word, so a shift (items << item) starts none
+                  r"<<[-~]?[ \t]*(?:(?P<heredoc_quote>['\"])(?P<quoted_heredoc>\w+)(?P=heredoc_quote)|(?P<heredoc>[A-Z_][A-Z0-9_]*)\b)"
+                  r"[^\n]*\n[\s\S]*?^[ \t]*(?:(?P=quoted_heredoc)|(?P=heredoc))$",
+                  r"\\[\s\S]", r"\$'(?:\\[\s\S]|[^'\\])*'", r'"(?:\\[\s\S]|[^"\\])*"', r"'[^']*'")
+# A block scalar (key: | or - >), with its more indented lines
+_YAML_STRINGS = (r"^(?P<block_indent>[ \t]*)(?:[^\n#]*?[:-][ \t]*)?[|>][0-9+-]*[ \t]*(?:#[^\n]*)?\n"
+                 r"(?:(?P=block_indent)[ \t]+[^\n]*(?:\n|\Z)|[ \t]*\n)*", _DOUBLE_QUOTED, _SINGLE_QUOTED)
+_CMAKE_STRINGS = (r"(?<!#)\[(?P<bracket_level>=*)\[[\s\S]*?\](?P=bracket_level)\]", r'"(?:\\[\s\S]|[^"\\])*"')
+# Magic comments (encoding declarations, Ruby pragmas) and whole-line comments continued by a backslash are kept
+_MAGIC_COMMENT = r"(?![^\n]*(?:-\*-|coding[:=]|frozen_string_literal:))"
+_HASH_COMMENTS = r"|^[ \t]*#(?!!)" + _MAGIC_COMMENT + r"[^\n]*(?<!\\)(?:\n|\Z)|[ \t]+#" + _MAGIC_COMMENT + r"[^\n]*"
+
+_SQL_STRINGS = (r"'(?:''|[^'])*'", r'"(?:""|[^"])*"', r"`[^`]*`",
+                r"\$(?P<dollar_tag>(?:[A-Za-z_]\w*)?)\$[\s\S]*?\$(?P=dollar_tag)\$",  # PostgreSQL dollar quotes
+                r"/\*[!+](?:(?!\*/)[\s\S])*\*/")  # MySQL executable comments, optimizer hints
+_LUA_STRINGS = (r"\[(?P<long_level>=*)\[[\s\S]*?\](?P=long_level)\]", _DOUBLE_QUOTED, _SINGLE_QUOTED)
+_LUA_BLOCK = r"--\[(?P<{0}>=*)\[(?:(?!\](?P={0})\])[\s\S])*\](?P={0})\]"
+_XML_STRINGS = (r"<!\[CDATA\[[\s\S]*?\]\]>",
+                r"(?i:<(?P<raw_tag>script|style|pre|textarea)\b[\s\S]*?</(?P=raw_tag)\s*>)",
+                r"^[ \t]*(?P<fence>`{3,}|~{3,})[^\n]*\n[\s\S]*?(?:^[ \t]*(?P=fence)[ \t]*$|\Z)",  # Markdown code blocks
+                r"`[^`\n]+`")
+_XML_BLOCK = r"<!--(?:(?!-->)[\s\S])*-->"
+
+
+def _strings(*strings) -> str:
+    return r"(?P<string>" + "|".join(strings) + r")"
+
+
+def _c_like_pattern(strings, block=_C_BLOCK, line_comments=True):
+    line_comments = r"|^[ \t]*//[^\n]*(?:\n|\Z)|[ \t]*(?<!:)//[^\n]*" if line_comments else ""
+    return _strings(*strings, _C_DIRECTIVES) + r"|^[ \t]*" + block + r"[ \t]*(?:\n|\Z)" + line_comments + "|" + block
+
+
+# Each pattern matches string literals and the other text kept as it is (group "string"), or
+# comments. Comments taking whole lines are matched with their indentation and line break, so no
+# empty line is left behind. A // right after a colon is part of a URL, not a comment.
+# The patterns are compiled on first use (see _comment_pattern), as most runs need few or none of them.
+_COMMENT_PATTERN_SOURCES = {
+    COMMENTS_C: _c_like_pattern(_C_STRINGS),
+    COMMENTS_C_NESTED: _c_like_pattern(_C_NESTED_STRINGS, _C_NESTED_BLOCK),
+    COMMENTS_CSHARP: _c_like_pattern(_CSHARP_STRINGS),
+    COMMENTS_DART: _c_like_pattern(_DART_STRINGS, _C_NESTED_BLOCK),
+    COMMENTS_JS: _c_like_pattern(_JS_STRINGS),
+    COMMENTS_SCSS: _c_like_pattern(_CSS_STRINGS),
+    COMMENTS_CSS: _c_like_pattern(_CSS_STRINGS, line_comments=False),
+    COMMENTS_HASH: _strings(*_PYTHON_STRINGS) + _HASH_COMMENTS,
+    COMMENTS_SHELL: _strings(*_SHELL_STRINGS) + _HASH_COMMENTS,
+    COMMENTS_YAML: _strings(*_YAML_STRINGS) + _HASH_COMMENTS,
+    COMMENTS_CMAKE: _strings(*_CMAKE_STRINGS) + r"|^[ \t]*#\[(?P<line_level>=*)\[[\s\S]*?\](?P=line_level)\]"
+                    r"[ \t]*(?:\n|\Z)|#\[(?P<level>=*)\[[\s\S]*?\](?P=level)\]" + _HASH_COMMENTS,
+    COMMENTS_HASH_LINES: r"^[ \t]*#(?![ \t]*(?:syntax|escape|check)[ \t]*=)[^\n]*(?<!\\)(?:\n|\Z)",
+    COMMENTS_SQL: _strings(*_SQL_STRINGS) + r"|^[ \t]*" + _C_BLOCK + r"[ \t]*(?:\n|\Z)|^[ \t]*--[^\n]*(?:\n|\Z)"
+                  r"|[ \t]*--[^\n]*|" + _C_BLOCK,
+    COMMENTS_LUA: _strings(*_LUA_STRINGS) + r"|^[ \t]*" + _LUA_BLOCK.format("line_level") + r"[ \t]*(?:\n|\Z)"
+                  r"|" + _LUA_BLOCK.format("level") + r"|^[ \t]*--[^\n]*(?:\n|\Z)|[ \t]*--[^\n]*",
+    COMMENTS_DASH: _strings(r'"(?:""|[^"\n])*"', _CHAR_LITERAL) + r"|^[ \t]*--[^\n]*(?:\n|\Z)|[ \t]*--[^\n]*",
+    COMMENTS_XML: _strings(*_XML_STRINGS) + r"|^[ \t]*" + _XML_BLOCK + r"[ \t]*(?:\n|\Z)|" + _XML_BLOCK,
+}
+# Leading comment block of a file, after an optional shebang line and blank lines
+_C_HEADER = r"\A(?:[ \t]*\n)*(?:[ \t]*" + _C_BLOCK + r"[ \t]*(?:\n|\Z)|(?:[ \t]*//[^\n]*(?:\n|\Z))+)"
+_HASH_HEADER = r"\A(?:#![^\n]*\n)?(?:[ \t]*\n)*(?:[ \t]*#(?!!)[^\n]*(?:\n|\Z))+"
+_HEADER_PATTERN_SOURCES = {
+    **dict.fromkeys([COMMENTS_C, COMMENTS_C_NESTED, COMMENTS_CSHARP, COMMENTS_DART, COMMENTS_JS, COMMENTS_SCSS], _C_HEADER),
+    COMMENTS_CSS: r"\A(?:[ \t]*\n)*[ \t]*" + _C_BLOCK + r"[ \t]*(?:\n|\Z)",
+    **dict.fromkeys([COMMENTS_HASH, COMMENTS_SHELL, COMMENTS_YAML, COMMENTS_CMAKE, COMMENTS_HASH_LINES], _HASH_HEADER),
+    COMMENTS_SQL: r"\A(?:[ \t]*\n)*(?:[ \t]*" + _C_BLOCK + r"[ \t]*(?:\n|\Z)|(?:[ \t]*--[^\n]*(?:\n|\Z))+)",
+    COMMENTS_LUA: r"\A(?:#![^\n]*\n)?(?:[ \t]*\n)*(?:[ \t]*" + _LUA_BLOCK.format("level") + r"[ \t]*(?:\n|\Z)"
+                  r"|(?:[ \t]*--[^\n]*(?:\n|\Z))+)",
+    COMMENTS_DASH: r"\A(?:[ \t]*\n)*(?:[ \t]*--[^\n]*(?:\n|\Z))+",
+    COMMENTS_XML: r"\A(?:<\?xml[^\n]*\n)?(?:[ \t]*\n)*[ \t]*" + _XML_BLOCK + r"[ \t]*(?:\n|\Z)",
+}
+# Languages delimiting blocks with braces or keywords, where indentation carries no meaning
+_REINDENTABLE_STYLES = {COMMENTS_C, COMMENTS_C_NESTED, COMMENTS_CSHARP, COMMENTS_DART, COMMENTS_JS, COMMENTS_SCSS, COMMENTS_CSS,
+                        COMMENTS_SQL, COMMENTS_LUA, COMMENTS_DASH}
+_SHEBANG_PATTERN = re.compile(r"\A#![^\n]*\n")
+_XML_DECLARATION_PATTERN = re.compile(r"\A<\?xml[^\n]*\n")
+_LICENSE_PATTERN = re.compile(r"copyright|licen[cs]e|spdx-license-identifier|all rights reserved|permission is hereby granted"
+                              r"|warranty|\(c\)|©", re.IGNORECASE)
+_TRAILING_WHITESPACE_PATTERN = re.compile(r"[ \t]+$", re.MULTILINE)
+_BLANK_LINES_PATTERN = re.compile(r"\n(?:[ \t]*\n){2,}")
+
+
+@lru_cache(maxsize=None)
+def _comment_pattern(style: str) -> Pattern:
+    return re.compile(_COMMENT_PATTERN_SOURCES[style], re.MULTILINE)
+
+
+@lru_cache(maxsize=None)
+def _header_pattern(style: str) -> Pattern:
+    return re.compile(_HEADER_PATTERN_SOURCES[style])
+
+
+def _keep_strings(match) -> str:
+    return match.groupdict().get("string") or ""
+
+
+def get_comment_style(path) -> Optional[str]:
+    name = os.path.basename(path)
+    if name in _COMMENT_STYLES_BY_NAME:
+        return _COMMENT_STYLES_BY_NAME[name]
+    return _COMMENT_STYLES_BY_EXTENSION.get(os.path.splitext(name)[1].lower())
+
+
+def _indent_with_tabs(content: str, style: str) -> str:
+    """Replaces the spaces indenting lines with a tab per indentation level.
+
+    The indentation width is the most common indentation step of the file. Lines starting inside a
+    multi-line string literal are kept, and so are spaces aligning a line past its indentation level.
+    """
+    multi_line_strings = [match.span("string") for match in _comment_pattern(style).finditer(content)
+                          if match.group("string") and "\n" in match.group("string")]
+    lines = content.split("\n")
+    widths: Dict[int, int] = {}
+    offset, string_index = 0, 0
+    for index, line in enumerate(lines):
+        while string_index < len(multi_line_strings) and multi_line_strings[string_index][1] <= offset:
+            string_index += 1
+        in_string = string_index < len(multi_line_strings) and multi_line_strings[string_index][0] < offset
+        offset += len(line) + 1
+        stripped = line.lstrip(" ")
+        if not in_string and stripped and stripped[0] != "\t":
+            widths[index] = len(line) - len(stripped)
+
+    steps = Counter(width - previous for previous, width in zip(widths.values(), list(widths.values())[1:]) if width > previous)
+    unit = next((step for step, _ in steps.most_common() if 2 <= step <= 8), None)
+    if unit is None:
+        return content
+    for index, width in widths.items():
+        if width >= unit:
+            lines[index] = "\t" * (width // unit) + " " * (width % unit) + lines[index][width:]
+    return "\n".join(lines)
+
+
+@dataclass
+class NormalizationReport:
+    files: int = 0
+    changed_files: int = 0
+    skipped_files: int = 0  # memory-mapped files, which are never loaded into memory
+    license_headers: int = 0
+    distinct_license_headers: int = 0
+    tokens_before: int = 0
+    tokens_after: int = 0
+
+
+class ContentNormalizer:
+    """Cuts tokens from file contents: license headers, comments, indentation spaces, trailing whitespace
+    and blank line runs.
+
+    Comments are recognized by the file extension, skipping string literals, regular expression
+    literals, heredocs and comments read by compilers, so code is never changed. A license header is
+    the leading comment block of a file, when it mentions a copyright or a license. Headers are
+    identified by their hash, so a header repeated in every file of a repository is checked once.
+    Indentation is only rewritten in languages where it carries no meaning.
+    """
+
+    def __init__(self, strip_license_headers=False, strip_comments=False, strip_trailing_whitespace=False,
+                 collapse_blank_lines=False, normalize_indentation=False):
+        self.strip_license_headers = strip_license_headers
+        self.strip_comments = strip_comments
+        self.normalize_indentation = normalize_indentation
+        self.strip_trailing_whitespace = strip_trailing_whitespace
+        self.collapse_blank_lines = collapse_blank_lines
+        self._license_headers: Dict[bytes, bool] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return (self.strip_license_headers or self.strip_comments or self.normalize_indentation or self.strip_trailing_whitespace
+                or self.collapse_blank_lines)
+
+    @property
+    def distinct_license_headers(self) -> int:
+        return sum(self._license_headers.values())
+
+    def is_license_header(self, header: str) -> bool:
+        key = hashlib.blake2b(header.encode("utf-8", errors="surrogatepass"), digest_size=16).digest()
+        is_license = self._license_headers.get(key)
+        if is_license is None:
+            is_license = self._license_headers[key] = bool(_LICENSE_PATTERN.search(header))
+        return is_license
+
+    def _strip_license_header(self, content: str, style: str) -> (str, bool):
+        match = _header_pattern(style).match(content)
+        if match is None or not self.is_license_header(match.group()):
+            return content, False
+        prolog = _SHEBANG_PATTERN.match(content) or _XML_DECLARATION_PATTERN.match(content)
+        prolog = prolog.group() if prolog else ""
+        return prolog + content[match.end():].lstrip("\n"), True
+
+    def normalize(self, path, content: str) -> (str, bool):
+        """Returns the normalized content, and whether a license header was stripped."""
+        style = get_comment_style(path)
+        stripped_header = False
+        if self.strip_license_headers and style is not None:
+            content, stripped_header = self._strip_license_header(content, style)
+        if self.strip_comments and style is not None:
+            content = _comment_pattern(style).sub(_keep_strings, content)
+        if self.normalize_indentation and style in _REINDENTABLE_STYLES:
+            content = _indent_with_tabs(content, style)
+        if self.strip_trailing_whitespace:
+            content = _TRAILING_WHITESPACE_PATTERN.sub("", content)
+        if self.collapse_blank_lines:
+            content = _BLANK_LINES_PATTERN.sub("\n\n", content)
+        return content, stripped_header
+
+    def normalize_tree(self, data: DirectoryAnalysis, tokenizer=None) -> NormalizationReport:
+        """Normalizes the content of every non-ignored text file of the tree in place.
+
+        Memory-mapped large files are left as they are, so they are still never loaded into memory.
+        Files spilled to disk by a memory budget are normalized one at a time and spilled again.
+        With a `tokenizer`, tokens are counted before and after normalization for the report.
+        """
+        report = NormalizationReport()
+        for node in data.get_all_non_ignored_files():
+            if not isinstance(node, TextFileAnalysis) or node.name_only or node.file_content == "[Non-text file]":
+                continue
+            report.files += 1
+            if isinstance(node, MappedTextFileAnalysis) and not isinstance(node, SpilledTextFileAnalysis):
+                report.skipped_files += 1
+                if tokenizer is not None:
+                    tokens = node.count_tokens(tokenizer)
+                    report.tokens_before += tokens
+                    report.tokens_after += tokens
+                continue
+
+            if tokenizer is not None:
+                report.tokens_before += node.count_tokens(tokenizer)
+            original = node.get_content()
+            content, stripped_header = self.normalize(node.get_full_path(), original)
+            report.license_headers += stripped_header
+            if content != original:
+                if isinstance(node, SpilledTextFileAnalysis):
+                    node.replace_content(content)
+                else:
+                    node.file_content = content
+                report.changed_files += 1
+            if tokenizer is not None:
+                report.tokens_after += node.count_tokens(tokenizer)
+        report.distinct_license_headers = self.distinct_license_headers
+        return report
+
+
+def generate_normalization_string(report: NormalizationReport, tokenizer=None) -> str:
+    output = f"Normalized {report.changed_files} of {report.files} files"
+    if report.license_headers:
+        output += f", stripped {report.license_headers} license headers ({report.distinct_license_headers} distinct)"
+    if report.skipped_files:
+        output += f", {report.skipped_files} memory-mapped files left as they are"
+    output += "\n"
+    if tokenizer is not None:
+        saved = report.tokens_before - report.tokens_after
+        percent = 100 * saved / report.tokens_before if report.tokens_before else 0
+        output += f"Tokens ({tokenizer}): {report.tokens_before} before, {report.tokens_after} after ({saved} saved, {percent:.1f}%)\n"
+    return output
@@ -0,0 +1,219 @@
+import ast
+import hashlib
+import os
+import re
+import threading
+from concurrent.futures import Executor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+CONTENT_FULL = "full"
+CONTENT_OUTLINE = "outline"
+
+# Statements spanning more lines are not worth keeping in an outline, e.g. large constant tables.
+MAX_ASSIGNMENT_LINES = 3
+
+
+def _indentation(line: str) -> str:
+    return line[:len(line) - len(line.lstrip())]
+
+
+def _is_docstring(statement) -> bool:
+    return (isinstance(statement, ast.Expr) and isinstance(statement.value, ast.Constant)
+            and isinstance(statement.value.value, str))
+
+
+def outline_python(source: str) -> Optional[str]:
+    """Outlines Python code with `ast`: imports, short assignments, class and function signatures and docstrings.
+
+    Function bodies are replaced by `...`. Returns None if the code cannot be parsed.
+    """
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return None
+
+    lines = source.splitlines()
+    output: List[str] = []
+
+    def copy_lines(first, last):
+        output.extend(lines[first - 1:last])
+
+    def visit_body(statements, in_class=False):
+        for i, statement in enumerate(statements):
+            if i == 0 and _is_docstring(statement):
+                copy_lines(statement.lineno, statement.end_lineno)
+            elif isinstance(statement, (ast.Import, ast.ImportFrom)) and not in_class:
+                copy_lines(statement.lineno, statement.end_lineno)
+            elif isinstance(statement, (ast.Assign, ast.AnnAssign)):
+                if statement.end_lineno - statement.lineno < MAX_ASSIGNMENT_LINES:
+                    copy_lines(statement.lineno, statement.end_lineno)
+            elif isinstance(statement, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                visit_definition(statement)
+
+    def visit_definition(node):
+        first = min([decorator.lineno for decorator in node.decorator_list] + [node.lineno])
+        body = node.body
+        if body[0].lineno == node.lineno:
+            # One-liner, e.g. `def f(): pass`
+            copy_lines(first, node.end_lineno)
+            return
+
+        copy_lines(first, body[0].lineno - 1)
+        body_indentation = _indentation(lines[body[0].lineno - 1])
+        if isinstance(node, ast.ClassDef):
+            size = len(output)
+            visit_body(body, in_class=True)
+            if len(output) == size:
+                output.append(body_indentation + "...")
+        else:
+            if _is_docstring(body[0]):
+                copy_lines(body[0].lineno, body[0].end_lineno)
+            output.append(body_indentation + "...")
+
+    visit_body(tree.body)
+    return "\n".join(output)
+
+
+# Cheap outliners for other languages: declaration lines are kept, everything else is dropped.
+_DECLARATION_PATTERNS = {
+    "javascript": re.compile(
+        r"^\s*(export\s+)?(default\s+)?(declare\s+)?(abstract\s+)?(async\s+)?"
+        r"(function\*?|class|interface|type|enum|namespace|module)\s"
+        r"|^\s*(export\s+)?(const|let|var)\s+\w+\s*(:[^=]+)?=\s*(async\s*)?(\([^)]*\)|\w+)\s*(:[^=]+)?=>"
+        r"|^\s*import\s"
+        r"|^\s+(public\s+|private\s+|protected\s+|static\s+|readonly\s+|async\s+|get\s+|set\s+)*"
+        r"(?!if\b|for\b|while\b|switch\b|catch\b|return\b)\w+\s*\([^;]*\)\s*(:[^{;]+)?\{\s*$"),
+    "go": re.compile(r"^(package|import|func|type|const|var)\s|^\s+\w+\s+(func|interface|struct)\b"),
+    "rust": re.compile(r"^\s*(pub(\([\w:]+\))?\s+)?(async\s+)?(unsafe\s+)?(fn|struct|enum|trait|impl|mod|type|const|static|use|macro_rules!)\s"),
+    "java": re.compile(
+        r"^\s*(package|import)\s"
+        r"|^\s*(@\w+\s+)*((public|private|protected|internal|static|abstract|final|sealed|open|data|override|suspend|inline|partial|async|virtual)\s+)*"
+        r"(class|interface|enum|record|object|struct|fun|namespace)\s"
+        r"|^\s*((public|private|protected|internal|static|abstract|final|override|synchronized|async|virtual)\s+)+[\w<>\[\],.?\s]+\s+\w+\s*\("),
+    "c": re.compile(
+        r"^\s*#\s*(include|define)\b"
+        r"|^\s*(template\s*<.*>\s*)?(class|struct|union|enum|namespace|typedef)\b"
+        r"|^[A-Za-z_][\w\s\*&:<>,~]*\([^;]*\)\s*(const)?\s*(\{\s*)?$"),
+    "ruby": re.compile(r"^\s*(class|module|def|attr_(reader|writer|accessor)|require(_relative)?|include|extend)\s"),
+    "php": re.compile(r"^\s*(namespace|use)\s|^\s*((abstract|final|public|private|protected|static)\s+)*(class|interface|trait|enum|function)\s"),
+    "shell": re.compile(r"^\s*(function\s+\w+|\w+\s*\(\)\s*\{?)"),
+    "markdown": re.compile(r"^#{1,6}\s"),
+}
+
+_LANGUAGES_BY_EXTENSION = {
+    "js": "javascript", "mjs": "javascript", "cjs": "javascript", "jsx": "javascript", "ts": "javascript",
+    "tsx": "javascript", "mts": "javascript", "cts": "javascript",
+    "go": "go", "rs": "rust",
+    "java": "java", "kt": "java", "kts": "java", "scala": "java", "cs": "java", "swift": "java", "dart": "java",
+    "c": "c", "h": "c", "cc": "c", "cpp": "c", "cxx": "c", "hpp": "c", "hh": "c", "m": "c", "mm": "c",
+    "rb": "ruby", "php": "php", "sh": "shell", "bash": "shell", "zsh": "shell",
+    "md": "markdown", "markdown": "markdown",
+    "py": "python", "pyi": "python",
+}
+
+
+def get_language(path: str) -> Optional[str]:
+    return _LANGUAGES_BY_EXTENSION.get(os.path.splitext(path)[1][1:].lower())
+
+
+def outline_with_pattern(source: str, pattern) -> str:
+    return "\n".join(line.rstrip() for line in source.splitlines() if pattern.match(line))
+
+
+def _outline_uncached(language: str, source: str) -> Optional[str]:
+    if language == "python":
+        result = outline_python(source)
+    else:
+        result = outline_with_pattern(source, _DECLARATION_PATTERNS[language])
+    # Without any declaration, the outline would lose the whole file: keep its full content instead
+    return result if result and result.strip() else None
+
+
+class OutlineCache:
+    """Outlines of already seen contents, keyed by content digest and language."""
+
+    MISSING = object()
+
+    def __init__(self):
+        self._outlines: Dict[Tuple[str, bytes], Optional[str]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(language: str, source: str) -> Tuple[str, bytes]:
+        return language, hashlib.blake2b(source.encode("utf-8", errors="surrogatepass"), digest_size=16).digest()
+
+    def get(self, key):
+        with self._lock:
+            return self._outlines.get(key, self.MISSING)
+
+    def put(self, key, outline: Optional[str]):
+        with self._lock:
+            self._outlines[key] = outline
+
+
+_outline_cache = OutlineCache()
+
+
+def outline(path: str, source: str) -> Optional[str]:
+    """Returns the outline of a file, or None if its language is not supported, Python does not parse
+    or the file has no declarations to outline."""
+    language = get_language(path)
+    if language is None:
+        return None
+
+    key = OutlineCache.key(language, source)
+    cached = _outline_cache.get(key)
+    if cached is not OutlineCache.MISSING:
+        return cached
+    result = _outline_uncached(language, source)
+    _outline_cache.put(key, result)
+    return result
+
+
+def create_outline_executor(workers=None) -> Executor:
+    """Creates the process pool parsing outlines. Worker processes are only started when a batch is submitted."""
+    # Imported here, as it loads multiprocessing, which most dumps never use
+    from concurrent.futures import ProcessPoolExecutor
+
+    return ProcessPoolExecutor(max_workers=workers)
+
+
+def _outline_in_executor(executor: Executor, missing) -> List[Optional[str]]:
+    return list(executor.map(_outline_uncached, [item[2] for item in missing], [item[3] for item in missing], chunksize=16))
+
+
+def outline_many(files: Iterable[Tuple[str, str]], workers=None, min_parallel_files=64,
+                 executor: Executor = None) -> Iterator[Optional[str]]:
+    """Outlines (path, source) pairs, yielding the outlines in order.
+
+    Contents not found in the cache are parsed in a process pool when there are at least
+    `min_parallel_files` of them, since parsing is CPU bound. Pass `workers=1` to parse in-process.
+    Callers outlining many batches pass their own process pool as `executor`, so the worker
+    processes are started once rather than for every batch.
+    """
+    files = list(files)
+    results: List[Optional[str]] = [None] * len(files)
+    missing = []
+    for i, (path, source) in enumerate(files):
+        language = get_language(path)
+        if language is None:
+            continue
+        key = OutlineCache.key(language, source)
+        cached = _outline_cache.get(key)
+        if cached is OutlineCache.MISSING:
+            missing.append((i, key, language, source))
+        else:
+            results[i] = cached
+
+    if len(missing) < min_parallel_files or (executor is None and workers == 1):
+        outlines = [_outline_uncached(language, source) for _, _, language, source in missing]
+    elif executor is not None:
+        outlines = _outline_in_executor(executor, missing)
+    else:
+        with create_outline_executor(workers) as executor:
+            outlines = _outline_in_executor(executor, missing)
+
+    for (i, key, _, _), result in zip(missing, outlines):
+        _outline_cache.put(key, result)
+        results[i] = result
+    return iter(results)
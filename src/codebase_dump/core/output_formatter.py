@@ -1,12 +1,164 @@
-from codebase_dump.core.models import DirectoryAnalysis, NodeAnalysis, TextFileAnalysis
-from typing import List
+from codebase_dump.core.dependency_graph import ORDER_CLUSTERS, ORDER_TREE, DependencyGraph, extract_file_imports
+from codebase_dump.core.dump_digest import DumpDigest, HashingStream
+from codebase_dump.core.dump_index import CountingStream, DumpIndex
+from codebase_dump.core.models import DirectoryAnalysis, FileRecord, NodeAnalysis, TextFileAnalysis, RANK_BY_SIZE, RANK_BY_TOKENS
+from codebase_dump.core.outline import CONTENT_FULL, CONTENT_OUTLINE, create_outline_executor, outline, outline_many
+from codebase_dump.core.tokenizers import EstimateTokenizer, count_tokens, normalize_tokenizer_names
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Tuple
+import io
 import os
 
 class OutputFormatterBase:
+    DEFAULT_OUTLINE_BATCH_BYTES = 16 * 1024 * 1024
+
+    def __init__(self, tokenizers: List[str] = None, rank_by=RANK_BY_SIZE, count_tokens=True, content_mode=CONTENT_FULL,
+                 outline_workers=None, order=ORDER_TREE, reproducible=False, max_buffered_bytes=None):
+        """With `count_tokens` disabled, token counts are left out and no tokenizer is ever loaded.
+
+        With `content_mode` set to outline, files are written as outlines (signatures, class outlines
+        and docstrings) when their language is supported. Outlines are parsed by `outline_workers` processes.
+        With `order` set to dependencies or clusters, files are written in import order and the dependency
+        graph is added to the header.
+
+        With `reproducible`, the output only depends on the analyzed content: paths are written with "/"
+        on every platform and ignore patterns are listed sorted.
+
+        Outlines are parsed in batches of files whose contents add up to at most `max_buffered_bytes`
+        (16 MB by default), so every file's content is never read at once.
+        """
+        self.tokenizers = normalize_tokenizer_names(tokenizers)
+        self.rank_by = rank_by
+        self.count_tokens = count_tokens
+        self.content_mode = content_mode
+        self.outline_workers = outline_workers
+        self.order = order
+        self.reproducible = reproducible
+        self.max_buffered_bytes = max_buffered_bytes
+
     def output_file_extension(self):
         raise NotImplemented
 
     def format(self, data: DirectoryAnalysis, ignore_patterns: set) -> str:
+        stream = io.BytesIO()
+        self.write(data, ignore_patterns, stream)
+        return stream.getvalue().decode("utf-8")
+
+    def write(self, data: DirectoryAnalysis, ignore_patterns: set, stream: BinaryIO, index: DumpIndex = None,
+              digest: DumpDigest = None, search_index=None):
+        """Writes the formatted output into a binary stream, file by file.
+
+        File contents are written straight from the nodes, so the whole output is never held in memory.
+        With an `index`, the byte range of every file section is recorded into it while writing.
+        With a `digest`, the output and every file content are hashed while writing.
+        With a `search_index` (a `SearchIndex`), every written file content is indexed; call its
+        `finish_update` afterwards.
+        """
+        if digest is not None:
+            stream = digest.wrap(stream)
+        if index is not None:
+            stream = CountingStream(stream)
+            index.tokenizer = self.tokenizers[0] if self.count_tokens else None
+        files, graph = self.order_content_files(data)
+        stream.write(self.format_header(data, ignore_patterns, graph).encode("utf-8"))
+        if self.content_mode == CONTENT_OUTLINE:
+            # A single pool parses every batch, and is shut down once the last batch is written
+            executor = create_outline_executor(self.outline_workers) if self.outline_workers != 1 else None
+            try:
+                for batch in self._iter_outline_batches(files):
+                    outlines = outline_many(((path, node.get_content()) for path, node in batch), self.outline_workers,
+                                            executor=executor)
+                    for (path, node), file_outline in zip(batch, outlines):
+                        self.write_file_section(path, node, stream, file_outline, index, digest, search_index)
+            finally:
+                if executor is not None:
+                    executor.shutdown()
+        else:
+            for path, node in files:
+                self.write_file_section(path, node, stream, index=index, digest=digest, search_index=search_index)
+
+        if index is not None:
+            index.dump_size = stream.position
+        if digest is not None:
+            digest.finish(data)
+
+    def _iter_outline_batches(self, files: List[Tuple[str, TextFileAnalysis]]) -> Iterator[List[Tuple[str, TextFileAnalysis]]]:
+        max_buffered_bytes = self.max_buffered_bytes or self.DEFAULT_OUTLINE_BATCH_BYTES
+        batch, batch_size = [], 0
+        for path, node in files:
+            if batch and batch_size + node.size > max_buffered_bytes:
+                yield batch
+                batch, batch_size = [], 0
+            batch.append((path, node))
+            batch_size += node.size
+        if batch:
+            yield batch
+
+    def write_file_records(self, records: Iterable[FileRecord], stream: BinaryIO, root_name="", index: DumpIndex = None):
+        """Writes file sections straight from `CodebaseAnalysis.iter_files` records, without building the tree.
+
+        Only one file is held in memory at a time. Paths are prefixed with `root_name`, as in the tree output.
+        Files are always written in directory walk order, since ordering by imports needs all of them.
+        """
+        if index is not None:
+            stream = CountingStream(stream)
+            index.tokenizer = self.tokenizers[0] if self.count_tokens else None
+        for record in records:
+            if record.is_dir or record.is_ignored:
+                continue
+            node = record.to_node()
+            if node is not None and not node.name_only and node.file_content != "[Non-text file]":
+                path = os.path.join(root_name, record.path)
+                file_outline = outline(path, node.get_content()) if self.content_mode == CONTENT_OUTLINE else None
+                self.write_file_section(path, node, stream, file_outline, index)
+
+        if index is not None:
+            index.dump_size = stream.position
+
+    def write_file_section(self, path: str, node: TextFileAnalysis, stream: BinaryIO, content: str = None,
+                           index: DumpIndex = None, digest: DumpDigest = None, search_index=None):
+        """Writes a file with its content, or with `content` (e.g. its outline) instead when given.
+
+        With an `index`, `stream` must be a `CountingStream`, and the section's byte range is added to the index.
+        With a `digest`, the written content is hashed into it. With a `search_index`, it is indexed.
+        """
+        if index is not None:
+            offset = stream.position
+        stream.write(self.format_file_prefix(self.format_path(path)).encode("utf-8"))
+        if index is not None:
+            content_offset = stream.position
+        hashing_stream = content_stream = stream if digest is None else HashingStream(stream)
+        if search_index is not None:
+            content_stream = search_index.wrap(content_stream)
+        if content is None:
+            node.write_content(content_stream)
+        else:
+            content_stream.write(content.encode("utf-8", errors="replace"))
+        if digest is not None:
+            digest.add_file(path, hashing_stream.hasher.hexdigest())
+        if search_index is not None:
+            search_index.add_file(path, node.size, content_stream)
+        if index is not None:
+            content_end = stream.position
+        stream.write(self.format_file_suffix(self.format_path(path)).encode("utf-8"))
+
+        if index is not None:
+            tokens = None
+            if self.count_tokens:
+                tokenizer = self.tokenizers[0]
+                tokens = node.count_tokens(tokenizer) if content is None else count_tokens(content, [tokenizer])[tokenizer]
+            index.add(path, offset, content_offset, content_end, stream.position, tokens)
+
+    def format_header(self, data: DirectoryAnalysis, ignore_patterns: set, graph: DependencyGraph = None) -> str:
+        raise NotImplemented
+
+    def format_path(self, path: str) -> str:
+        """Formats a path for the output, with "/" separators in reproducible mode."""
+        return path.replace(os.sep, "/") if self.reproducible else path
+
+    def format_file_prefix(self, path: str) -> str:
+        raise NotImplemented
+
+    def format_file_suffix(self, path: str) -> str:
         raise NotImplemented
     
     def generate_tree_string(self, node: NodeAnalysis, prefix="", is_last=True, show_size=False, show_ignored=False):
@@ -39,13 +191,13 @@ class OutputFormatterBase:
         if node.is_ignored:
             return ""
 
-        result = "- " + node.get_full_path()
+        result = "- " + self.format_path(node.get_full_path())
 
         if isinstance(node, DirectoryAnalysis):
             result += "/"
 
         if isinstance(node, TextFileAnalysis):
-            result += f" ({node.size} bytes)"
+            result += " (content not included)" if node.name_only else f" ({node.size} bytes)"
 
         result += "\n"
 
@@ -55,38 +207,82 @@ class OutputFormatterBase:
                 result += self.generate_tree_string_for_LLM(child)
         return result
 
+    def iter_content_files(self, data: NodeAnalysis, path="") -> Iterator[Tuple[str, TextFileAnalysis]]:
+        """Yields (path, node) for every non-ignored text file, in output order."""
+        if isinstance(data, TextFileAnalysis) and not data.is_ignored and not data.name_only and data.file_content != "[Non-text file]":
+            yield os.path.join(path, data.name), data
+        elif isinstance(data, DirectoryAnalysis):
+            for child in data.children:
+                yield from self.iter_content_files(child, os.path.join(path, data.name))
+
+    def order_content_files(self, data: NodeAnalysis) -> Tuple[List[Tuple[str, TextFileAnalysis]], Optional[DependencyGraph]]:
+        """Returns the files to write in output order, and the dependency graph they were ordered by, if any."""
+        files = list(self.iter_content_files(data))
+        if self.order == ORDER_TREE:
+            return files, None
+        root_prefix = data.name + os.sep
+        paths = [path[len(root_prefix):] if path.startswith(root_prefix) else path for path, _ in files]
+        # Only the head of each file is read for its imports, and files of other languages are not read at all
+        graph = DependencyGraph(paths, [extract_file_imports(path, node) for path, (_, node) in zip(paths, files)])
+        return [files[index] for index in graph.order(self.order)], graph
+
     def generate_content_string(self, data: NodeAnalysis):
         """Generates a structured representation of file contents."""
-        content = []
-
-        def add_file_content(node, path=""):
-            if isinstance(node, TextFileAnalysis) and not node.is_ignored and node.file_content != "[Non-text file]":
-                content.append({
-                    "path": os.path.join(path, node.name),
-                    "content": node.file_content
-                })
-            elif isinstance(node, DirectoryAnalysis):
-                for child in node.children:
-                    add_file_content(child, os.path.join(path, node.name))
-
-        add_file_content(data)
-        return content
+        return [{"path": path, "content": node.get_content()} for path, node in self.order_content_files(data)[0]]
+
+    def generate_dependency_graph_string(self, graph: DependencyGraph, root_name="", prefix=""):
+        """Lists the files in output order, each with the files of the codebase it imports."""
+        def format_file(index):
+            line = f"{prefix}- {os.path.join(root_name, graph.paths[index])}"
+            if graph.imports[index]:
+                line += " -> " + ", ".join(os.path.join(root_name, graph.paths[imported]) for imported in graph.imports[index])
+            return line + "\n"
+
+        output = f"{prefix}{len(graph.paths)} files, {graph.edge_count} imports between them\n"
+        if self.order != ORDER_CLUSTERS:
+            return output + "".join(format_file(index) for index in graph.order(self.order))
+
+        clusters = graph.clusters()
+        connected = [cluster for cluster in clusters if len(cluster) > 1]
+        for number, cluster in enumerate(connected, 1):
+            output += f"{prefix}Cluster {number} ({len(cluster)} files):\n"
+            output += "".join(format_file(index) for index in cluster)
+        if len(connected) < len(clusters):
+            output += f"{prefix}Files without imports from or to other files:\n"
+            output += "".join(format_file(cluster[0]) for cluster in clusters[len(connected):])
+        return output
     
     def generate_summary_string(self, data: DirectoryAnalysis):
         output = ""
         output += f"- Total files: {len(data.get_all_non_ignored_files())}\n"
         output += f"- Total directories: {data.get_non_ignored_dir_count()}\n"
         output += f"- Total text file size (including ignored): {data.size / 1024:.2f} KB\n"
-        output += f"- Total tokens: {data.get_total_tokens()}\n"
-        output += f"- Analyzed text content size: {data.get_non_ignored_text_content_size() / 1024:.2f} KB\n\n"
-        output += f"Top largest non-ignored files:\n{self.generate_top_files_string(data.get_largest_files())}\n"
-        output += f"Top largest non-ignored directories:\n{self.generate_top_directories_string(data.get_largest_directories())}\n"       
+        if self.count_tokens:
+            total_tokens = data.get_total_tokens_multi(self.tokenizers)
+            output += f"- Total tokens: {total_tokens[self.tokenizers[0]]}\n"
+            for tokenizer in self.tokenizers[1:]:
+                output += f"- Total tokens ({tokenizer}): {total_tokens[tokenizer]}\n"
+        output += f"- Analyzed text content size: {data.get_non_ignored_text_content_size() / 1024:.2f} KB\n"
+        if self.content_mode == CONTENT_OUTLINE:
+            output += "- File contents: outlines (signatures, class outlines and docstrings) where the language is supported\n"
+        output += "\n"
+        largest_files, largest_directories = data.get_largest_entries(rank_by=self.rank_by, tokenizer=self.tokenizers[0])
+        output += f"Top largest non-ignored files:\n{self.generate_top_files_string(largest_files)}\n"
+        output += f"Top largest non-ignored directories:\n{self.generate_top_directories_string(largest_directories)}\n"       
+        oversize_files = data.get_all_oversize_files()
+        if oversize_files:
+            output += f"Oversize files, not read in full:\n{self.generate_oversize_files_string(oversize_files)}\n"
+        generated_files = data.get_all_generated_files()
+        if generated_files:
+            output += f"Generated files, excluded or collapsed:\n{self.generate_generated_files_string(generated_files)}\n"
 
         return output
     
     def generate_ignored_files_summary(self, data: DirectoryAnalysis, ignore_patterns: set):
         output = "During the analysis, some files were ignored:\n"
         output += f"- No of files ignored during parsing: {len(data.get_all_ignored_files())}\n"
+        if self.reproducible:
+            ignore_patterns = "{" + ", ".join(repr(pattern) for pattern in sorted(ignore_patterns)) + "}"
         output += f"- Patterns used to ignore files: {ignore_patterns}\n"
         return output
 
@@ -97,24 +293,49 @@ class OutputFormatterBase:
 
         output = ""
         for file in files:
-             output += f"{prefix}- {file.get_full_path()} ({file.size / 1024:.2f} kB)\n"
+            if self.rank_by == RANK_BY_TOKENS:
+                output += f"{prefix}- {file.get_full_path()} ({file.count_tokens(self.tokenizers[0])} tokens)\n"
+            else:
+                output += f"{prefix}- {file.get_full_path()} ({file.size / 1024:.2f} kB)\n"
 
         return output
 
+    def generate_oversize_files_string(self, files: List[TextFileAnalysis], prefix=""):
+        output = ""
+        for file in files:
+            action = "skipped" if file.is_ignored else f"head/tail excerpt of {file.size / 1024:.2f} kB"
+            output += f"{prefix}- {file.get_full_path()} ({file.original_size / 1024:.2f} kB, {action})\n"
+        return output
+
+    def generate_generated_files_string(self, files: List[TextFileAnalysis], prefix=""):
+        """Lists generated files with an estimate of the tokens saved, without tokenizing their content."""
+        output = ""
+        saved_tokens = 0
+        for file in files:
+            saved = max(file.generated_size - file.size, 0) // EstimateTokenizer.CHARS_PER_TOKEN
+            saved_tokens += saved
+            action = "excluded" if file.is_ignored else "collapsed"
+            output += f"{prefix}- {file.get_full_path()} ({file.generated_reason}, {action}, ~{saved} tokens saved)\n"
+        output += f"{prefix}- Estimated tokens saved: ~{saved_tokens}\n"
+        return output
+
     def generate_top_directories_string(self, directories: List[DirectoryAnalysis], prefix=""):
         if not directories:
            return f"{prefix}No large directories found.\n"
 
         output = ""
         for directory in directories:
-            output += f"{prefix}- {directory.get_full_path()} ({directory.size / 1024:.2f} kB)\n"
+            if self.rank_by == RANK_BY_TOKENS:
+                output += f"{prefix}- {directory.get_full_path()} ({directory.get_total_tokens(self.tokenizers[0])} tokens)\n"
+            else:
+                output += f"{prefix}- {directory.get_full_path()} ({directory.size / 1024:.2f} kB)\n"
         return output
     
 class PlainTextOutputFormatter(OutputFormatterBase):
     def output_file_extension(self):
         return ".txt"
     
-    def format(self, data: DirectoryAnalysis, ignore_patterns: set) -> str:
+    def format_header(self, data: DirectoryAnalysis, ignore_patterns: set, graph: DependencyGraph = None) -> str:
         output = f"Parsed codebase for the project: {data.name}\n\n"
         output += "\nDirectory Structure:\n"
         output += self.generate_tree_string_for_LLM(data)
@@ -123,20 +344,24 @@ class PlainTextOutputFormatter(OutputFormatterBase):
         output += self.generate_summary_string(data)
         output += "Ignore summary:\n"
         output += self.generate_ignored_files_summary(data, ignore_patterns)
+        if graph is not None:
+            output += "Dependency graph:\n"
+            output += self.generate_dependency_graph_string(graph, data.name)
+            output += "\n"
         output += "Files:\n\n"
-        for file in self.generate_content_string(data):
-            output += f"File: {file['path']}\n"
-            output += f"---\n"
-            output += f"Content:\n"
-            output += file['content']
-            output += "\n\n"
         return output
 
+    def format_file_prefix(self, path: str) -> str:
+        return f"File: {path}\n---\nContent:\n"
+
+    def format_file_suffix(self, path: str) -> str:
+        return "\n\n"
+
 class MarkdownOutputFormatter(OutputFormatterBase):
     def output_file_extension(self):
         return ".md"
     
-    def format(self, data: DirectoryAnalysis, ignore_patterns: set) -> str:
+    def format_header(self, data: DirectoryAnalysis, ignore_patterns: set, graph: DependencyGraph = None) -> str:
         output = f"# Parsed codebase for the project: {data.name}\n\n"
         output += "\n## Directory Structure\n"
         output += self.generate_tree_string_for_LLM(data)
@@ -144,7 +369,14 @@ class MarkdownOutputFormatter(OutputFormatterBase):
         output += self.generate_summary_string(data)
         output += "\n## Ignore summary:\n"
         output += self.generate_ignored_files_summary(data, ignore_patterns)
+        if graph is not None:
+            output += "\n## Dependency graph\n"
+            output += self.generate_dependency_graph_string(graph, data.name)
         output += "\n## Files:\n"
-        for file in self.generate_content_string(data):
-            output += f"### {file['path']}\n\n```\n{file['content']}\n```\n\n"
-        return output
\ No newline at end of file
+        return output
+
+    def format_file_prefix(self, path: str) -> str:
+        return f"### {path}\n\n```\n"
+
+    def format_file_suffix(self, path: str) -> str:
+        return "\n```\n\n"
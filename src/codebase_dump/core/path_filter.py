@@ -0,0 +1,97 @@
+import fnmatch
+import os
+import re
+from typing import Iterable, List
+
+
+class PathFilter:
+    """Selects the part of a codebase to dump with glob patterns relative to the analyzed root.
+
+    Patterns use '/' as separator. `*` and `?` match within a single path segment and `**` matches
+    any number of segments, e.g. `src/payments/**` or `**/*.toml`. A pattern naming a directory
+    selects its whole subtree, so `--include src/payments --include docs` dumps two subtrees.
+
+    The walker asks `could_contain_matches` before entering a directory, so directories which cannot
+    hold any selected file are never listed.
+    """
+
+    def __init__(self, include_patterns: Iterable[str]):
+        self.include_patterns: List[str] = [self._normalize(pattern) for pattern in include_patterns if pattern.strip()]
+        self._pattern_segments = [pattern.split("/") for pattern in self.include_patterns]
+        self._regexes = [self._compile(pattern) for pattern in self.include_patterns]
+
+    @staticmethod
+    def _normalize(pattern: str) -> str:
+        pattern = pattern.strip().replace(os.sep, "/")
+        while pattern.startswith("./"):
+            pattern = pattern[2:]
+        return pattern.strip("/")
+
+    @staticmethod
+    def _compile(pattern: str):
+        """Translates a pattern into a regex matching the selected files and everything below them."""
+        regex = ""
+        for segment in pattern.split("/"):
+            if segment == "**":
+                regex += "(?:[^/]+/)*"
+            else:
+                regex += PathFilter._translate_segment(segment) + "/"
+        if pattern.split("/")[-1] == "**":
+            regex += "[^/]+"
+        else:
+            regex = regex[:-1] + "(?:/.*)?"
+        return re.compile(regex)
+
+    @staticmethod
+    def _translate_segment(segment: str) -> str:
+        regex = ""
+        i = 0
+        while i < len(segment):
+            char = segment[i]
+            end = segment.find("]", i + 2) if char == "[" else -1
+            if char == "*":
+                regex += "[^/]*"
+            elif char == "?":
+                regex += "[^/]"
+            elif end != -1:
+                characters = segment[i + 1:end]
+                if characters.startswith("!"):
+                    characters = "^" + characters[1:]
+                regex += "[" + characters.replace("\\", "\\\\") + "]"
+                i = end
+            else:
+                regex += re.escape(char)
+            i += 1
+        return regex
+
+    @staticmethod
+    def relative_path(item_path, base_path) -> str:
+        return os.path.relpath(item_path, base_path).replace(os.sep, "/")
+
+    def matches(self, relative_path: str) -> bool:
+        """Tells whether a file, given by its path relative to the root, is selected."""
+        return any(regex.fullmatch(relative_path) for regex in self._regexes)
+
+    def matches_name_only(self, relative_path: str) -> bool:
+        """Tells whether a file not selected by `matches` is still listed in the tree, without its content."""
+        return False
+
+    def could_contain_matches(self, relative_dir: str) -> bool:
+        """Tells whether files below a directory, given relative to the root, can be selected."""
+        if relative_dir in ("", "."):
+            return bool(self.include_patterns)
+
+        dir_segments = relative_dir.split("/")
+        return any(self._prefix_could_match(dir_segments, pattern_segments) for pattern_segments in self._pattern_segments)
+
+    @staticmethod
+    def _prefix_could_match(dir_segments: List[str], pattern_segments: List[str]) -> bool:
+        for i, dir_segment in enumerate(dir_segments):
+            if i == len(pattern_segments):
+                # The pattern selected an ancestor directory, so its whole subtree is selected.
+                return True
+            if pattern_segments[i] == "**":
+                return True
+            if not fnmatch.fnmatchcase(dir_segment, pattern_segments[i]):
+                return False
+        return True
@@ -0,0 +1,180 @@
+import contextlib
+import os
+import queue
+import threading
+from concurrent.futures import Executor, FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import BinaryIO, List, Set
+
+from codebase_dump.core.codebase_analysis import CodebaseAnalysis
+from codebase_dump.core.ignore_patterns_manager import IgnorePatternManager
+from codebase_dump.core.models import DirectoryAnalysis, RANK_BY_SIZE
+from codebase_dump.core.tokenizers import DEFAULT_TOKENIZER, normalize_tokenizer_names
+
+
+class PipelinedCodebaseAnalysis(CodebaseAnalysis):
+    """Analyzes a directory with the walk, file reads and tokenization running concurrently.
+
+    The walker reserves a slot in its parent's children for every file and submits the file to
+    a pool of workers, which read, classify and tokenize it. At most `max_pending` files are in
+    flight: the walker waits for one of them to complete before submitting more, so a slow stage
+    applies backpressure to the walker and completed futures are released as the walk goes. Children keep the walk order,
+    so the result is the same as the one of `CodebaseAnalysis.analyze_directory`.
+    """
+
+    def __init__(self, workers=None, max_pending=256, tokenizers: List[str] = None, executor: Executor = None,
+                 count_tokens=True, **kwargs):
+        """Pass `executor` to share one worker pool between several analyses.
+
+        With `high_latency_io`, files are read by `io_workers` threads by default, since reads mostly wait on the network.
+        """
+        super().__init__(**kwargs)
+        self.count_tokens = count_tokens
+        self.workers = workers or (self.io_workers if self.high_latency_io else min(32, (os.cpu_count() or 1) + 4))
+        self.executor = executor
+        self.max_pending = max_pending
+        self.tokenizers = normalize_tokenizer_names(tokenizers)
+
+    def analyze_directory(self,
+                          path,
+                          ignore_patterns_manager: IgnorePatternManager,
+                          base_path,
+                          parent=None,
+                          ignore_top_files=0,
+                          rank_by=RANK_BY_SIZE,
+                          tokenizer=DEFAULT_TOKENIZER) -> DirectoryAnalysis:
+        if path == ".":
+            path = os.getcwd()
+
+        in_flight: Set[Future] = set()
+        if self.executor is not None:
+            executor_context = contextlib.nullcontext(self.executor)
+        else:
+            executor_context = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="codebase-dump")
+        with executor_context as executor:
+            result = self._walk(path, ignore_patterns_manager, base_path, parent, executor, in_flight)
+            for future in in_flight:
+                future.result()
+        self._remove_empty_slots(result)
+        self._prune_unselected_directories(result)
+
+        if parent is None and ignore_top_files > 0:
+            self._ignore_largest_files(result.get_largest_files(ignore_top_files, rank_by, tokenizer))
+        return result
+
+    def _walk(self, path, ignore_patterns_manager, base_path, parent, executor, in_flight: Set[Future]) -> DirectoryAnalysis:
+        result = DirectoryAnalysis(name=os.path.basename(path), is_ignored=ignore_patterns_manager.should_ignore(path, is_dir=True), parent=parent)
+        directories = {path: result}
+
+        for record in self._iter_entries(path, ignore_patterns_manager, base_path):
+            directory = directories[record.directory]
+            if record.is_dir:
+                node = DirectoryAnalysis(name=os.path.basename(record.full_path), is_ignored=record.is_ignored, parent=directory)
+                directories[record.full_path] = node
+                directory.children.append(node)
+            else:
+                directory.children.append(None)
+                if len(in_flight) >= self.max_pending:
+                    self._wait_for_slot(in_flight)
+                in_flight.add(executor.submit(self._analyze_file_into_slot, record, directory, len(directory.children) - 1))
+
+        return result
+
+    @staticmethod
+    def _wait_for_slot(in_flight: Set[Future]):
+        """Waits until at least one file in flight is done, and drops the done ones, raising their errors."""
+        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        in_flight.difference_update(done)
+        for future in done:
+            future.result()
+
+    def _analyze_file_into_slot(self, record, parent, slot):
+        try:
+            node = record.to_node(parent)
+        except FileNotFoundError:
+            self._report_missing_file(record.full_path)
+            node = None
+
+        if self.count_tokens and node is not None and not node.is_ignored and not node.name_only:
+            node.count_tokens_multi(self.tokenizers)
+        parent.children[slot] = node
+
+
+class QueueStream:
+    """Write-only binary stream which hands written chunks to a consumer thread through a bounded queue.
+
+    Iterating over the stream yields the chunks until it is closed. A full queue blocks the writer,
+    so a slow consumer applies backpressure instead of buffering the whole output.
+    """
+
+    MAX_CHUNK_SIZE = 1024 * 1024
+    _END = object()
+
+    def __init__(self, max_chunks=64):
+        self._queue = queue.Queue(maxsize=max_chunks)
+        self._error = None
+        self._finished = False
+
+    def write(self, data) -> int:
+        view = memoryview(data)
+        for offset in range(0, len(view), self.MAX_CHUNK_SIZE):
+            self._queue.put(bytes(view[offset:offset + self.MAX_CHUNK_SIZE]))
+        return len(view)
+
+    def close(self, error: BaseException = None):
+        """Ends the stream. With an error, the consumer gets it raised instead of a complete stream."""
+        self._error = error
+        self._queue.put(self._END)
+
+    def __iter__(self):
+        while not self._finished:
+            chunk = self._queue.get()
+            if chunk is self._END:
+                self._finished = True
+                if self._error is not None:
+                    raise self._error
+                return
+            yield chunk
+
+
+class TeeStream:
+    """Write-only binary stream which writes the same data into several streams."""
+
+    def __init__(self, *streams: BinaryIO):
+        self.streams = streams
+
+    def write(self, data) -> int:
+        for stream in self.streams:
+            stream.write(data)
+        return len(data)
+
+
+class BackgroundUpload:
+    """Runs `AuditApiUploader.upload_audit_chunks` in a thread, fed by a `QueueStream`."""
+
+    def __init__(self, uploader, max_chunks=64):
+        self.uploader = uploader
+        self.stream = QueueStream(max_chunks)
+        self.error = None
+        self._thread = threading.Thread(target=self._run, name="codebase-dump-upload", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            self.uploader.upload_audit_chunks(self.stream)
+        except BaseException as e:
+            self.error = e
+            # Keep draining, so the writer never blocks on a queue nobody reads anymore.
+            try:
+                for _ in self.stream:
+                    pass
+            except BaseException:
+                pass
+
+    def finish(self, error: BaseException = None):
+        """Closes the stream and waits for the upload. Returns the upload error, if any."""
+        self.stream.close(error)
+        self._thread.join()
+        return self.error
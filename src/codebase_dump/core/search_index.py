@@ -0,0 +1,219 @@
+import hashlib
+import os
+import sqlite3
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, Iterator, List, Optional, Set, Tuple
+
+from codebase_dump.core.models import DirectoryAnalysis, NodeAnalysis, TextFileAnalysis
+
+SEARCH_INDEX_SUFFIX = ".search.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    digest TEXT NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS metadata (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+@dataclass
+class SearchResult:
+    path: str
+    score: float
+    snippet: str
+
+
+@dataclass
+class SearchIndexUpdate:
+    added: int = 0
+    updated: int = 0
+    removed: int = 0
+    unchanged: int = 0
+
+
+def _content_digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class SearchIndexStream:
+    """Write-only binary stream which passes a file section's content through, and keeps it for the search index."""
+
+    def __init__(self, stream: BinaryIO):
+        self.stream = stream
+        self.chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self.stream.write(data)
+        # Copied, as the data may be a view of a memory-mapped file
+        self.chunks.append(bytes(data))
+        return len(data)
+
+
+class SearchIndex:
+    """Full-text index over the dumped files, stored in an SQLite FTS5 database.
+
+    Files are indexed with the trigram tokenizer when SQLite supports it (3.34+), so any substring of
+    three or more characters can be searched, and with the unicode61 word tokenizer otherwise.
+    Every file is stored with a digest of its content, so updating the index on the next run only
+    rewrites the files which changed.
+
+    Files are indexed by `OutputFormatterBase.write` as their sections are written (see `wrap` and
+    `add_file`), under the same root-prefixed paths as in the dump, and `finish_update` then removes
+    the files which are gone. `update` indexes a tree without writing a dump.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(_SCHEMA)
+        self.tokenizer = self._get_metadata("tokenizer")
+        if self.tokenizer is None:
+            self.tokenizer = self._create_content_table()
+        self._indexed: Optional[Dict[str, Tuple[int, str]]] = None
+        self._seen: Set[str] = set()
+        self._stats = SearchIndexUpdate()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    @staticmethod
+    def get_index_path(dump_path) -> str:
+        return dump_path + SEARCH_INDEX_SUFFIX
+
+    def _get_metadata(self, key):
+        row = self.connection.execute("SELECT value FROM metadata WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _create_content_table(self) -> str:
+        for tokenizer in ["trigram", "unicode61"]:
+            try:
+                self.connection.execute(f"CREATE VIRTUAL TABLE content USING fts5(body, tokenize='{tokenizer}')")
+            except sqlite3.OperationalError as e:
+                if "no such module" in str(e):
+                    raise ValueError("The search index needs SQLite with the FTS5 extension") from e
+                continue
+            self.connection.execute("INSERT INTO metadata (key, value) VALUES ('tokenizer', ?)", (tokenizer,))
+            self.connection.commit()
+            return tokenizer
+        raise ValueError("The search index needs SQLite with the FTS5 extension")
+
+    @staticmethod
+    def iter_files(data: DirectoryAnalysis) -> Iterator[Tuple[str, TextFileAnalysis]]:
+        """Yields (path prefixed with the root name, node) for every file node in the tree."""
+        def visit(node: NodeAnalysis, path):
+            for child in node.children:
+                child_path = os.path.join(path, child.name)
+                if isinstance(child, DirectoryAnalysis):
+                    yield from visit(child, child_path)
+                else:
+                    yield child_path, child
+        yield from visit(data, data.name)
+
+    def wrap(self, stream: BinaryIO) -> SearchIndexStream:
+        """Returns a stream keeping the content of a file section written into `stream`, to pass to `add_file`."""
+        return SearchIndexStream(stream)
+
+    def add_file(self, path, size, content: SearchIndexStream):
+        """Indexes the content of a written file section, unless it is unchanged since the last update."""
+        data = b"".join(content.chunks)
+        self._add_file(path, size, _content_digest(data), lambda: data.decode("utf-8", errors="replace"))
+
+    def _get_indexed(self) -> Dict[str, Tuple[int, str]]:
+        """Returns the (id, digest) of every indexed file by path, read once per update."""
+        if self._indexed is None:
+            self._indexed = {path: (file_id, digest) for file_id, path, digest in
+                             self.connection.execute("SELECT id, path, digest FROM files")}
+        return self._indexed
+
+    def _add_file(self, path, size, digest, get_body):
+        self._seen.add(path)
+        existing = self._get_indexed().get(path)
+        if existing is not None and existing[1] == digest:
+            self._stats.unchanged += 1
+            return
+        if existing is None:
+            file_id = self.connection.execute("INSERT INTO files (path, digest, size) VALUES (?, ?, ?)",
+                                              (path, digest, size)).lastrowid
+            self._stats.added += 1
+        else:
+            file_id = existing[0]
+            self.connection.execute("UPDATE files SET digest = ?, size = ? WHERE id = ?", (digest, size, file_id))
+            self.connection.execute("DELETE FROM content WHERE rowid = ?", (file_id,))
+            self._stats.updated += 1
+        self.connection.execute("INSERT INTO content (rowid, body) VALUES (?, ?)", (file_id, get_body()))
+
+    def finish_update(self, data: DirectoryAnalysis, remove_missing=True) -> SearchIndexUpdate:
+        """Completes an update once every written file was added, and commits it.
+
+        Ignored and non-text files are removed from the index. Files missing from the tree are removed
+        too, unless `remove_missing` is False (for partial dumps, which only see some of the files).
+        Only node flags are read from the tree, never file contents.
+        """
+        excluded = set()
+        for path, node in self.iter_files(data):
+            if node.name_only:
+                self._seen.add(path)
+            elif node.is_ignored or node.file_content == "[Non-text file]":
+                excluded.add(path)
+
+        stats = self._stats
+        with self.connection:
+            for path, (file_id, _) in self._get_indexed().items():
+                if path in self._seen or (not remove_missing and path not in excluded):
+                    continue
+                self.connection.execute("DELETE FROM content WHERE rowid = ?", (file_id,))
+                self.connection.execute("DELETE FROM files WHERE id = ?", (file_id,))
+                stats.removed += 1
+        self._indexed, self._seen, self._stats = None, set(), SearchIndexUpdate()
+        return stats
+
+    def update(self, data: DirectoryAnalysis, remove_missing=True) -> SearchIndexUpdate:
+        """Brings the index up to date with the analysis tree, rewriting only files whose content changed.
+
+        Unlike indexing while the dump is written, every file content is read from the tree.
+        """
+        for path, node in self.iter_files(data):
+            if node.name_only or node.is_ignored or node.file_content == "[Non-text file]":
+                continue
+            content = node.get_content()
+            self._add_file(path, node.size, _content_digest(content.encode("utf-8", errors="replace")), lambda: content)
+        return self.finish_update(data, remove_missing)
+
+    def to_match_expression(self, query: str) -> str:
+        """Turns a plain query into an FTS5 expression matching files which contain every term."""
+        terms = query.split()
+        return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+    def search(self, query: str, limit=20, raw=False) -> List[SearchResult]:
+        """Returns the files matching `query`, best first (by FTS5 bm25).
+
+        The query is a list of terms which must all appear in a file, or, with `raw`, an FTS5 query expression.
+        """
+        expression = query if raw else self.to_match_expression(query)
+        if not expression:
+            return []
+        snippet_tokens = 64 if self.tokenizer == "trigram" else 12  # trigram tokens are single characters in snippets
+        try:
+            rows = self.connection.execute(
+                "SELECT files.path, bm25(content), snippet(content, 0, '[', ']', '...', ?) "
+                "FROM content JOIN files ON files.id = content.rowid "
+                "WHERE content MATCH ? ORDER BY bm25(content), files.path LIMIT ?",
+                (snippet_tokens, expression, limit)).fetchall()
+        except sqlite3.OperationalError as e:
+            raise ValueError(f"Invalid search query: {e}") from e
+        return [SearchResult(path=path, score=-score, snippet=" ".join(snippet.split())) for path, score, snippet in rows]
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM files").fetchone()[0]
@@ -0,0 +1,324 @@
+import codecs
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from dataclasses import dataclass, field
+from typing import BinaryIO, Dict, Iterable, List, Optional, Set
+
+from codebase_dump.core.models import DirectoryAnalysis, NodeAnalysis, TextFileAnalysis
+
+MAGIC = b"CDSNAP\0\0"
+VERSION = 1
+
+# magic, version, flags, node count, tokenizer count, content offset, columns offset, strings offset
+_HEADER = struct.Struct("<8sIIIIQQQ")
+
+_FLAG_HAS_CONTENT = 1
+
+CONTENT_NOT_STORED = "[Content not stored in snapshot]"
+
+_NODE_IGNORED = 1
+_NODE_NAME_ONLY = 2
+_NODE_NON_TEXT = 4
+
+_KIND_DIRECTORY = 0
+_KIND_FILE = 1
+
+# Column name and array typecode, in file order. Every column holds one value per node,
+# except "tokens", which holds one value per node and tokenizer (tokenizer-major).
+_COLUMNS = [
+    ("parent", "q"),
+    ("kind", "B"),
+    ("flags", "B"),
+    ("name", "Q"),
+    ("size", "Q"),
+    ("original_size", "q"),
+    ("generated_reason", "q"),
+    ("generated_size", "Q"),
+    ("content_offset", "Q"),
+    ("content_length", "Q"),
+    ("tokens", "q"),
+]
+
+
+@dataclass
+class SnapshotTextFileAnalysis(TextFileAnalysis):
+    """File loaded from a snapshot. Its stored content stays in the memory-mapped snapshot file.
+
+    Token counts stored in the snapshot are preloaded, so the content is never tokenized again.
+    Files of a snapshot saved without content (`content_stored` unset) are rendered with a placeholder.
+    """
+    byte_size: int = 0
+    content_bytes: Optional[memoryview] = field(default=None, repr=False, compare=False)
+    content_stored: bool = True
+
+    @property
+    def size(self) -> int:
+        return self.byte_size
+
+    def has_content(self) -> bool:
+        return self.byte_size > 0 and self.content_stored
+
+    def get_content(self) -> str:
+        if self.content_bytes is not None:
+            return str(self.content_bytes, "utf-8", errors="replace")
+        if not self.content_stored and self.byte_size > 0 and not self.file_content:
+            return CONTENT_NOT_STORED
+        return self.file_content
+
+    def get_content_head(self, size) -> str:
+        if self.content_bytes is not None:
+            return codecs.getincrementaldecoder("utf-8")(errors="replace").decode(self.content_bytes[:size])
+        return super().get_content_head(size)
+
+    def write_content(self, stream: BinaryIO):
+        if self.content_bytes is None:
+            stream.write(self.get_content().encode("utf-8", errors="replace"))
+        else:
+            stream.write(self.content_bytes)
+
+
+@dataclass
+class SnapshotDirectoryAnalysis(DirectoryAnalysis):
+    """Directory loaded from a snapshot, with its size and token totals precomputed when it was saved."""
+    stored_size: int = 0
+    stored_tokens: Dict[str, int] = field(default_factory=dict, repr=False, compare=False)
+
+    @property
+    def size(self) -> int:
+        return self.stored_size
+
+    def get_total_tokens_multi(self, tokenizers: Iterable[str]) -> Dict[str, int]:
+        tokenizers = list(tokenizers)
+        if all(name in self.stored_tokens for name in tokenizers):
+            return {name: self.stored_tokens[name] for name in tokenizers}
+        return super().get_total_tokens_multi(tokenizers)
+
+
+@dataclass
+class Snapshot:
+    data: DirectoryAnalysis
+    tokenizers: List[str]
+    ignore_patterns: Set[str]
+    has_content: bool = True  # False for snapshots saved without file contents
+
+
+class _StringTable:
+    def __init__(self):
+        self.strings: List[str] = []
+        self._indexes: Dict[str, int] = {}
+
+    def add(self, value: str) -> int:
+        index = self._indexes.get(value)
+        if index is None:
+            index = len(self.strings)
+            self.strings.append(value)
+            self._indexes[value] = index
+        return index
+
+
+def _to_little_endian(values: array) -> array:
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+def _write_aligned(stream: BinaryIO, data: bytes):
+    stream.write(data)
+    padding = -len(data) % 8
+    if padding:
+        stream.write(b"\0" * padding)
+
+
+def save_snapshot(data: DirectoryAnalysis,
+                  path,
+                  tokenizers: Iterable[str] = (),
+                  ignore_patterns: Iterable[str] = (),
+                  include_content=True):
+    """Saves the analysis tree into a compact columnar binary file.
+
+    Nodes are stored in pre-order as columns (parent index, kind, flags, name, sizes, token counts per
+    tokenizer, ...), names in a deduplicated string table and, with `include_content`, file contents as
+    UTF-8 blobs. Directory sizes and token totals are stored precomputed.
+    """
+    tokenizers = list(tokenizers)
+    strings = _StringTable()
+    metadata = {"tokenizers": tokenizers, "ignore_patterns": sorted(ignore_patterns)}
+    strings.add(json.dumps(metadata))
+    columns = {name: array(typecode) for name, typecode in _COLUMNS}
+    node_tokens: List[List[int]] = []
+
+    with open(path, "wb") as f:
+        f.write(b"\0" * _HEADER.size)
+        content_offset = f.tell()
+
+        def add_node(node: NodeAnalysis, parent_index: int):
+            index = len(columns["parent"])
+            is_file = isinstance(node, TextFileAnalysis)
+            flags = _NODE_IGNORED if node.is_ignored else 0
+            if is_file and node.name_only:
+                flags |= _NODE_NAME_ONLY
+            if is_file and node.file_content == "[Non-text file]":
+                flags |= _NODE_NON_TEXT
+            columns["parent"].append(parent_index)
+            columns["flags"].append(flags)
+            columns["kind"].append(_KIND_FILE if is_file else _KIND_DIRECTORY)
+            columns["name"].append(strings.add(node.name))
+            columns["size"].append(node.size)
+            columns["content_offset"].append(0)
+            columns["content_length"].append(0)
+
+            if is_file:
+                columns["original_size"].append(node.original_size if node.original_size is not None else -1)
+                columns["generated_reason"].append(strings.add(node.generated_reason) if node.generated_reason else -1)
+                columns["generated_size"].append(node.generated_size)
+                counts = node.count_tokens_multi(tokenizers) if tokenizers and not node.name_only else {}
+                node_tokens.append([counts.get(name, -1) for name in tokenizers])
+                if include_content and node.has_content() and not flags & (_NODE_NAME_ONLY | _NODE_NON_TEXT):
+                    start = f.tell()
+                    node.write_content(f)
+                    columns["content_offset"][index] = start - content_offset
+                    columns["content_length"][index] = f.tell() - start
+            else:
+                columns["original_size"].append(-1)
+                columns["generated_reason"].append(-1)
+                columns["generated_size"].append(0)
+                totals = node.get_total_tokens_multi(tokenizers) if tokenizers else {}
+                node_tokens.append([totals[name] for name in tokenizers])
+                for child in node.children:
+                    add_node(child, index)
+
+        add_node(data, -1)
+
+        for i in range(len(tokenizers)):
+            columns["tokens"].extend(tokens[i] for tokens in node_tokens)
+
+        padding = -(f.tell() - content_offset) % 8
+        f.write(b"\0" * padding)
+        columns_offset = f.tell()
+        for name, _ in _COLUMNS:
+            _write_aligned(f, _to_little_endian(columns[name]).tobytes())
+
+        strings_offset = f.tell()
+        encoded = [value.encode("utf-8", errors="surrogatepass") for value in strings.strings]
+        offsets = array("Q", [0])
+        for value in encoded:
+            offsets.append(offsets[-1] + len(value))
+        f.write(struct.pack("<Q", len(encoded)))
+        f.write(_to_little_endian(offsets).tobytes())
+        f.write(b"".join(encoded))
+
+        f.seek(0)
+        f.write(_HEADER.pack(MAGIC, VERSION, _FLAG_HAS_CONTENT if include_content else 0, len(columns["parent"]),
+                             len(tokenizers), content_offset, columns_offset, strings_offset))
+
+
+def _read_column(buffer, offset, typecode, count):
+    size = array(typecode).itemsize * count
+    view = memoryview(buffer)[offset:offset + size]
+    if sys.byteorder == "little":
+        return view.cast(typecode), offset + size + (-size % 8)
+    values = array(typecode, view.tobytes())
+    values.byteswap()
+    return values, offset + size + (-size % 8)
+
+
+def _columns_size(node_count, tokenizer_count) -> int:
+    """Returns the size of the stored columns, each padded to 8 bytes."""
+    size = 0
+    for name, typecode in _COLUMNS:
+        column_size = array(typecode).itemsize * (node_count * tokenizer_count if name == "tokens" else node_count)
+        size += column_size + (-column_size % 8)
+    return size
+
+
+def load_snapshot(path) -> Snapshot:
+    """Loads a snapshot saved by `save_snapshot`, memory-mapping the file.
+
+    Columns are read in place from the mapping and stored contents are only decoded when a
+    formatter asks for them, so loading takes time proportional to the number of nodes only.
+    Raises ValueError if the file is not a snapshot, has another version or is truncated.
+    """
+    with open(path, "rb") as f:
+        header = f.read(_HEADER.size)
+        if not header.startswith(MAGIC):
+            raise ValueError(f"Not a codebase-dump snapshot: {path}")
+        if len(header) < _HEADER.size:
+            raise ValueError(f"Truncated snapshot, the header is incomplete: {path}")
+        magic, version, flags, node_count, tokenizer_count, content_offset, columns_offset, strings_offset = \
+            _HEADER.unpack(header)
+        if version != VERSION:
+            raise ValueError(f"Unsupported snapshot version {version}: {path}")
+        file_size = os.fstat(f.fileno()).st_size
+        columns_end = columns_offset + _columns_size(node_count, tokenizer_count)
+        if not (content_offset == _HEADER.size <= columns_offset and columns_end <= strings_offset
+                and strings_offset + 8 <= file_size):
+            raise ValueError(f"Truncated snapshot, {file_size} bytes do not hold the stored columns: {path}")
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    columns = {}
+    offset = columns_offset
+    for name, typecode in _COLUMNS:
+        count = node_count * tokenizer_count if name == "tokens" else node_count
+        columns[name], offset = _read_column(buffer, offset, typecode, count)
+
+    (string_count,) = struct.unpack_from("<Q", buffer, strings_offset)
+    strings_start = strings_offset + 8 + 8 * (string_count + 1)
+    if strings_start > file_size:
+        raise ValueError(f"Truncated snapshot, the string table is incomplete: {path}")
+    string_offsets, _ = _read_column(buffer, strings_offset + 8, "Q", string_count + 1)
+    if string_count == 0 or strings_start + string_offsets[-1] > file_size:
+        raise ValueError(f"Truncated snapshot, the string table is incomplete: {path}")
+
+    def get_string(index) -> str:
+        start = strings_start + string_offsets[index]
+        return str(buffer[start:strings_start + string_offsets[index + 1]], "utf-8", errors="surrogatepass")
+
+    metadata = json.loads(get_string(0))
+    tokenizers = metadata["tokenizers"]
+    tokens = columns["tokens"]
+    has_content = bool(flags & _FLAG_HAS_CONTENT)
+    contents = memoryview(buffer)
+
+    nodes: List[NodeAnalysis] = []
+    for i in range(node_count):
+        parent_index = columns["parent"][i]
+        parent = nodes[parent_index] if parent_index >= 0 else None
+        node_flags = columns["flags"][i]
+        counts = {name: tokens[t * node_count + i] for t, name in enumerate(tokenizers) if tokens[t * node_count + i] >= 0}
+
+        if columns["kind"][i] == _KIND_FILE:
+            content_bytes = None
+            if has_content and columns["content_length"][i]:
+                start = content_offset + columns["content_offset"][i]
+                content_bytes = contents[start:start + columns["content_length"][i]]
+            node = SnapshotTextFileAnalysis(name=get_string(columns["name"][i]),
+                                            is_ignored=bool(node_flags & _NODE_IGNORED),
+                                            parent=parent,
+                                            file_content="[Non-text file]" if node_flags & _NODE_NON_TEXT else "",
+                                            name_only=bool(node_flags & _NODE_NAME_ONLY),
+                                            byte_size=columns["size"][i],
+                                            content_bytes=None if node_flags & _NODE_NON_TEXT else content_bytes,
+                                            content_stored=has_content)
+            if columns["original_size"][i] >= 0:
+                node.original_size = columns["original_size"][i]
+            if columns["generated_reason"][i] >= 0:
+                node.generated_reason = get_string(columns["generated_reason"][i])
+                node.generated_size = columns["generated_size"][i]
+            node._token_counts = counts
+            node._token_counts_source = node.file_content
+        else:
+            node = SnapshotDirectoryAnalysis(name=get_string(columns["name"][i]),
+                                             is_ignored=bool(node_flags & _NODE_IGNORED),
+                                             parent=parent,
+                                             stored_size=columns["size"][i],
+                                             stored_tokens=counts)
+        if parent is not None:
+            parent.children.append(node)
+        nodes.append(node)
+
+    return Snapshot(data=nodes[0], tokenizers=tokenizers, ignore_patterns=set(metadata["ignore_patterns"]), has_content=has_content)
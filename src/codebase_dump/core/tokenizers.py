@@ -0,0 +1,166 @@
+import hashlib
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+
+DEFAULT_TOKENIZER = "cl100k_base"
+ESTIMATE_TOKENIZER = "estimate"
+HUGGINGFACE_PREFIX = "hf:"
+
+
+class Tokenizer:
+    """Counts tokens in a text for a single encoding."""
+    name = ""
+
+    def count(self, text: str) -> int:
+        raise NotImplementedError
+
+
+class TiktokenTokenizer(Tokenizer):
+    def __init__(self, encoding_name):
+        import tiktoken
+
+        self.name = encoding_name
+        self._encoding = tiktoken.get_encoding(encoding_name)
+
+    def count(self, text: str) -> int:
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+
+class HuggingFaceTokenizer(Tokenizer):
+    def __init__(self, tokenizer_file):
+        try:
+            from tokenizers import Tokenizer as HFTokenizer
+        except ImportError:
+            raise ValueError("HuggingFace tokenizers require the 'tokenizers' package. Install it with: pip install tokenizers")
+
+        self.name = HUGGINGFACE_PREFIX + tokenizer_file
+        self._tokenizer = HFTokenizer.from_file(tokenizer_file)
+
+    def count(self, text: str) -> int:
+        return len(self._tokenizer.encode(text, add_special_tokens=False).ids)
+
+
+class EstimateTokenizer(Tokenizer):
+    """Cheap approximation which assumes ~4 characters per token. Needs no encoder files."""
+    name = ESTIMATE_TOKENIZER
+    CHARS_PER_TOKEN = 4
+
+    def count(self, text: str) -> int:
+        return (len(text) + self.CHARS_PER_TOKEN - 1) // self.CHARS_PER_TOKEN
+
+
+_custom_factories: Dict[str, Callable[[], Tokenizer]] = {}
+_tokenizers_cache: Dict[str, Tokenizer] = {}
+_tokenizers_lock = threading.Lock()
+
+
+def register_tokenizer(name: str, factory: Callable[[], Tokenizer]):
+    """Registers a custom tokenizer backend, selectable by its name."""
+    with _tokenizers_lock:
+        _custom_factories[name] = factory
+        _tokenizers_cache.pop(name, None)
+
+
+def unregister_tokenizer(name: str):
+    """Removes a custom tokenizer backend registered with `register_tokenizer`."""
+    with _tokenizers_lock:
+        _custom_factories.pop(name, None)
+        _tokenizers_cache.pop(name, None)
+
+
+def _create_tokenizer(name: str) -> Tokenizer:
+    if name in _custom_factories:
+        return _custom_factories[name]()
+    if name == ESTIMATE_TOKENIZER:
+        return EstimateTokenizer()
+    if name.startswith(HUGGINGFACE_PREFIX):
+        return HuggingFaceTokenizer(name[len(HUGGINGFACE_PREFIX):])
+    return TiktokenTokenizer(name)
+
+
+def validate_tokenizer_name(name: str) -> str:
+    """Returns the name if it selects a known tokenizer, without loading it. Raises ValueError otherwise."""
+    if name in _custom_factories or name == ESTIMATE_TOKENIZER:
+        return name
+    if name.startswith(HUGGINGFACE_PREFIX):
+        if not name[len(HUGGINGFACE_PREFIX):]:
+            raise ValueError(f"Missing path to tokenizer.json in '{name}'")
+        return name
+    try:
+        import tiktoken
+    except ImportError:
+        raise ValueError(f"Unknown tokenizer '{name}': tiktoken encodings require the 'tiktoken' package")
+    encodings = tiktoken.list_encoding_names()
+    if name not in encodings:
+        known = ", ".join(sorted(encodings) + [ESTIMATE_TOKENIZER, HUGGINGFACE_PREFIX + "<path>"] + sorted(_custom_factories))
+        raise ValueError(f"Unknown tokenizer '{name}' (known: {known})")
+    return name
+
+
+def get_tokenizer(name: str = DEFAULT_TOKENIZER) -> Tokenizer:
+    """Returns the tokenizer for the given name. Encoders are loaded lazily, once per process."""
+    tokenizer = _tokenizers_cache.get(name)
+    if tokenizer is None:
+        with _tokenizers_lock:
+            tokenizer = _tokenizers_cache.get(name)
+            if tokenizer is None:
+                tokenizer = _create_tokenizer(name)
+                _tokenizers_cache[name] = tokenizer
+    return tokenizer
+
+
+class TokenCountCache:
+    """Token counts of already seen contents, keyed by content digest.
+
+    Shared between analyses (e.g. in batch mode), so files duplicated across repositories are tokenized once.
+    """
+
+    def __init__(self):
+        self._counts: Dict[bytes, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def count_tokens(self, text: str, tokenizer_names: Iterable[str]) -> Dict[str, int]:
+        tokenizer_names = list(tokenizer_names)
+        key = hashlib.blake2b(text.encode("utf-8", errors="surrogatepass"), digest_size=16).digest()
+        with self._lock:
+            cached = self._counts.get(key, {})
+            missing = [name for name in tokenizer_names if name not in cached]
+            if missing:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        counts = {name: get_tokenizer(name).count(text) for name in missing}
+        if counts:
+            with self._lock:
+                cached = self._counts.setdefault(key, {})
+                cached.update(counts)
+        return {name: cached[name] for name in tokenizer_names}
+
+
+_token_count_cache: Optional[TokenCountCache] = None
+
+
+def set_token_count_cache(cache: Optional[TokenCountCache]):
+    """Makes `count_tokens` reuse counts of identical contents. Pass None to disable the cache."""
+    global _token_count_cache
+    _token_count_cache = cache
+
+
+def count_tokens(text: str, tokenizer_names: Iterable[str]) -> Dict[str, int]:
+    """Counts tokens of the same text for several encodings at once."""
+    cache = _token_count_cache
+    if cache is not None:
+        return cache.count_tokens(text, tokenizer_names)
+    return {name: get_tokenizer(name).count(text) for name in tokenizer_names}
+
+
+def normalize_tokenizer_names(tokenizer_names: Iterable[str] = None) -> List[str]:
+    """Returns unique tokenizer names keeping their order, falling back to the default tokenizer."""
+    names = []
+    for name in tokenizer_names or []:
+        if name not in names:
+            names.append(name)
+    return names or [DEFAULT_TOKENIZER]
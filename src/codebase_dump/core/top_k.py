@@ -0,0 +1,33 @@
+import heapq
+import itertools
+from typing import Generic, List, TypeVar
+
+T = TypeVar("T")
+
+
+class TopK(Generic[T]):
+    """Keeps the k items with the largest keys in a bounded min-heap.
+
+    Pushing n items costs O(n log k). Among items with equal keys, the ones pushed first are kept.
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self._heap = []
+        self._counter = itertools.count()
+
+    def push(self, key, item: T):
+        if self.k <= 0:
+            return
+        entry = (key, -next(self._counter), item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def items(self) -> List[T]:
+        """Returns the kept items, largest key first."""
+        return [item for _, _, item in sorted(self._heap, key=lambda entry: entry[:2], reverse=True)]
+
+    def __len__(self):
+        return len(self._heap)
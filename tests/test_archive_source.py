@@ -0,0 +1,151 @@
+import io
+import os
+import tarfile
+import tempfile
+import unittest
+import zipfile
+from codebase_dump.core.archive_source import ArchiveAnalysis, is_archive, normalize_member_path
+from codebase_dump.core.codebase_analysis import CodebaseAnalysis, OVERSIZE_SKIP
+from codebase_dump.core.ignore_patterns_manager import IgnorePatternManager
+from codebase_dump.core.memory_budget import MemoryBudget, SpilledTextFileAnalysis
+from codebase_dump.core.output_formatter import PlainTextOutputFormatter
+from codebase_dump.core.path_filter import PathFilter
+
+
+class TestArchiveSource(unittest.TestCase):
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_dir = temp_dir.name
+        self.root = os.path.join(self.temp_dir, "project")
+        self.files = {
+            ".gitignore": "*.log\nbuild/\n",
+            "a.py": "print('a')\r\nprint('b')\n",
+            "b.log": "ignored\n",
+            "build/out.txt": "built\n",
+            "src/c.py": "import a\n",
+            "src/data.dat": b"\x89PNG\r\n\x1a\nimage",
+            "src/nested/d.txt": "d" * 100,
+            "src/e.txt": b"caf\xe9",
+        }
+        for relative_path, content in self.files.items():
+            path = os.path.join(self.root, relative_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(content if isinstance(content, bytes) else content.encode())
+
+    def create_tar(self, name="project.tar.gz", mode="w:gz", arcname="project"):
+        path = os.path.join(self.temp_dir, name)
+        with tarfile.open(path, mode) as archive:
+            for relative_path in sorted(self.files):
+                archive.add(os.path.join(self.root, relative_path), arcname=f"{arcname}/{relative_path}" if arcname else relative_path)
+        return path
+
+    def create_zip(self, name="project.zip"):
+        path = os.path.join(self.temp_dir, name)
+        with zipfile.ZipFile(path, "w") as archive:
+            for relative_path in sorted(self.files):
+                archive.write(os.path.join(self.root, relative_path), arcname=f"project/{relative_path}")
+        return path
+
+    def dump(self, data):
+        stream = io.BytesIO()
+        PlainTextOutputFormatter(count_tokens=False, reproducible=True).write(data, set(), stream)
+        return stream.getvalue()
+
+    def analyze_directory(self, **options):
+        ignore_manager = IgnorePatternManager(self.root)
+        return CodebaseAnalysis(reproducible=True, **options).analyze_directory(self.root, ignore_manager, self.root)
+
+    def test_is_archive(self):
+        self.assertTrue(is_archive(self.create_tar()))
+        self.assertTrue(is_archive(self.create_zip()))
+        self.assertFalse(is_archive(self.root))
+        self.assertFalse(is_archive(os.path.join(self.root, "a.py")))
+
+    def test_normalize_member_path(self):
+        self.assertEqual(normalize_member_path("./project/src/../a.py"), ("project", "a.py"))
+        self.assertEqual(normalize_member_path("/abs/a.py"), ("abs", "a.py"))
+        self.assertIsNone(normalize_member_path("../outside.py"))
+        self.assertIsNone(normalize_member_path("./"))
+
+    def test_same_dump_as_the_extracted_directory(self):
+        expected = self.dump(self.analyze_directory())
+        for path in [self.create_tar(), self.create_tar("project.tar", "w"), self.create_tar("project.tar.xz", "w:xz"), self.create_zip()]:
+            with self.subTest(path=os.path.basename(path)):
+                data, _ = ArchiveAnalysis(reproducible=True).analyze_archive(path)
+                self.assertEqual(data.name, "project")
+                self.assertEqual(self.dump(data), expected)
+
+    def test_ignore_files_inside_the_archive(self):
+        data, ignore_manager = ArchiveAnalysis().analyze_archive(self.create_tar())
+        self.assertIn("*.log", ignore_manager.ignore_patterns_as_str)
+        ignored = {node.get_full_path() for node in data.get_all_ignored_files() + data.get_all_ignored_directories()}
+        self.assertIn("project/b.log", ignored)
+        self.assertIn("project/build", ignored)
+        self.assertNotIn("project/a.py", ignored)
+
+    def test_binary_members(self):
+        data, _ = ArchiveAnalysis().analyze_archive(self.create_zip())
+        contents = {node.name: node.file_content for node in data.get_all_non_ignored_files()}
+        # Recognized from its PNG header, and from its content not being UTF-8
+        self.assertEqual(contents["data.dat"], "[Non-text file]")
+        self.assertEqual(contents["e.txt"], "[Non-text file]")
+        self.assertEqual(contents["a.py"], "print('a')\nprint('b')\n")
+
+        data, _ = ArchiveAnalysis(skip_binary_files=True).analyze_archive(self.create_zip())
+        self.assertNotIn("data.dat", {node.name for node in data.get_all_children()})
+
+    def test_archive_without_top_level_directory(self):
+        data, _ = ArchiveAnalysis(reproducible=True).analyze_archive(self.create_tar("sources.tgz", arcname=None))
+        self.assertEqual(data.name, "sources")
+        self.assertEqual(self.dump(data).replace(b"sources", b"project"), self.dump(self.analyze_directory()))
+
+    def test_path_filter(self):
+        options = dict(path_filter=PathFilter(["src/**"]))
+        data, _ = ArchiveAnalysis(reproducible=True, **options).analyze_archive(self.create_tar())
+        self.assertEqual(self.dump(data), self.dump(self.analyze_directory(**options)))
+        self.assertEqual({node.name for node in data.get_all_non_ignored_files()}, {"c.py", "data.dat", "d.txt", "e.txt"})
+
+    def test_oversize_members(self):
+        for options in [dict(max_file_bytes=20), dict(max_file_bytes=20, oversize_policy=OVERSIZE_SKIP)]:
+            with self.subTest(**options):
+                data, _ = ArchiveAnalysis(reproducible=True, **options).analyze_archive(self.create_zip())
+                self.assertEqual(self.dump(data), self.dump(self.analyze_directory(**options)))
+
+    def test_large_members_are_streamed_to_mapped_files(self):
+        expected = self.dump(self.analyze_directory(mmap_threshold=8))
+        for budget in [None, MemoryBudget(1024 ** 4, spill_dir=self.temp_dir)]:
+            with self.subTest(budget=budget is not None):
+                data, _ = ArchiveAnalysis(reproducible=True, mmap_threshold=8, memory_budget=budget).analyze_archive(self.create_tar())
+                nodes = {node.name: node for node in data.get_all_non_ignored_files()}
+                self.assertIsInstance(nodes["a.py"], SpilledTextFileAnalysis)
+                self.assertEqual(nodes["a.py"].get_content(), "print('a')\nprint('b')\n")
+                self.assertEqual(nodes["data.dat"].file_content, "[Non-text file]")
+                self.assertEqual(self.dump(data), expected)
+                if budget is not None:
+                    self.assertEqual(os.path.dirname(nodes["a.py"].file_path), budget._spill_dir)
+                    budget.close()
+                    self.assertFalse(os.path.exists(nodes["a.py"].file_path))
+
+    def test_unreadable_archives(self):
+        with open(self.create_tar("project.tar", "w"), "rb") as f:
+            truncated = f.read()[:600]  # Inside the content of the first member
+        with open(self.create_zip(), "rb") as f:
+            encrypted = bytearray(f.read())
+        # Marks the first member as encrypted, in its local header and in the central directory
+        encrypted[6] |= 0x1
+        encrypted[encrypted.index(b"PK\x01\x02") + 8] |= 0x1
+        for name, content in [("empty.tar", b""), ("text.tar.gz", b"not an archive\n"), ("text.zip", b"not an archive\n"),
+                              ("truncated.tar", truncated), ("encrypted.zip", encrypted)]:
+            with self.subTest(name=name):
+                path = os.path.join(self.temp_dir, name)
+                with open(path, "wb") as f:
+                    f.write(content)
+                with self.assertRaisesRegex(ValueError, "Cannot read archive"):
+                    ArchiveAnalysis().analyze_archive(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
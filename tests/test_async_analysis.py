@@ -0,0 +1,144 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from codebase_dump.core.async_analysis import AsyncCodebaseAnalysis
+from codebase_dump.core.codebase_analysis import CodebaseAnalysis
+from codebase_dump.core.ignore_patterns_manager import IgnorePatternManager
+from codebase_dump.core.path_filter import PathFilter
+
+
+class TestAsyncCodebaseAnalysis(unittest.TestCase):
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.root = os.path.join(temp_dir.name, "project")
+        for i in range(4):
+            for j in range(5):
+                path = os.path.join(self.root, f"dir{i}", f"file{j}.py")
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "w") as f:
+                    f.write(f"print({i * j})\n" * (i + j + 1))
+        with open(os.path.join(self.root, "debug.log"), "w") as f:
+            f.write("ignored")
+        self.ignore_manager = IgnorePatternManager(self.root, load_gitignore=False, load_cdigestignore=False)
+
+    def _describe(self, node):
+        description = [(node.get_full_path(), node.is_ignored, getattr(node, "file_content", None))]
+        for child in getattr(node, "children", []):
+            description.extend(self._describe(child))
+        return description
+
+    def test_same_tree_as_sync_analysis(self):
+        expected = CodebaseAnalysis().analyze_directory(self.root, self.ignore_manager, self.root)
+        analysis = AsyncCodebaseAnalysis(tokenizers=["estimate"])
+        result = asyncio.run(analysis.analyze_directory_async(self.root, self.ignore_manager))
+
+        self.assertEqual(self._describe(result), self._describe(expected))
+        self.assertEqual(result.get_total_tokens("estimate"), expected.get_total_tokens("estimate"))
+
+    def test_same_tree_as_sync_analysis_with_walk_options(self):
+        os.makedirs(os.path.join(self.root, "build"))
+        with open(os.path.join(self.root, "build", "out.py"), "w") as f:
+            f.write("built")
+        with open(os.path.join(self.root, "dir0", "build"), "w") as f:
+            f.write("a file, not matched by a directory-only pattern")
+        ignore_manager = IgnorePatternManager(self.root, load_default_ignore_patterns=False, load_gitignore=False,
+                                              load_cdigestignore=False, extra_ignore_patterns={"build/", "*.log"})
+        for options in [dict(reproducible=True), dict(high_latency_io=True, io_workers=2), dict(path_filter=PathFilter(["dir1/**", "build"]))]:
+            with self.subTest(**{name: str(value) for name, value in options.items()}):
+                expected = CodebaseAnalysis(**options).analyze_directory(self.root, ignore_manager, self.root)
+                analysis = AsyncCodebaseAnalysis(tokenizers=["estimate"], **options)
+                result = asyncio.run(analysis.analyze_directory_async(self.root, ignore_manager, max_concurrency=2))
+                self.assertEqual(self._describe(result), self._describe(expected))
+
+        ignored = {node.get_full_path(): node.is_ignored for node in result.get_all_children()}
+        self.assertTrue(ignored[os.path.join("project", "build")])
+
+    def test_files_in_flight_are_bounded(self):
+        in_flight_sizes = []
+        wait_for_slot = AsyncCodebaseAnalysis._wait_for_slot
+
+        async def record_wait(in_flight):
+            in_flight_sizes.append(len(in_flight))
+            await wait_for_slot(in_flight)
+
+        analysis = AsyncCodebaseAnalysis(tokenizers=["estimate"])
+        with patch.object(AsyncCodebaseAnalysis, "_wait_for_slot", side_effect=record_wait):
+            asyncio.run(analysis.analyze_directory_async(self.root, self.ignore_manager, max_concurrency=2))
+        self.assertTrue(in_flight_sizes)
+        self.assertTrue(all(size == 4 for size in in_flight_sizes))
+
+    def test_concurrency_limit(self):
+        lock = threading.Lock()
+        state = {"running": 0, "max_running": 0}
+        original_analyze_file = CodebaseAnalysis._analyze_file
+
+        def slow_analyze_file(analysis, *args, **kwargs):
+            with lock:
+                state["running"] += 1
+                state["max_running"] = max(state["max_running"], state["running"])
+            time.sleep(0.01)
+            with lock:
+                state["running"] -= 1
+            return original_analyze_file(analysis, *args, **kwargs)
+
+        analysis = AsyncCodebaseAnalysis(max_concurrency=8, tokenizers=["estimate"])
+        with patch.object(CodebaseAnalysis, "_analyze_file", slow_analyze_file):
+            asyncio.run(analysis.analyze_directory_async(self.root, self.ignore_manager, max_concurrency=2))
+
+        self.assertGreaterEqual(state["max_running"], 1)
+        self.assertLessEqual(state["max_running"], 2)
+
+    def test_cancellation(self):
+        started = threading.Event()
+        original_analyze_file = CodebaseAnalysis._analyze_file
+        original_iter_entries = CodebaseAnalysis._iter_entries
+        calls = []
+        walk_closed = threading.Event()
+        walks = []
+
+        def slow_analyze_file(analysis, *args, **kwargs):
+            calls.append(args[0])
+            started.set()
+            time.sleep(0.05)
+            return original_analyze_file(analysis, *args, **kwargs)
+
+        def walk(analysis, *args, **kwargs):
+            try:
+                yield from original_iter_entries(analysis, *args, **kwargs)
+            finally:
+                time.sleep(0.05)  # Closing the walk takes time, e.g. to stop its scanner threads
+                walk_closed.set()
+
+        def iter_entries(analysis, *args, **kwargs):
+            # Referenced here, so the walk is only closed by the analysis, not when it is garbage collected
+            walks.append(walk(analysis, *args, **kwargs))
+            return walks[-1]
+
+        async def cancel_analysis():
+            analysis = AsyncCodebaseAnalysis(max_concurrency=1, tokenizers=["estimate"])
+            analysis.WALK_BATCH_SIZE = 1  # So the walk is still going when the call is cancelled
+            task = asyncio.ensure_future(analysis.analyze_directory_async(self.root, self.ignore_manager))
+            while not started.is_set():
+                await asyncio.sleep(0.001)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            self.assertTrue(walk_closed.is_set())
+
+        with patch.object(CodebaseAnalysis, "_analyze_file", slow_analyze_file), \
+                patch.object(CodebaseAnalysis, "_iter_entries", iter_entries):
+            asyncio.run(cancel_analysis())
+        self.assertLess(len(calls), 21)
+
+    def test_ignore_top_files(self):
+        analysis = AsyncCodebaseAnalysis(tokenizers=["estimate"])
+        with patch("builtins.print"):
+            result = asyncio.run(analysis.analyze_directory_async(self.root, self.ignore_manager, ignore_top_files=1))
+        ignored = [file.get_full_path() for file in result.get_all_ignored_files() if not file.name.endswith(".log")]
+        self.assertEqual(ignored, [os.path.join("project", "dir3", "file4.py")])
@@ -1,8 +1,11 @@
 import unittest
 from codebase_dump.core.audit_api_uploader import AuditApiUploader
 from unittest.mock import patch, Mock, MagicMock
-from io import StringIO
-import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import tempfile
+import threading
 
 class TestAuditApiUploader(unittest.TestCase):
     def test_upload_no_audit_text(self):
@@ -13,7 +16,7 @@ class TestAuditApiUploader(unittest.TestCase):
             uploader.upload_audit(audit="")
         self.assertIn("Repo content is required", str(context.exception))
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_upload_audit_successful(self, mock_post):
         """Test uploading an audit successfully when the server responds with a 200 status code."""
         # Mock the response
@@ -34,7 +37,8 @@ class TestAuditApiUploader(unittest.TestCase):
             mock_post.assert_called_once_with(
                 expected_call_url,
                 json={"text": "Sample audit content"},
-                headers={"x-api-key": "test_key", "x-submitted-by": "codebase-dumb.v1"}
+                headers={"x-api-key": "test_key", "x-submitted-by": "codebase-dumb.v1"},
+                timeout=(10, 300)
             )
 
             # Check print calls
@@ -44,7 +48,7 @@ class TestAuditApiUploader(unittest.TestCase):
             self.assertIn("Audit info:", print_calls)
             self.assertIn({"uploaded": True, "id": "12345"}, print_calls)
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_upload_failure(self, mock_post):
         """Test a failure scenario where the server returns non-200 status."""
         # Setup mock response to fail
@@ -64,10 +68,29 @@ class TestAuditApiUploader(unittest.TestCase):
         mock_post.assert_called_once_with(
             expected_call_url,
             json={"text": "Test audit."},
-            headers={"x-api-key": "test_key", "x-submitted-by": "codebase-dumb.v1"}
+            headers={"x-api-key": "test_key", "x-submitted-by": "codebase-dumb.v1"},
+            timeout=(10, 300)
         )
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
+    def test_upload_audit_retries_server_errors(self, mock_post):
+        """Test that uploading a dump given as text is retried like a streamed upload."""
+        unavailable = Mock(status_code=503)
+        uploaded = Mock(status_code=200)
+        uploaded.json.return_value = {"uploaded": True}
+        mock_post.side_effect = [unavailable, uploaded]
+
+        uploader = AuditApiUploader(api_key=None, api_url="http://custom.example.com/", api_submitted_by="codebase-dumb.v1",
+                                    backoff_factor=0)
+        with patch("builtins.print") as mock_print:
+            uploader.upload_audit("Sample audit content")
+
+        self.assertEqual(mock_post.call_count, 2)
+        print_calls = [call[0][0] for call in mock_print.call_args_list]
+        self.assertIn("Upload failed with status 503", print_calls)
+        self.assertIn("Audit uploaded successfully", print_calls)
+
+    @patch("requests.Session.post")
     def test_upload_audit_with_custom_api_url(self, mock_post):
         """Test uploading an audit successfully with a custom API URL."""
         # Mock the response
@@ -88,10 +111,11 @@ class TestAuditApiUploader(unittest.TestCase):
             mock_post.assert_called_once_with(
                 expected_call_url,
                 json={"text": "Sample audit content"},
-                headers={"x-api-key": "test_key", "x-submitted-by": "codebase-dumb.v1"}
+                headers={"x-api-key": "test_key", "x-submitted-by": "codebase-dumb.v1"},
+                timeout=(10, 300)
             )
  
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_upload_audit_default_api_url(self, mock_post):
         """Test uploading an audit successfully with the default API URL."""
         # Mock the response
@@ -112,10 +136,11 @@ class TestAuditApiUploader(unittest.TestCase):
             mock_post.assert_called_once_with(
                 expected_call_url,
                 json={"text": "Sample audit content"},
-                headers={"x-api-key": "test_key", "x-submitted-by": "codebase-dumb.v1"}
+                headers={"x-api-key": "test_key", "x-submitted-by": "codebase-dumb.v1"},
+                timeout=(10, 300)
             )
 
-            @patch("requests.post")
+            @patch("requests.Session.post")
             def test_upload_audit_with_api_key(self, mock_post):
                 """Test uploading an audit with an API key."""
                 # Mock the response
@@ -134,10 +159,11 @@ class TestAuditApiUploader(unittest.TestCase):
                 mock_post.assert_called_once_with(
                     expected_call_url,
                     json={"text": "Sample audit content"},
-                    headers={"x-api-key": "test_key", "x-submitted-by": "codebase-dumb.v1"}
+                    headers={"x-api-key": "test_key", "x-submitted-by": "codebase-dumb.v1"},
+                    timeout=(10, 300)
                 )
 
-            @patch("requests.post")
+            @patch("requests.Session.post")
             def test_upload_audit_without_api_key(self, mock_post):
                 """Test uploading an audit without an API key."""
                 # Mock the response
@@ -156,10 +182,11 @@ class TestAuditApiUploader(unittest.TestCase):
                 mock_post.assert_called_once_with(
                     expected_call_url,
                     json={"text": "Sample audit content"},
-                    headers={"x-submitted-by": "codebase-dumb.v1"}
+                    headers={"x-submitted-by": "codebase-dumb.v1"},
+                    timeout=(10, 300)
                 )
 
-            @patch("requests.post")
+            @patch("requests.Session.post")
             def test_upload_audit_large_payload(self, mock_post):
                 """Test uploading an audit that is too large."""
                 # Mock the response
@@ -178,5 +205,138 @@ class TestAuditApiUploader(unittest.TestCase):
                 mock_post.assert_called_once_with(
                     expected_call_url,
                     json={"text": "A" * 1000000},
-                    headers={"x-api-key": "test_key", "x-submitted-by": "codebase-dumb.v1"}
-                )
\ No newline at end of file
+                    headers={"x-api-key": "test_key", "x-submitted-by": "codebase-dumb.v1"},
+                    timeout=(10, 300)
+                )
+
+
+class StandInAuditHandler(BaseHTTPRequestHandler):
+    """Audits API stand-in which decodes chunked bodies and fails the first `failures` requests."""
+
+    def do_POST(self):
+        server = self.server
+        if self.headers.get("Transfer-Encoding") == "chunked":
+            body = b""
+            while True:
+                size = int(self.rfile.readline().strip(), 16)
+                if size == 0:
+                    self.rfile.readline()
+                    break
+                body += self.rfile.read(size)
+                self.rfile.readline()
+        else:
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+        server.requests.append({"path": self.path, "headers": dict(self.headers), "body": body})
+        status = 503 if len(server.requests) <= server.failures else 200
+        response = json.dumps({"uploaded": status == 200, "id": "12345"}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestAuditApiUploaderStreaming(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StandInAuditHandler)
+        self.server.requests = []
+        self.server.failures = 0
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}/"
+
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.dump_path = os.path.join(temp_dir.name, "dump.txt")
+
+    def _write_dump(self, content):
+        with open(self.dump_path, "w", encoding="utf-8") as f:
+            f.write(content)
+
+    def _uploader(self, **kwargs):
+        uploader = AuditApiUploader(api_key="test_key", api_url=self.base_url, api_submitted_by="codebase-dumb.v1",
+                                    backoff_factor=0, **kwargs)
+        self.addCleanup(uploader.close)
+        return uploader
+
+    def test_upload_file_streams_json_body(self):
+        content = 'File: "quotes" and \\ backslashes\nzażółć\t' * 5000
+        self._write_dump(content)
+        uploader = self._uploader()
+        uploader.UPLOAD_CHUNK_SIZE = 1000
+
+        with patch("builtins.print"):
+            uploader.upload_audit_file(self.dump_path)
+
+        self.assertEqual(len(self.server.requests), 1)
+        request = self.server.requests[0]
+        self.assertEqual(request["path"], "/api/repo/add")
+        self.assertEqual(request["headers"]["Transfer-Encoding"], "chunked")
+        self.assertEqual(request["headers"]["x-api-key"], "test_key")
+        self.assertEqual(request["headers"]["x-submitted-by"], "codebase-dumb.v1")
+        self.assertEqual(json.loads(request["body"]), {"text": content})
+
+    def test_upload_file_retries_on_server_error(self):
+        self._write_dump("Sample audit content")
+        self.server.failures = 2
+        uploader = self._uploader(max_retries=3)
+
+        with patch("builtins.print") as mock_print:
+            uploader.upload_audit_file(self.dump_path)
+
+        self.assertEqual(len(self.server.requests), 3)
+        for request in self.server.requests:
+            self.assertEqual(json.loads(request["body"]), {"text": "Sample audit content"})
+        print_calls = [call[0][0] for call in mock_print.call_args_list]
+        self.assertIn("Audit uploaded successfully", print_calls)
+
+    def test_upload_file_gives_up_after_retries(self):
+        self._write_dump("Sample audit content")
+        self.server.failures = 10
+        uploader = self._uploader(max_retries=1)
+
+        with patch("builtins.print"):
+            with self.assertRaises(ValueError) as context:
+                uploader.upload_audit_file(self.dump_path)
+
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertIn("Failed to upload audit", str(context.exception))
+
+    def test_upload_file_reuses_session(self):
+        self._write_dump("Sample audit content")
+        uploader = self._uploader()
+
+        with patch("builtins.print"):
+            uploader.upload_audit_file(self.dump_path)
+            session = uploader.session
+            uploader.upload_audit_file(self.dump_path)
+
+        self.assertIs(uploader.session, session)
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_upload_file_retries_connection_errors(self):
+        self._write_dump("Sample audit content")
+        uploader = AuditApiUploader(api_key=None, api_url="http://127.0.0.1:1/", api_submitted_by="codebase-dumb.v1",
+                                    max_retries=2, backoff_factor=0)
+        self.addCleanup(uploader.close)
+
+        import requests
+        with patch("builtins.print"), patch.object(uploader.session, "post", wraps=uploader.session.post) as post:
+            with self.assertRaises(requests.ConnectionError):
+                uploader.upload_audit_file(self.dump_path)
+        self.assertEqual(post.call_count, 3)
+
+    def test_upload_empty_file(self):
+        self._write_dump("")
+        uploader = self._uploader()
+        with self.assertRaises(ValueError) as context:
+            uploader.upload_audit_file(self.dump_path)
+        self.assertIn("Repo content is required", str(context.exception))
+        self.assertEqual(self.server.requests, [])
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+from codebase_dump.app import get_subcommand
+from codebase_dump.core.batch import BatchEntry, BatchRunner, read_manifest
+from codebase_dump.core.output_formatter import PlainTextOutputFormatter
+from codebase_dump.core.tokenizers import TokenCountCache
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_dir = temp_dir.name
+        for repo in ["service-a", "service-b"]:
+            os.makedirs(os.path.join(self.temp_dir, repo))
+            with open(os.path.join(self.temp_dir, repo, "LICENSE"), "w") as f:
+                f.write("Shared license text\n" * 10)
+            with open(os.path.join(self.temp_dir, repo, "main.py"), "w") as f:
+                f.write(f"print('{repo}')\n")
+        with open(os.path.join(self.temp_dir, "service-b", ".gitignore"), "w") as f:
+            f.write("*.py\n")
+
+    def test_read_manifest(self):
+        manifest_path = os.path.join(self.temp_dir, "manifest.txt")
+        with open(manifest_path, "w") as f:
+            f.write("# repositories\nservice-a\n\nservice-b\tout/b.txt\n")
+
+        entries = read_manifest(manifest_path)
+        self.assertEqual(entries, [
+            BatchEntry(path=os.path.join(self.temp_dir, "service-a")),
+            BatchEntry(path=os.path.join(self.temp_dir, "service-b"), output_file=os.path.join(self.temp_dir, "out/b.txt")),
+        ])
+
+    def test_run_dumps_every_repository(self):
+        output_dir = os.path.join(self.temp_dir, "dumps")
+        runner = BatchRunner(PlainTextOutputFormatter(tokenizers=["estimate"]), output_dir=output_dir, workers=2)
+        entries = [BatchEntry(path=os.path.join(self.temp_dir, "service-a")),
+                   BatchEntry(path=os.path.join(self.temp_dir, "service-b")),
+                   BatchEntry(path=os.path.join(self.temp_dir, "missing"))]
+        results = runner.run(entries)
+
+        self.assertEqual([result.error is None for result in results], [True, True, False])
+        self.assertEqual(results[0].file_count, 2)
+        # service-b ignores *.py with its own .gitignore
+        self.assertEqual(results[1].file_count, 1)
+        with open(os.path.join(output_dir, "service-b_codebase_dump.txt")) as f:
+            self.assertNotIn("print('service-b')", f.read())
+        with open(os.path.join(output_dir, "service-a_codebase_dump.txt")) as f:
+            self.assertIn("print('service-a')", f.read())
+
+        # The license is identical in both repositories, so it is tokenized once.
+        self.assertGreaterEqual(runner.token_count_cache.hits, 1)
+        report = runner.generate_report(results, 1.0)
+        self.assertIn("- Repositories: 2 succeeded, 1 failed", report)
+        self.assertIn("missing: FAILED (Directory not found", report)
+        self.assertIn("Token cache:", report)
+
+    def test_subcommand_dispatch(self):
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.temp_dir)
+        self.assertEqual(get_subcommand(["batch", "repos.txt"]), "batch")
+        self.assertEqual(get_subcommand(["search", "dump.txt", "query"]), "search")
+        self.assertIsNone(get_subcommand(["service-a"]))
+        self.assertIsNone(get_subcommand([]))
+
+        # A directory named like a subcommand is dumped
+        os.makedirs("extract")
+        self.assertIsNone(get_subcommand(["extract"]))
+
+    def test_token_count_cache(self):
+        cache = TokenCountCache()
+        self.assertEqual(cache.count_tokens("abcdefgh", ["estimate"]), {"estimate": 2})
+        self.assertEqual(cache.count_tokens("abcdefgh", ["estimate"]), {"estimate": 2})
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
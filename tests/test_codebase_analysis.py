@@ -1,8 +1,23 @@
+import io
+import os
+import tempfile
 import unittest
 from unittest.mock import patch, mock_open
-from codebase_dump.core.codebase_analysis import CodebaseAnalysis
+from codebase_dump.core.codebase_analysis import CodebaseAnalysis, OVERSIZE_SKIP
+from codebase_dump.core.file_classifier import FileClassifier
 from codebase_dump.core.ignore_patterns_manager import IgnorePatternManager
-from codebase_dump.core.models import DirectoryAnalysis, TextFileAnalysis
+from codebase_dump.core.models import DirectoryAnalysis, MappedTextFileAnalysis, TextFileAnalysis
+from codebase_dump.core.output_formatter import PlainTextOutputFormatter
+from codebase_dump.core.tokenizers import Tokenizer, register_tokenizer, unregister_tokenizer
+
+
+class LineTokenizer(Tokenizer):
+    """Counts lines, which gives exact counts only if chunks are split at line boundaries."""
+    name = "lines"
+
+    def count(self, text):
+        return len(text.splitlines())
+
 
 class TestCodebaseAnalysis(unittest.TestCase):
 
@@ -29,7 +44,10 @@ class TestCodebaseAnalysis(unittest.TestCase):
           ignore_manager = IgnorePatternManager(".", load_default_ignore_patterns=False, extra_ignore_patterns=["*.py"])
           codebase_analysis = CodebaseAnalysis()
 
-          with patch("codebase_dump.core.codebase_analysis.os.listdir", return_value=["dir", "file1.txt", "file2.py"]):
+          # The nested "dir" entry is a file without an extension, which the classifier sniffs by reading its first
+          # bytes in binary mode. mock_open serves str data, so the sniff is covered by the test below instead.
+          with patch("codebase_dump.core.codebase_analysis.os.listdir", return_value=["dir", "file1.txt", "file2.py"]), \
+                    patch.object(FileClassifier, "is_binary", return_value=False):
                with patch('codebase_dump.core.codebase_analysis.os.path.isdir', side_effect=[True, False, False]):
                     result = codebase_analysis.analyze_directory(".", ignore_manager, ".")
                     self.assertEqual(len(result.get_all_non_ignored_files()), 2)
@@ -37,6 +55,27 @@ class TestCodebaseAnalysis(unittest.TestCase):
                     self.assertEqual(result.get_all_non_ignored_files()[0].name, "dir")
                     self.assertEqual(result.get_all_non_ignored_files()[1].name, "file1.txt")
 
+     def test_files_without_extension_are_sniffed_before_being_read(self):
+          with tempfile.TemporaryDirectory() as root:
+               os.makedirs(os.path.join(root, "dir"))
+               for name, data in [("dir/dir", b"Loremm ipsum dolor sit amet"), ("dir/program", b"\x7fELF\x02\x01\x01 Loremm"),
+                                  ("file1.txt", b"Loremm ipsum dolor sit amet"), ("file2.py", b"x = 1\n")]:
+                    with open(os.path.join(root, name), "wb") as f:
+                         f.write(data)
+               ignore_manager = IgnorePatternManager(root, load_default_ignore_patterns=False, extra_ignore_patterns=["*.py"])
+               codebase_analysis = CodebaseAnalysis()
+
+               with patch.object(codebase_analysis, "_is_utf8_file", wraps=codebase_analysis._is_utf8_file) as is_utf8_file:
+                    result = codebase_analysis.analyze_directory(root, ignore_manager, root)
+
+          children = {node.name: node for node in result.children}
+          self.assertEqual({node.name: node.file_content for node in children["dir"].children},
+                           {"dir": "Loremm ipsum dolor sit amet", "program": "[Non-text file]"})
+          self.assertEqual(children["file1.txt"].file_content, "Loremm ipsum dolor sit amet")
+          self.assertTrue(children["file2.py"].is_ignored)
+          # The binary file is recognized from its first bytes and never decoded
+          self.assertNotIn(os.path.join(root, "dir", "program"), [call.args[0] for call in is_utf8_file.call_args_list])
+
 
      @patch("os.getcwd", return_value="dir")
      @patch("os.listdir", return_value=["file1.txt", "file2.py"])
@@ -182,4 +221,176 @@ class TestCodebaseAnalysis(unittest.TestCase):
                self.assertTrue(result.children[1].is_ignored)
 
                # Check that the smallest file is not ignored
-               self.assertFalse(result.children[0].is_ignored)
\ No newline at end of file
+               self.assertFalse(result.children[0].is_ignored)
+
+class TestLargeFileAnalysis(unittest.TestCase):
+
+     def setUp(self):
+          self.temp_dir = tempfile.TemporaryDirectory()
+          self.addCleanup(self.temp_dir.cleanup)
+
+     def _write(self, name, data):
+          path = os.path.join(self.temp_dir.name, name)
+          with open(path, "wb") as f:
+               f.write(data)
+          return path
+
+     def test_large_text_file_is_memory_mapped(self):
+          content = "INSERT INTO t VALUES ('zażółć');\n" * 100
+          path = self._write("dump.sql", content.encode("utf-8"))
+          result = CodebaseAnalysis(mmap_threshold=1)._analyze_file(path, False, None)
+
+          self.assertIsInstance(result, MappedTextFileAnalysis)
+          self.assertEqual(result.size, len(content))
+          self.assertEqual(result.file_content, "")
+          stream = io.BytesIO()
+          result.write_content(stream)
+          with open(path, "rb") as f:
+               self.assertEqual(stream.getvalue(), f.read())
+
+     def test_large_file_tokens_are_counted_by_chunks(self):
+          register_tokenizer("lines", LineTokenizer)
+          self.addCleanup(unregister_tokenizer, "lines")
+          content = "line one\r\nline two\n" * 50 + "x" * 10
+          path = self._write("dump.sql", content.encode("utf-8"))
+          result = CodebaseAnalysis(mmap_threshold=1)._analyze_file(path, False, None)
+
+          with patch.object(MappedTextFileAnalysis, "WRITE_CHUNK_SIZE", 16), \
+                  patch.object(MappedTextFileAnalysis, "get_content", side_effect=AssertionError("decoded whole")):
+               tokens = result.count_tokens("lines")
+          self.assertEqual(tokens, 101)
+
+     def test_large_file_with_invalid_utf8_is_not_text(self):
+          path = self._write("latin1.txt", "café\n".encode("latin-1") * 10)
+          for mmap_threshold in [1, 1024]:
+               result = CodebaseAnalysis(mmap_threshold=mmap_threshold)._analyze_file(path, False, None)
+               self.assertEqual(result.file_content, "[Non-text file]")
+
+     def test_large_and_small_files_have_the_same_content_and_size(self):
+          content = "zażółć\r\nline\rend\n" * 10
+          path = self._write("crlf.txt", content.encode("utf-8"))
+          small = CodebaseAnalysis(mmap_threshold=1024)._analyze_file(path, False, None)
+          with patch.object(CodebaseAnalysis, "VALIDATE_CHUNK_SIZE", 7):
+               large = CodebaseAnalysis(mmap_threshold=1)._analyze_file(path, False, None)
+
+          self.assertIsInstance(large, MappedTextFileAnalysis)
+          self.assertEqual(large.size, small.size)
+          self.assertEqual(large.get_content(), small.get_content())
+          small_stream, large_stream = io.BytesIO(), io.BytesIO()
+          small.write_content(small_stream)
+          large.write_content(large_stream)
+          self.assertEqual(large_stream.getvalue(), small_stream.getvalue())
+
+     def test_large_binary_file_is_not_text(self):
+          path = self._write("image.bin", b"\x89PNG\x00\x00\xff\xfe" * 100)
+          result = CodebaseAnalysis(mmap_threshold=1)._analyze_file(path, False, None)
+
+          self.assertIsInstance(result, TextFileAnalysis)
+          self.assertEqual(result.file_content, "[Non-text file]")
+
+     def test_small_files_are_read_into_memory(self):
+          path = self._write("small.txt", b"small")
+          result = CodebaseAnalysis(mmap_threshold=1024)._analyze_file(path, False, None)
+
+          self.assertEqual(result.file_content, "small")
+
+
+class TestOversizeFiles(unittest.TestCase):
+
+     def setUp(self):
+          self.temp_dir = tempfile.TemporaryDirectory()
+          self.addCleanup(self.temp_dir.cleanup)
+
+     def _write(self, name, data):
+          path = os.path.join(self.temp_dir.name, name)
+          with open(path, "wb") as f:
+               f.write(data)
+          return path
+
+     def test_oversize_file_is_replaced_by_excerpt(self):
+          path = self._write("app.log", b"HEAD" + b"x" * 1000 + b"TAIL")
+          result = CodebaseAnalysis(max_file_bytes=8)._analyze_file(path, False, None)
+
+          self.assertEqual(result.file_content, "HEAD\n\n[... 1000 bytes truncated ...]\n\nTAIL")
+          self.assertEqual(result.original_size, 1008)
+          self.assertFalse(result.is_ignored)
+
+     def test_oversize_file_is_skipped(self):
+          path = self._write("app.log", b"x" * 100)
+          with patch("builtins.open") as mock_open:
+               result = CodebaseAnalysis(max_file_bytes=10, oversize_policy=OVERSIZE_SKIP)._analyze_file(path, False, None)
+          mock_open.assert_not_called()
+
+          self.assertTrue(result.is_ignored)
+          self.assertEqual(result.file_content, "")
+          self.assertEqual(result.original_size, 100)
+
+     def test_token_limit_is_estimated_from_size(self):
+          path = self._write("notes.txt", b"a" * 100)
+          self.assertFalse(CodebaseAnalysis(max_file_tokens=25)._analyze_file(path, False, None).is_oversize)
+          self.assertTrue(CodebaseAnalysis(max_file_tokens=24)._analyze_file(path, False, None).is_oversize)
+
+     def test_oversize_binary_file_is_not_text(self):
+          path = self._write("blob", b"\x00" * 100)
+          result = CodebaseAnalysis(max_file_bytes=10)._analyze_file(path, False, None)
+
+          self.assertEqual(result.file_content, "[Non-text file]")
+
+     def test_summary_lists_oversize_files(self):
+          self._write("big.txt", b"b" * 2048)
+          self._write("small.txt", b"small")
+          ignore_manager = IgnorePatternManager(self.temp_dir.name, load_default_ignore_patterns=False)
+          data = CodebaseAnalysis(max_file_bytes=1024).analyze_directory(self.temp_dir.name, ignore_manager, self.temp_dir.name)
+
+          summary = PlainTextOutputFormatter(count_tokens=False).generate_summary_string(data)
+          self.assertIn("Oversize files, not read in full:\n", summary)
+          self.assertIn("big.txt (2.00 kB, head/tail excerpt of 1.03 kB)", summary)
+          self.assertNotIn("small.txt (", summary.split("Oversize files")[1])
+
+
+class TestIterFiles(unittest.TestCase):
+
+     def setUp(self):
+          temp_dir = tempfile.TemporaryDirectory()
+          self.addCleanup(temp_dir.cleanup)
+          self.root = os.path.join(temp_dir.name, "project")
+          for relative_path, content in {"b.py": b"print('b')", "a.txt": b"a", "node_modules/lib.js": b"lib",
+                                         "src/z.py": b"z", "src/image.png": b"\x89PNG\x00\xff", "src/debug.log": b"log"}.items():
+               path = os.path.join(self.root, relative_path)
+               os.makedirs(os.path.dirname(path), exist_ok=True)
+               with open(path, "wb") as f:
+                    f.write(content)
+          self.ignore_manager = IgnorePatternManager(self.root, load_gitignore=False, load_cdigestignore=False)
+
+     def test_iter_files_yields_sorted_non_ignored_records(self):
+          records = list(CodebaseAnalysis().iter_files(self.root, self.ignore_manager))
+
+          self.assertEqual([record.path for record in records],
+                           ["a.txt", "b.py", os.path.join("src", "image.png"), os.path.join("src", "z.py")])
+          self.assertEqual(records[1].size, 10)
+          self.assertTrue(records[1].is_text)
+          self.assertFalse(records[2].is_text)
+          self.assertEqual(records[1].read_content(), "print('b')")
+
+     def test_iter_files_with_ignored(self):
+          records = list(CodebaseAnalysis().iter_files(self.root, self.ignore_manager, include_ignored=True))
+
+          ignored = [record.path for record in records if record.is_ignored]
+          self.assertEqual(ignored, [os.path.join("node_modules", "lib.js"), os.path.join("src", "debug.log")])
+
+     def test_iter_files_is_lazy(self):
+          with patch.object(CodebaseAnalysis, "read_file_content") as read_file_content:
+               records = CodebaseAnalysis().iter_files(self.root, self.ignore_manager)
+               first = next(records)
+          self.assertEqual(first.path, "a.txt")
+          read_file_content.assert_not_called()
+
+     def test_formatter_writes_file_records(self):
+          stream = io.BytesIO()
+          analysis = CodebaseAnalysis()
+          PlainTextOutputFormatter().write_file_records(analysis.iter_files(self.root, self.ignore_manager), stream, "project")
+
+          self.assertEqual(stream.getvalue().decode(),
+                           "File: project/a.txt\n---\nContent:\na\n\n"
+                           "File: project/b.py\n---\nContent:\nprint('b')\n\n"
+                           "File: project/src/z.py\n---\nContent:\nz\n\n")
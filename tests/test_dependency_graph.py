@@ -0,0 +1,110 @@
+import unittest
+from unittest.mock import patch
+from codebase_dump.core.dependency_graph import ORDER_CLUSTERS, ORDER_DEPENDENCIES, DependencyGraph, extract_imports
+from codebase_dump.core.models import DirectoryAnalysis, TextFileAnalysis
+from codebase_dump.core.output_formatter import MarkdownOutputFormatter, PlainTextOutputFormatter
+
+
+class TestExtractImports(unittest.TestCase):
+
+    def test_python(self):
+        source = "import os, shop.db\nfrom shop.payments import Gateway, retry as r\nfrom . import models\nfrom ..core.cache import get\n"
+        self.assertEqual(extract_imports("shop/app.py", source), [
+            ("shop/payments", False), ("shop/payments/Gateway", False), ("shop/payments/retry", False),
+            ("./models", False), ("../core/cache", False), ("../core/cache/get", False),
+            ("os", False), ("shop/db", False)])
+
+    def test_javascript(self):
+        source = "import { a } from './db.js';\nimport './styles.css';\nconst q = require('../lib/queue');\nexport * from 'react';\n"
+        self.assertEqual(extract_imports("src/app.ts", source),
+                         [("./db", False), ("./styles.css", False), ("../lib/queue", False), ("react", False)])
+
+    def test_go(self):
+        source = 'package main\n\nimport "fmt"\nimport (\n\t"github.com/org/shop/internal/db"\n\tlog "github.com/sirupsen/logrus"\n)\n'
+        self.assertEqual(extract_imports("main.go", source),
+                         [("fmt", True), ("github.com/org/shop/internal/db", True), ("github.com/sirupsen/logrus", True)])
+
+    def test_java(self):
+        source = "package shop;\nimport com.shop.Payment;\nimport com.shop.util.*;\nimport static com.shop.Retry.delay;\n"
+        self.assertEqual(extract_imports("App.java", source),
+                         [("com/shop/Payment", False), ("com/shop/util", True), ("com/shop/Retry", False)])
+
+    def test_c(self):
+        self.assertEqual(extract_imports("main.c", '#include <stdio.h>\n#include "util/strings.h"\n'),
+                         [("stdio", False), ("util/strings", False)])
+
+    def test_unsupported_language(self):
+        self.assertEqual(extract_imports("notes.txt", "import this"), [])
+
+
+class TestDependencyGraph(unittest.TestCase):
+
+    def test_resolves_imports(self):
+        graph = DependencyGraph.build([
+            ("src/shop/app.py", "from shop.payments import Gateway\nfrom . import models\nimport os\n"),
+            ("src/shop/payments.py", "from .models import Payment\n"),
+            ("src/shop/models.py", ""),
+            ("internal/db/db.go", "package db\n"),
+            ("internal/db/pool.go", "package db\n"),
+            ("cmd/main.go", 'import "github.com/org/shop/internal/db"\n'),
+        ])
+
+        self.assertEqual(graph.imports, [[2, 1], [2], [], [], [], [3, 4]])
+        self.assertEqual(graph.edge_count, 5)
+
+    def test_topological_order(self):
+        graph = DependencyGraph.build([
+            ("a.py", "import c\n"),
+            ("b.py", ""),
+            ("c.py", "import b\n"),
+            ("d.py", "import e\n"),
+            ("e.py", "import d\n"),
+        ])
+
+        self.assertEqual([graph.paths[index] for index in graph.topological_order()], ["b.py", "c.py", "a.py", "d.py", "e.py"])
+
+    def test_clusters(self):
+        graph = DependencyGraph.build([
+            ("a.py", "import b\n"),
+            ("b.py", ""),
+            ("c.py", ""),
+            ("d.py", "import a\n"),
+        ])
+
+        self.assertEqual([[graph.paths[index] for index in cluster] for cluster in graph.clusters()],
+                         [["b.py", "a.py", "d.py"], ["c.py"]])
+        self.assertEqual(graph.order(ORDER_CLUSTERS), [1, 0, 3, 2])
+
+    def test_formatter_orders_files(self):
+        root = DirectoryAnalysis(name="project")
+        root.children = [TextFileAnalysis(name="app.py", file_content="import util\n", parent=root),
+                         TextFileAnalysis(name="util.py", file_content="X = 1\n", parent=root)]
+
+        output = PlainTextOutputFormatter(count_tokens=False, order=ORDER_DEPENDENCIES).format(root, set())
+        self.assertLess(output.index("File: project/util.py"), output.index("File: project/app.py"))
+        self.assertIn("Dependency graph:\n2 files, 1 imports between them\n- project/util.py\n- project/app.py -> project/util.py\n", output)
+
+        output = MarkdownOutputFormatter(count_tokens=False, order=ORDER_CLUSTERS).format(root, set())
+        self.assertIn("## Dependency graph\n2 files, 1 imports between them\nCluster 1 (2 files):\n", output)
+        self.assertLess(output.index("### project/util.py"), output.index("### project/app.py"))
+
+        output = PlainTextOutputFormatter(count_tokens=False).format(root, set())
+        self.assertNotIn("Dependency graph", output)
+        self.assertLess(output.index("File: project/app.py"), output.index("File: project/util.py"))
+
+    def test_formatter_reads_only_the_head_of_files_for_imports(self):
+        root = DirectoryAnalysis(name="project")
+        app = TextFileAnalysis(name="app.py", file_content="import util\n" + "x = 1\n" * 20 + "import late\n", parent=root)
+        data = TextFileAnalysis(name="data.csv", file_content="a,b\n", parent=root)
+        root.children = [app, data, TextFileAnalysis(name="util.py", file_content="X = 1\n", parent=root),
+                         TextFileAnalysis(name="late.py", file_content="Y = 1\n", parent=root)]
+        formatter = PlainTextOutputFormatter(count_tokens=False, order=ORDER_DEPENDENCIES)
+
+        with patch("codebase_dump.core.dependency_graph.IMPORT_SCAN_SIZE", 50), \
+                patch.object(data, "get_content_head", side_effect=AssertionError("read")):
+            _, graph = formatter.order_content_files(root)
+        self.assertEqual([graph.paths[index] for index in graph.imports[graph.paths.index("app.py")]], ["util.py"])
+
+
+if __name__ == "__main__":
+    unittest.main()
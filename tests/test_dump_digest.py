@@ -0,0 +1,93 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from codebase_dump.core.codebase_analysis import CodebaseAnalysis
+from codebase_dump.core.dump_digest import DumpDigest
+from codebase_dump.core.ignore_patterns_manager import IgnorePatternManager
+from codebase_dump.core.models import MappedTextFileAnalysis
+from codebase_dump.core.output_formatter import PlainTextOutputFormatter
+
+
+class TestReproducibleDump(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.temp_dir.name, "project")
+        self.write_files({
+            "src/b.py": "b = 1\r\nc = 2\r\n",
+            "src/a.py": "a = 1\n",
+            "docs/z.md": "# Z\r\n",
+            "docs/y.md": "# Y\n",
+        })
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write_files(self, files):
+        for path, content in files.items():
+            full_path = os.path.join(self.root, path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, "w", encoding="utf-8", newline="") as f:
+                f.write(content)
+
+    def dump(self, mmap_threshold=CodebaseAnalysis.DEFAULT_MMAP_THRESHOLD):
+        ignore_manager = IgnorePatternManager(self.root, load_default_ignore_patterns=False, extra_ignore_patterns={"*.log", "*.tmp"})
+        data = CodebaseAnalysis(mmap_threshold=mmap_threshold, reproducible=True).analyze_directory(self.root, ignore_manager, self.root)
+        digest = DumpDigest()
+        stream = io.BytesIO()
+        PlainTextOutputFormatter(count_tokens=False, reproducible=True).write(data, ignore_manager.ignore_patterns_as_str, stream, digest=digest)
+        return data, digest, stream.getvalue()
+
+    def test_sorted_traversal(self):
+        data, _, output = self.dump()
+
+        self.assertEqual([child.name for child in data.children], ["docs", "src"])
+        self.assertEqual([child.name for child in data.children[1].children], ["a.py", "b.py"])
+        self.assertIn(b"Patterns used to ignore files: {'*.log', '*.tmp'}", output)
+
+    def test_mapped_files_have_normalized_line_endings(self):
+        _, digest, output = self.dump()
+        with patch.object(MappedTextFileAnalysis, "WRITE_CHUNK_SIZE", 6):
+            data, mapped_digest, mapped_output = self.dump(mmap_threshold=1)
+
+        self.assertNotIn(b"\r", mapped_output)
+        self.assertEqual(mapped_output, output)
+        self.assertEqual(mapped_digest.dump_digest, digest.dump_digest)
+        self.assertEqual(data.children[1].children[1].size, len("b = 1\nc = 2\n"))
+
+    def test_digest_is_stable(self):
+        _, first, output = self.dump()
+        _, second, _ = self.dump()
+
+        self.assertEqual(first.dump_digest, second.dump_digest)
+        self.assertEqual(first.directories, second.directories)
+        self.assertEqual(first.dump_size, len(output))
+        self.assertEqual(first.root_digest, first.directories["project"])
+
+    def test_changed_directories(self):
+        _, previous, _ = self.dump()
+        self.write_files({"src/a.py": "a = 2\n"})
+        _, digest, _ = self.dump()
+
+        self.assertNotEqual(digest.dump_digest, previous.dump_digest)
+        self.assertEqual(digest.changed_directories(previous), ["project", "project/src"])
+
+    def test_save_and_load(self):
+        _, digest, output = self.dump()
+        dump_path = os.path.join(self.temp_dir.name, "dump.txt")
+        with open(dump_path, "wb") as f:
+            f.write(output)
+        digest.uploaded_to = "https://example.com/"
+        digest.save(DumpDigest.get_digest_path(dump_path))
+
+        loaded = DumpDigest.load(DumpDigest.get_digest_path(dump_path))
+        self.assertEqual(loaded.directories, digest.directories)
+        self.assertEqual(loaded.uploaded_to, "https://example.com/")
+        self.assertTrue(digest.is_same_dump(loaded, dump_path))
+        self.assertIsNone(DumpDigest.load(os.path.join(self.temp_dir.name, "missing.json")))
+
+
+if __name__ == "__main__":
+    unittest.main()
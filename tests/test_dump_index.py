@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+from codebase_dump.core.codebase_analysis import CodebaseAnalysis
+from codebase_dump.core.dump_index import DumpIndex, extract_section
+from codebase_dump.core.ignore_patterns_manager import IgnorePatternManager
+from codebase_dump.core.output_formatter import MarkdownOutputFormatter, PlainTextOutputFormatter
+
+
+class TestDumpIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.temp_dir.name, "project")
+        self.files = {
+            "src/app.py": "print('zażółć')\n",
+            "src/lib/util.py": "def util():\n    return 1\n",
+            "README.md": "# Project\n",
+        }
+        for path, content in self.files.items():
+            full_path = os.path.join(self.root, path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, "w", encoding="utf-8") as f:
+                f.write(content)
+
+        ignore_manager = IgnorePatternManager(self.root, load_default_ignore_patterns=False)
+        self.data = CodebaseAnalysis().analyze_directory(self.root, ignore_manager, self.root)
+        self.dump_path = os.path.join(self.temp_dir.name, "dump.txt")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write_dump(self, formatter):
+        index = DumpIndex(root_name=self.data.name)
+        with open(self.dump_path, "wb") as f:
+            formatter.write(self.data, set(), f, index)
+        index.save(DumpIndex.get_index_path(self.dump_path))
+        return index
+
+    def test_extracts_every_file(self):
+        for formatter in [PlainTextOutputFormatter(tokenizers=["estimate"]), MarkdownOutputFormatter(tokenizers=["estimate"])]:
+            index = self.write_dump(formatter)
+
+            self.assertEqual(index.dump_size, os.path.getsize(self.dump_path))
+            for path, content in self.files.items():
+                self.assertEqual(extract_section(self.dump_path, path).decode("utf-8"), content)
+                self.assertEqual(extract_section(self.dump_path, os.path.join("project", path)).decode("utf-8"), content)
+
+    def test_whole_section(self):
+        self.write_dump(PlainTextOutputFormatter(tokenizers=["estimate"]))
+
+        section = extract_section(self.dump_path, "README.md", whole_section=True).decode("utf-8")
+        self.assertTrue(section.startswith("File: project/README.md"))
+        self.assertIn("# Project\n", section)
+
+    def test_token_ranges_are_contiguous(self):
+        index = self.write_dump(PlainTextOutputFormatter(tokenizers=["estimate"]))
+        loaded = DumpIndex.load(DumpIndex.get_index_path(self.dump_path))
+
+        self.assertEqual(loaded.tokenizer, "estimate")
+        self.assertEqual(loaded.entries[0].token_start, 0)
+        for previous, entry in zip(loaded.entries, loaded.entries[1:]):
+            self.assertEqual(entry.token_start, previous.token_end)
+        self.assertEqual(loaded.entries[-1].token_end, self.data.get_total_tokens("estimate"))
+        self.assertEqual([entry.path for entry in loaded.entries], [entry.path for entry in index.entries])
+
+    def test_no_tokens(self):
+        index = self.write_dump(PlainTextOutputFormatter(count_tokens=False))
+
+        self.assertIsNone(index.tokenizer)
+        self.assertTrue(all(entry.token_start is None for entry in index.entries))
+
+    def test_changed_dump_is_rejected(self):
+        self.write_dump(PlainTextOutputFormatter(tokenizers=["estimate"]))
+        with open(self.dump_path, "ab") as f:
+            f.write(b"\n")
+
+        with self.assertRaises(ValueError):
+            extract_section(self.dump_path, "README.md")
+
+    def test_missing_file_or_index(self):
+        self.write_dump(PlainTextOutputFormatter(tokenizers=["estimate"]))
+        with self.assertRaises(ValueError):
+            extract_section(self.dump_path, "missing.py")
+
+        os.remove(DumpIndex.get_index_path(self.dump_path))
+        with self.assertRaises(ValueError):
+            extract_section(self.dump_path, "README.md")
+
+
+if __name__ == "__main__":
+    unittest.main()
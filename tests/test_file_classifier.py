@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from codebase_dump.core.codebase_analysis import CodebaseAnalysis
+from codebase_dump.core.file_classifier import FileClassifier
+from codebase_dump.core.ignore_patterns_manager import IgnorePatternManager
+
+
+class TestFileClassifier(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = self.temp_dir.name
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write_file(self, name, data: bytes):
+        path = os.path.join(self.root, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def test_classify_by_name(self):
+        classifier = FileClassifier()
+        self.assertFalse(classifier.classify_by_name("images/logo.PNG"))
+        self.assertTrue(classifier.classify_by_name("src/main.py"))
+        self.assertTrue(classifier.classify_by_name("Dockerfile"))
+        self.assertIsNone(classifier.classify_by_name("data.unknown"))
+
+    def test_known_extensions_are_not_opened(self):
+        classifier = FileClassifier()
+        with patch("builtins.open") as mock_open:
+            self.assertTrue(classifier.is_binary("archive.tar.gz"))
+            self.assertFalse(classifier.is_binary("main.py"))
+        mock_open.assert_not_called()
+
+    def test_magic_numbers(self):
+        classifier = FileClassifier()
+        self.assertTrue(classifier.is_binary(self.write_file("image", b"\x89PNG\r\n\x1a\n rest")))
+        self.assertTrue(classifier.is_binary(self.write_file("program", b"\x7fELF\x02\x01\x01")))
+        self.assertTrue(classifier.is_binary(self.write_file("blob", b"abc\x00def")))
+        self.assertFalse(classifier.is_binary(self.write_file("script", b"#!/bin/sh\necho hi\n")))
+
+    def test_printable_magic_numbers_need_a_control_byte(self):
+        classifier = FileClassifier()
+        for text in [b"RIFFRAFF is a word", b"MZ notes\n", b"BZh is a prefix", b"ID3 tags\tlist", b"OTTO\r\n"]:
+            self.assertFalse(classifier.is_binary_header(text), text)
+        self.assertTrue(classifier.is_binary_header(b"RIFF\x24\x08\x01\x02WAVEfmt "))
+        self.assertTrue(classifier.is_binary_header(b"BZh91AY&SY\x8a\x13"))
+        self.assertTrue(classifier.is_binary_header(b"MZ\x90\x00\x03"))
+
+    def test_extension_overrides(self):
+        classifier = FileClassifier(binary_extensions=[".py"], text_extensions=["bin"])
+        self.assertTrue(classifier.is_binary("main.py"))
+        self.assertFalse(classifier.is_binary("firmware.bin"))
+
+    def test_missing_file_is_not_binary(self):
+        self.assertFalse(FileClassifier().is_binary(os.path.join(self.root, "missing")))
+
+    def test_analysis_skips_binary_files(self):
+        self.write_file("main.py", b"print('hi')\n")
+        self.write_file("logo.png", b"\x89PNG\r\n\x1a\n")
+        self.write_file("blob", b"\x00\x01\x02")
+        ignore_manager = IgnorePatternManager(self.root, load_default_ignore_patterns=False)
+
+        result = CodebaseAnalysis().analyze_directory(self.root, ignore_manager, self.root)
+        contents = {child.name: child.file_content for child in result.children}
+        self.assertEqual(contents["logo.png"], "[Non-text file]")
+        self.assertEqual(contents["blob"], "[Non-text file]")
+
+        result = CodebaseAnalysis(skip_binary_files=True).analyze_directory(self.root, ignore_manager, self.root)
+        self.assertEqual([child.name for child in result.children], ["main.py"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import os
+import tempfile
+import unittest
+from codebase_dump.core.codebase_analysis import CodebaseAnalysis
+from codebase_dump.core.generated_detector import GeneratedFileDetector, GENERATED_EXCLUDE, GENERATED_COLLAPSE
+from codebase_dump.core.ignore_patterns_manager import IgnorePatternManager
+from codebase_dump.core.output_formatter import PlainTextOutputFormatter
+
+
+class TestGeneratedFileDetector(unittest.TestCase):
+
+    def test_detect_by_name(self):
+        detector = GeneratedFileDetector()
+        self.assertEqual(detector.detect_by_name("web/package-lock.json"), "lockfile")
+        self.assertEqual(detector.detect_by_name("static/app.min.js"), "generated file name")
+        self.assertEqual(detector.detect_by_name("api/service_pb2.py"), "generated file name")
+        self.assertIsNone(detector.detect_by_name("src/main.py"))
+
+    def test_generated_header(self):
+        detector = GeneratedFileDetector()
+        self.assertEqual(detector.detect_by_content("// Code generated by protoc-gen-go. DO NOT EDIT.\npackage api\n"), "generated header")
+        self.assertEqual(detector.detect_by_content("# @generated\nx = 1\n"), "generated header")
+        self.assertIsNone(detector.detect_by_content("import os\n\nprint(os.getcwd())\n"))
+        for header in ["# Generated by the protocol buffer compiler.  DO NOT EDIT!", "/* This file was automatically generated */",
+                       " * This code is auto-generated", "// <auto-generated />", "-- Autogenerated file, edit schema.yml instead"]:
+            self.assertEqual(detector.detect_by_content(header + "\nx = 1\n"), "generated header", header)
+
+    def test_prose_mentioning_generation_is_not_a_header(self):
+        detector = GeneratedFileDetector()
+        for content in ['"""IDs are generated by the database."""\n', "# Do not edit this value unless you know why\n",
+                        "# Keys are generated by the server\n", 'GENERATED = "generated by hand, do not edit"\n']:
+            self.assertIsNone(detector.detect_by_content(content), content)
+
+    def test_header_is_only_looked_for_in_first_lines(self):
+        detector = GeneratedFileDetector(header_lines=2)
+        self.assertIsNone(detector.detect_by_content("a\nb\n# @generated\n"))
+        self.assertEqual(detector.detect_by_content("a\n# @generated\n"), "generated header")
+
+    def test_minified(self):
+        detector = GeneratedFileDetector()
+        self.assertEqual(detector.detect_by_content("var a=1;" * 200), "minified")
+        self.assertEqual(detector.detect_by_content(("x" * 300 + "\n") * 3), "minified")
+        self.assertIsNone(detector.detect_by_content("short line\n" * 1000))
+
+    def test_tunable_thresholds(self):
+        detector = GeneratedFileDetector(max_line_length=10, max_average_line_length=5)
+        self.assertEqual(detector.detect_by_content("abcdefghijkl\n"), "minified")
+        self.assertEqual(detector.detect_by_content("abcdefg\nabcdefg\n"), "minified")
+
+    def test_only_prefix_is_inspected(self):
+        detector = GeneratedFileDetector(prefix_size=100)
+        self.assertIsNone(detector.detect_by_content("short line\n" * 100 + "x" * 5000))
+
+
+class TestGeneratedFilesPolicy(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = self.temp_dir.name
+        self.write_file("main.py", "print('hi')\n")
+        self.write_file("bundle.js", "var a=1;" * 500)
+        self.write_file("yarn.lock", "# yarn lockfile v1\n" * 100)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write_file(self, name, content):
+        with open(os.path.join(self.root, name), "w") as f:
+            f.write(content)
+
+    def analyze(self, **kwargs):
+        ignore_manager = IgnorePatternManager(self.root, load_default_ignore_patterns=False)
+        data = CodebaseAnalysis(**kwargs).analyze_directory(self.root, ignore_manager, self.root)
+        return data, {child.name: child for child in data.children}
+
+    def test_keep_by_default(self):
+        data, files = self.analyze()
+        self.assertEqual(data.get_all_generated_files(), [])
+        self.assertEqual(files["bundle.js"].file_content, "var a=1;" * 500)
+
+    def test_exclude(self):
+        data, files = self.analyze(generated_policy=GENERATED_EXCLUDE)
+        self.assertTrue(files["bundle.js"].is_ignored)
+        self.assertEqual(files["bundle.js"].generated_reason, "minified")
+        self.assertTrue(files["yarn.lock"].is_ignored)
+        self.assertEqual(files["yarn.lock"].generated_size, 1900)
+        self.assertFalse(files["main.py"].is_ignored)
+
+        summary = PlainTextOutputFormatter(count_tokens=False).generate_summary_string(data)
+        self.assertIn("bundle.js (minified, excluded, ~1000 tokens saved)", summary)
+        self.assertIn("yarn.lock (lockfile, excluded, ~475 tokens saved)", summary)
+        self.assertIn("- Estimated tokens saved: ~1475\n", summary)
+
+    def test_collapse(self):
+        data, files = self.analyze(generated_policy=GENERATED_COLLAPSE)
+        self.assertFalse(files["bundle.js"].is_ignored)
+        self.assertEqual(files["bundle.js"].file_content, "[Generated file: minified, 4000 bytes collapsed]")
+
+        output = PlainTextOutputFormatter(count_tokens=False).format(data, set())
+        self.assertIn("[Generated file: lockfile, 1900 bytes collapsed]", output)
+        self.assertNotIn("var a=1;var", output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from codebase_dump.core.codebase_analysis import CodebaseAnalysis
+from codebase_dump.core.git_changes import ChangedFilesFilter, get_changed_files, read_changed_files_list
+from codebase_dump.core.ignore_patterns_manager import IgnorePatternManager
+from codebase_dump.core.output_formatter import PlainTextOutputFormatter
+
+
+@unittest.skipUnless(shutil.which("git"), "git is not installed")
+class TestGitChanges(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = self.temp_dir.name
+        self.git("init", "-q", "-b", "main")
+        self.git("config", "user.email", "dev@example.com")
+        self.git("config", "user.name", "Dev")
+        self.write_file("src/app.py", "print('app')\n")
+        self.write_file("src/util.py", "def util(): pass\n")
+        self.write_file("docs/index.md", "# Docs\n")
+        self.write_file("README.md", "readme\n")
+        self.git("add", "-A")
+        self.git("commit", "-q", "-m", "initial")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def git(self, *args):
+        subprocess.run(["git", "-C", self.root, *args], check=True, capture_output=True)
+
+    def write_file(self, path, content):
+        full_path = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "w") as f:
+            f.write(content)
+
+    def analyze(self, path_filter):
+        ignore_manager = IgnorePatternManager(self.root, load_default_ignore_patterns=False)
+        return CodebaseAnalysis(path_filter=path_filter).analyze_directory(self.root, ignore_manager, self.root)
+
+    def test_changes_in_working_tree(self):
+        self.write_file("src/app.py", "print('changed')\n")
+        self.write_file("src/new.py", "print('new')\n")
+        os.remove(os.path.join(self.root, "README.md"))
+
+        self.assertEqual(get_changed_files(self.root, "HEAD"), ["src/app.py", "src/new.py"])
+
+    def test_changes_between_revisions(self):
+        self.git("checkout", "-q", "-b", "feature")
+        self.write_file("docs/index.md", "# Changed\n")
+        self.git("commit", "-q", "-am", "docs")
+        self.write_file("src/uncommitted.py", "x = 1\n")
+
+        self.assertEqual(get_changed_files(self.root, "main..feature"), ["docs/index.md"])
+
+    def test_unknown_revision(self):
+        with self.assertRaises(ValueError):
+            get_changed_files(self.root, "no-such-branch")
+
+    def test_dump_only_changed_files(self):
+        self.write_file("src/app.py", "print('changed')\n")
+        data = self.analyze(ChangedFilesFilter(get_changed_files(self.root, "HEAD")))
+
+        self.assertEqual([child.name for child in data.children], ["src"])
+        self.assertEqual([child.name for child in data.children[0].children], ["app.py"])
+        output = PlainTextOutputFormatter(count_tokens=False).format(data, set())
+        self.assertIn("print('changed')", output)
+        self.assertNotIn("def util", output)
+
+    def test_siblings_are_listed_by_name(self):
+        self.write_file("src/app.py", "print('changed')\n")
+        data = self.analyze(ChangedFilesFilter(["src/app.py"], include_siblings=True))
+
+        files = {child.name: child for child in data.children[0].children}
+        self.assertFalse(files["app.py"].name_only)
+        self.assertTrue(files["util.py"].name_only)
+        self.assertEqual(files["util.py"].file_content, "")
+        self.assertEqual([child.name for child in data.children], ["src"])
+
+        output = PlainTextOutputFormatter(count_tokens=False).format(data, set())
+        self.assertIn("util.py (content not included)", output)
+        self.assertNotIn("File: " + os.path.join(data.name, "src", "util.py"), output)
+
+    def test_read_changed_files_list(self):
+        list_path = os.path.join(self.root, "changed.txt")
+        with open(list_path, "w") as f:
+            f.write("src/util.py\n\ndocs/index.md\n")
+
+        self.assertEqual(read_changed_files_list(list_path), ["src/util.py", "docs/index.md"])
+
+
+if __name__ == "__main__":
+    unittest.main()
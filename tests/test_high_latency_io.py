@@ -0,0 +1,86 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from codebase_dump.core.codebase_analysis import CodebaseAnalysis
+from codebase_dump.core.high_latency_io import DirectoryScanner, read_text_file
+from codebase_dump.core.ignore_patterns_manager import IgnorePatternManager
+from codebase_dump.core.output_formatter import PlainTextOutputFormatter
+from codebase_dump.core.path_filter import PathFilter
+from codebase_dump.core.pipeline import PipelinedCodebaseAnalysis
+
+
+class TestHighLatencyIO(unittest.TestCase):
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.root = os.path.join(temp_dir.name, "project")
+        files = {
+            "a.py": "print('a')\r\nprint('b')\r",
+            "b.log": "ignored\n",
+            "build/out.txt": "built\n",
+            "src/c.py": "import a\n",
+            "src/nested/d.txt": "d" * 100,
+            "src/e.bin": b"\x00\xff\xfe",
+            "docs/readme.md": "# Docs\n",
+        }
+        for relative_path, content in files.items():
+            path = os.path.join(self.root, relative_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(content if isinstance(content, bytes) else content.encode())
+        self.ignore_manager = IgnorePatternManager(self.root, load_default_ignore_patterns=False,
+                                                   extra_ignore_patterns={"*.log", "build/"})
+
+    def dump(self, analysis):
+        data = analysis.analyze_directory(self.root, self.ignore_manager, self.root)
+        stream = io.BytesIO()
+        PlainTextOutputFormatter(count_tokens=False).write(data, set(), stream)
+        return [(node.get_full_path(), node.is_ignored) for node in data.get_all_children()], stream.getvalue()
+
+    def test_read_text_file(self):
+        path = os.path.join(self.root, "a.py")
+        self.assertEqual(read_text_file(path), CodebaseAnalysis().read_file_content(path))
+        self.assertEqual(read_text_file(path), "print('a')\nprint('b')\n")
+        self.assertIsNone(read_text_file(os.path.join(self.root, "src", "e.bin")))
+
+    def test_scanner(self):
+        prefetched = []
+        with DirectoryScanner(workers=2, prefetch_file=lambda path, size: prefetched.append(path) or True) as scanner:
+            scanner.prefetch(os.path.join(self.root, "src"))
+            entries = {os.path.basename(entry.path): entry for entry in scanner.scan(os.path.join(self.root, "src"))}
+            with self.assertRaises(FileNotFoundError):
+                scanner.scan(os.path.join(self.root, "missing"))
+
+        self.assertEqual(set(entries), {"c.py", "nested", "e.bin"})
+        self.assertTrue(entries["c.py"].is_file)
+        self.assertEqual(entries["c.py"].size, len("import a\n"))
+        self.assertTrue(entries["nested"].is_dir)
+        self.assertIsNone(entries["nested"].size)
+        if hasattr(os, "posix_fadvise"):
+            self.assertEqual(len(prefetched), 2)
+
+    def test_same_dump_as_default_analysis(self):
+        expected = self.dump(CodebaseAnalysis())
+        self.assertEqual(self.dump(CodebaseAnalysis(high_latency_io=True, io_workers=3)), expected)
+        self.assertEqual(self.dump(PipelinedCodebaseAnalysis(tokenizers=["estimate"], high_latency_io=True, io_workers=3)),
+                         expected)
+        self.assertIn(("project/build", True), expected[0])
+
+    def test_same_dump_with_path_filter(self):
+        options = dict(path_filter=PathFilter(["src/**"]), reproducible=True)
+        self.assertEqual(self.dump(CodebaseAnalysis(high_latency_io=True, **options)), self.dump(CodebaseAnalysis(**options)))
+
+    def test_files_are_stated_once(self):
+        analysis = CodebaseAnalysis(high_latency_io=True)
+        with patch("codebase_dump.core.codebase_analysis.os.path.getsize", side_effect=AssertionError("stat'ed again")), \
+                patch("codebase_dump.core.codebase_analysis.os.path.isfile", side_effect=AssertionError("stat'ed again")), \
+                patch("pathlib.Path.is_dir", side_effect=AssertionError("stat'ed again")):
+            data = analysis.analyze_directory(self.root, self.ignore_manager, self.root)
+        self.assertEqual(len(data.get_all_non_ignored_files()), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -95,6 +95,17 @@ class TestIgnorePatternsManager(unittest.TestCase):
             self.assertTrue(manager.should_ignore("/test/sub/"))
             self.assertFalse(manager.should_ignore("/test/sub.txt"))
 
+        def test_directory_pattern_with_known_type_is_not_stated(self):
+            manager = IgnorePatternManager("/test", load_default_ignore_patterns=False,
+                                            load_gitignore=False, load_cdigestignore=False,
+                                            extra_ignore_patterns={"sub/", "*.tmp"})
+            with patch("pathlib.Path.is_dir", side_effect=AssertionError("stat'ed")):
+                self.assertTrue(manager.should_ignore("/test/sub", is_dir=True))
+                self.assertFalse(manager.should_ignore("/test/sub", is_dir=False))
+                self.assertTrue(manager.should_ignore("/test/sub/file.txt", is_dir=False))
+                self.assertTrue(manager.should_ignore("/test/other/file.tmp", is_dir=False))
+                self.assertFalse(manager.should_ignore("/test/other/file.txt", is_dir=False))
+
         def test_ignore_recursive_wildcard_pattern(self):
             manager = IgnorePatternManager("/test", load_default_ignore_patterns=False,
                                             load_gitignore=False, load_cdigestignore=False,
@@ -0,0 +1,149 @@
+import io
+import os
+import tempfile
+import threading
+import unittest
+from codebase_dump.core.codebase_analysis import CodebaseAnalysis
+from codebase_dump.core.ignore_patterns_manager import IgnorePatternManager
+from codebase_dump.core.memory_budget import MemoryBudget, SpilledTextFileAnalysis, generate_memory_string, parse_size
+from codebase_dump.core.normalizer import ContentNormalizer
+from codebase_dump.core.outline import CONTENT_OUTLINE
+from codebase_dump.core.output_formatter import PlainTextOutputFormatter
+from codebase_dump.core.pipeline import PipelinedCodebaseAnalysis
+
+
+class TestMemoryBudget(unittest.TestCase):
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.spill_parent = os.path.join(temp_dir.name, "spill")
+        os.makedirs(self.spill_parent)
+        self.root = os.path.join(temp_dir.name, "project")
+        files = {
+            "a.py": "def a():\n    return 'a'\n",
+            "b.log": "ignored\n",
+            "src/c.py": "# comment\nimport a\n\n\n\nclass C:\n    pass\n",
+            "src/nested/d.txt": "d\u00e9" * 100,
+            "src/e.bin": b"\x00\xff\xfe",
+        }
+        for relative_path, content in files.items():
+            path = os.path.join(self.root, relative_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(content if isinstance(content, bytes) else content.encode())
+        self.ignore_manager = IgnorePatternManager(self.root, load_default_ignore_patterns=False, extra_ignore_patterns={"*.log"})
+
+    def create_budget(self, resident_limit):
+        budget = MemoryBudget(2 * 1024 ** 3, spill_dir=self.spill_parent)
+        budget.resident_limit = resident_limit
+        self.addCleanup(budget.close)
+        return budget
+
+    def dump(self, data, **options):
+        stream = io.BytesIO()
+        PlainTextOutputFormatter(count_tokens=False, **options).write(data, set(), stream)
+        return stream.getvalue()
+
+    def test_parse_size(self):
+        self.assertEqual(parse_size("512"), 512)
+        self.assertEqual(parse_size("2G"), 2 * 1024 ** 3)
+        self.assertEqual(parse_size("1.5 MB"), 1536 * 1024)
+        self.assertEqual(parse_size("64k"), 64 * 1024)
+        with self.assertRaises(ValueError):
+            parse_size("lots")
+
+    def test_spilled_contents_give_the_same_dump(self):
+        expected = CodebaseAnalysis().analyze_directory(self.root, self.ignore_manager, self.root)
+        budget = self.create_budget(resident_limit=0)
+        data = CodebaseAnalysis(memory_budget=budget).analyze_directory(self.root, self.ignore_manager, self.root)
+
+        spilled = [node for node in data.get_all_children() if isinstance(node, SpilledTextFileAnalysis)]
+        # Every text file is spilled, including ignored ones; the binary placeholder stays in memory
+        self.assertEqual(sorted(node.name for node in spilled), ["a.py", "b.log", "c.py", "d.txt"])
+        self.assertEqual(budget.spilled_files, 4)
+        self.assertEqual(self.dump(data), self.dump(expected))
+        self.assertEqual(data.size, expected.size)
+        self.assertEqual(data.get_total_tokens("estimate"), expected.get_total_tokens("estimate"))
+
+        budget.close()
+        self.assertEqual(os.listdir(self.spill_parent), [])
+
+    def test_contents_fitting_in_the_budget_stay_in_memory(self):
+        budget = self.create_budget(resident_limit=10 ** 6)
+        data = CodebaseAnalysis(memory_budget=budget).analyze_directory(self.root, self.ignore_manager, self.root)
+        self.assertFalse(any(isinstance(node, SpilledTextFileAnalysis) for node in data.get_all_children()))
+        self.assertGreater(budget.resident, 0)
+        self.assertEqual(os.listdir(self.spill_parent), [])
+
+    def test_pipeline_with_budget(self):
+        expected = CodebaseAnalysis().analyze_directory(self.root, self.ignore_manager, self.root)
+        budget = self.create_budget(resident_limit=100)
+        budget.reading_limit = 1
+        data = PipelinedCodebaseAnalysis(workers=4, tokenizers=["estimate"], memory_budget=budget).analyze_directory(
+            self.root, self.ignore_manager, self.root)
+        self.assertGreater(budget.spilled_files, 0)
+        self.assertEqual(budget.reading, 0)
+        self.assertEqual(self.dump(data), self.dump(expected))
+
+    def test_readers_wait_for_the_budget(self):
+        budget = self.create_budget(resident_limit=0)
+        budget.reading_limit = 10
+        events = []
+        first_reading = threading.Event()
+        release_first = threading.Event()
+
+        def first():
+            with budget.reading_file(8):
+                first_reading.set()
+                release_first.wait()
+                events.append("first done")
+
+        def second():
+            first_reading.wait()
+            with budget.reading_file(8):
+                events.append("second reading")
+
+        threads = [threading.Thread(target=first), threading.Thread(target=second)]
+        for thread in threads:
+            thread.start()
+        first_reading.wait()
+        self.assertEqual(events, [])
+        release_first.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(events, ["first done", "second reading"])
+
+        # A file larger than the whole budget is still read, alone
+        with budget.reading_file(100):
+            self.assertEqual(budget.reading, 10)
+
+    def test_spilled_contents_are_normalized(self):
+        budget = self.create_budget(resident_limit=0)
+        data = CodebaseAnalysis(memory_budget=budget).analyze_directory(self.root, self.ignore_manager, self.root)
+        report = ContentNormalizer(strip_comments=True, collapse_blank_lines=True).normalize_tree(data, "estimate")
+
+        node = next(node for node in data.get_all_non_ignored_files() if node.name == "c.py")
+        self.assertIsInstance(node, SpilledTextFileAnalysis)
+        self.assertEqual(node.get_content(), "import a\n\nclass C:\n    pass\n")
+        self.assertEqual(node.size, len(node.get_content()))
+        self.assertEqual(node.count_tokens("estimate"), report.tokens_after - sum(
+            other.count_tokens("estimate") for other in data.get_all_non_ignored_files()
+            if other is not node and other.file_content != "[Non-text file]"))
+        self.assertEqual(report.skipped_files, 0)
+
+    def test_outlines_in_batches(self):
+        data = CodebaseAnalysis().analyze_directory(self.root, self.ignore_manager, self.root)
+        self.assertEqual(self.dump(data, content_mode=CONTENT_OUTLINE, outline_workers=1, max_buffered_bytes=1),
+                         self.dump(data, content_mode=CONTENT_OUTLINE, outline_workers=1))
+
+    def test_memory_string(self):
+        budget = self.create_budget(resident_limit=0)
+        output = generate_memory_string(budget)
+        self.assertIn("Peak memory (RSS):", output)
+        self.assertIn("of 2048.0 MB allowed", output)
+        self.assertIn("spilled to disk: 0 files", output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,11 @@
 import unittest
 import os
 from codebase_dump.core.models import NodeAnalysis, DirectoryAnalysis, TextFileAnalysis
+from codebase_dump.core.tokenizers import Tokenizer, register_tokenizer, unregister_tokenizer
+
+class WordCountTokenizer(Tokenizer):
+    def count(self, text):
+        return len(text.split())
 
 class TestNodeAnalysis(unittest.TestCase):
     
@@ -274,4 +279,39 @@ class TestNodeAnalysis(unittest.TestCase):
             root.children = [dir1, dir2]
             largest_dirs = root.get_largest_directories(n=1)
             # Expect dir2 to be the largest because its file is larger.
-            assert largest_dirs[0].name == "dir2"
\ No newline at end of file
+            assert largest_dirs[0].name == "dir2"
+
+        def test_get_largest_files_by_tokens(self):
+            root = DirectoryAnalysis(name="root")
+            short_words = TextFileAnalysis(name="short_words.txt", file_content="a b c d e f", parent=root)
+            long_word = TextFileAnalysis(name="long_word.txt", file_content="abcdefghijklmnop", parent=root)
+            root.children = [short_words, long_word]
+            register_tokenizer("test_words", WordCountTokenizer)
+            self.addCleanup(unregister_tokenizer, "test_words")
+            assert [f.name for f in root.get_largest_files(n=1)] == ["long_word.txt"]
+            assert [f.name for f in root.get_largest_files(n=1, rank_by="tokens", tokenizer="test_words")] == ["short_words.txt"]
+
+        def test_get_largest_entries_single_traversal(self):
+            root = DirectoryAnalysis(name="root")
+            dir1 = DirectoryAnalysis(name="dir1", parent=root)
+            dir2 = DirectoryAnalysis(name="dir2", parent=dir1)
+            ignored_dir = DirectoryAnalysis(name="ignored", parent=root, is_ignored=True)
+            file1 = TextFileAnalysis(name="file1.txt", file_content="a" * 10, parent=dir1)
+            file2 = TextFileAnalysis(name="file2.txt", file_content="a" * 20, parent=dir2)
+            file3 = TextFileAnalysis(name="file3.txt", file_content="a" * 100, parent=ignored_dir, is_ignored=True)
+            root.children = [dir1, ignored_dir]
+            dir1.children = [file1, dir2]
+            dir2.children = [file2]
+            ignored_dir.children = [file3]
+
+            files, directories = root.get_largest_entries(n=5)
+            assert [f.name for f in files] == ["file2.txt", "file1.txt"]
+            assert [d.name for d in directories] == ["dir1", "dir2"]
+
+            files, directories = root.get_largest_entries(n=1, rank_by="tokens", tokenizer="estimate")
+            assert [f.name for f in files] == ["file2.txt"]
+            assert [d.name for d in directories] == ["dir1"]
+
+        def test_get_largest_entries_unknown_ranking(self):
+            with self.assertRaises(ValueError):
+                DirectoryAnalysis(name="root").get_largest_entries(rank_by="lines")
@@ -0,0 +1,153 @@
+import os
+import tempfile
+import unittest
+from codebase_dump.core.models import DirectoryAnalysis, MappedTextFileAnalysis, TextFileAnalysis
+from codebase_dump.core.normalizer import ContentNormalizer, generate_normalization_string, get_comment_style
+
+MIT_HEADER = "# Copyright (c) 2024 Example Corp.\n# Licensed under the MIT License.\n\n"
+C_HEADER = "/*\n * Copyright 2024 Example Corp.\n * SPDX-License-Identifier: Apache-2.0\n */\n\n"
+
+
+class TestContentNormalizer(unittest.TestCase):
+
+    def test_comment_styles(self):
+        self.assertEqual(get_comment_style("src/app.py"), "hash")
+        self.assertEqual(get_comment_style("src/App.TSX"), "js")
+        self.assertEqual(get_comment_style("main.go"), "c")
+        self.assertEqual(get_comment_style("db/schema.sql"), "sql")
+        self.assertEqual(get_comment_style("Makefile"), "hash_lines")
+        self.assertIsNone(get_comment_style("notes.txt"))
+        self.assertIsNone(get_comment_style("Main.hs"))
+
+    def test_strips_license_header_after_shebang(self):
+        normalizer = ContentNormalizer(strip_license_headers=True)
+        content, stripped = normalizer.normalize("run.py", "#!/usr/bin/env python\n" + MIT_HEADER + "import os\n")
+        self.assertTrue(stripped)
+        self.assertEqual(content, "#!/usr/bin/env python\nimport os\n")
+
+    def test_keeps_leading_comment_which_is_not_a_license(self):
+        normalizer = ContentNormalizer(strip_license_headers=True)
+        source = "// Entry point of the payment service.\nint main() {}\n"
+        self.assertEqual(normalizer.normalize("main.c", source), (source, False))
+
+    def test_license_headers_are_checked_once_per_distinct_header(self):
+        normalizer = ContentNormalizer(strip_license_headers=True)
+        for name in ["a.c", "b.c", "c.c"]:
+            content, stripped = normalizer.normalize(name, C_HEADER + "int x;\n")
+            self.assertTrue(stripped)
+            self.assertEqual(content, "int x;\n")
+        self.assertEqual(normalizer.distinct_license_headers, 1)
+        self.assertEqual(len(normalizer._license_headers), 1)
+
+    def test_strips_c_comments_but_not_strings(self):
+        normalizer = ContentNormalizer(strip_comments=True)
+        source = ('// leading\n'
+                  'const url = "http://example.com"; // trailing\n'
+                  '  /* block\n     comment */\n'
+                  'const s = \'/* not a comment */\';\n')
+        content, _ = normalizer.normalize("a.js", source)
+        self.assertEqual(content, 'const url = "http://example.com";\nconst s = \'/* not a comment */\';\n')
+
+    def test_keeps_regular_expressions_and_urls(self):
+        normalizer = ContentNormalizer(strip_comments=True)
+        source = 'const re = /\\/\\//; const s = "ok";\nif (/#\\//.test(x)) y = a / b; // trailing\n'
+        self.assertEqual(normalizer.normalize("a.js", source)[0], 'const re = /\\/\\//; const s = "ok";\nif (/#\\//.test(x)) y = a / b;\n')
+        for path in ["a.scss", "a.less", "a.css"]:
+            source = "a { background: url(http://x.com/a.png); } /* note */\n"
+            self.assertEqual(normalizer.normalize(path, source)[0], "a { background: url(http://x.com/a.png); } \n")
+
+    def test_strips_lua_and_sql_block_comments(self):
+        normalizer = ContentNormalizer(strip_comments=True)
+        source = "local a = 1\n--[[ block\n  comment ]]\n--[==[ ]] ]==] local s = [[ -- kept ]] -- trailing\n"
+        self.assertEqual(normalizer.normalize("a.lua", source)[0], "local a = 1\n local s = [[ -- kept ]]\n")
+        source = "/* block\n   comment */\nSELECT '--kept', $$ /* kept */ $$ /*+ INDEX(t) */ -- trailing\nFROM t;\n"
+        self.assertEqual(normalizer.normalize("a.sql", source)[0], "SELECT '--kept', $$ /* kept */ $$ /*+ INDEX(t) */\nFROM t;\n")
+
+    def test_keeps_comments_read_by_tools(self):
+        normalizer = ContentNormalizer(strip_comments=True)
+        source = ("//go:build linux\n\npackage main\n\n// #include <stdio.h>\nimport \"C\"\n\n"
+                  "// doc\n//go:embed a.txt\nvar s = `// raw`\n")
+        self.assertEqual(normalizer.normalize("main.go", source)[0], source.replace("// doc\n", ""))
+        source = '/// <reference types="node" />\n// note\nlet x = 1;\n'
+        self.assertEqual(normalizer.normalize("a.ts", source)[0], '/// <reference types="node" />\nlet x = 1;\n')
+        source = "# syntax=docker/dockerfile:1\n# note\nRUN echo a # not a comment\n"
+        self.assertEqual(normalizer.normalize("Dockerfile", source)[0], "# syntax=docker/dockerfile:1\nRUN echo a # not a comment\n")
+
+    def test_keeps_heredocs_and_block_scalars(self):
+        normalizer = ContentNormalizer(strip_comments=True)
+        source = "cat <<EOF\n# kept\nEOF\necho 'a #kept' # trailing\n"
+        self.assertEqual(normalizer.normalize("a.sh", source)[0], "cat <<EOF\n# kept\nEOF\necho 'a #kept'\n")
+        source = "script: |\n  # kept\n  make\nname: a # trailing\n"
+        self.assertEqual(normalizer.normalize("ci.yml", source)[0], "script: |\n  # kept\n  make\nname: a\n")
+
+    def test_keeps_raw_strings_and_nested_comments(self):
+        normalizer = ContentNormalizer(strip_comments=True)
+        source = "fn f<'a>(x: &'a str) {} // c\nlet s = r#\"// \"#; /* a /* b */ c */\n"
+        self.assertEqual(normalizer.normalize("a.rs", source)[0], "fn f<'a>(x: &'a str) {}\nlet s = r#\"// \"#; /* a  c */\n")
+        source = 'auto s = R"x(// kept)x"; // c\nint n = 1\'000; auto u = "//";\n'
+        self.assertEqual(normalizer.normalize("a.cpp", source)[0], 'auto s = R"x(// kept)x";\nint n = 1\'000; auto u = "//";\n')
+
+    def test_strips_hash_comments_but_not_docstrings_or_shebang(self):
+        normalizer = ContentNormalizer(strip_comments=True)
+        source = ('#!/usr/bin/env python\n'
+                  'def f():\n'
+                  '    """Returns # of items."""\n'
+                  '    # explain\n'
+                  '    return "#1"  # trailing\n')
+        content, _ = normalizer.normalize("a.py", source)
+        self.assertEqual(content, '#!/usr/bin/env python\ndef f():\n    """Returns # of items."""\n    return "#1"\n')
+
+    def test_strips_xml_comments(self):
+        normalizer = ContentNormalizer(strip_comments=True)
+        content, _ = normalizer.normalize("page.html", "<p>\n  <!-- hidden -->\n  text <!-- note --></p>\n")
+        self.assertEqual(content, "<p>\n  text </p>\n")
+
+    def test_unknown_extensions_keep_comments(self):
+        normalizer = ContentNormalizer(strip_license_headers=True, strip_comments=True)
+        source = "# Copyright 2024\n# not a comment in plain text\n"
+        self.assertEqual(normalizer.normalize("notes.txt", source), (source, False))
+
+    def test_whitespace(self):
+        normalizer = ContentNormalizer(strip_trailing_whitespace=True, collapse_blank_lines=True)
+        content, _ = normalizer.normalize("notes.txt", "a  \n\n\n \n\nb\t\n\nc\n")
+        self.assertEqual(content, "a\n\nb\n\nc\n")
+
+    def test_indentation(self):
+        normalizer = ContentNormalizer(normalize_indentation=True)
+        source = "function f(a,\n           b) {\n    if (a) {\n        return `x\n    kept`;\n    }\n}\n"
+        self.assertEqual(normalizer.normalize("a.js", source)[0],
+                         "function f(a,\n\t\t   b) {\n\tif (a) {\n\t\treturn `x\n    kept`;\n\t}\n}\n")
+        for path in ["a.py", "Makefile", "a.yaml", "notes.txt"]:
+            source = "a:\n    b\n        c\n"
+            self.assertEqual(normalizer.normalize(path, source)[0], source)
+
+    def test_normalize_tree(self):
+        root = DirectoryAnalysis(name="project")
+        changed = TextFileAnalysis(name="a.py", file_content=MIT_HEADER + "x = 1  # one\n", parent=root)
+        unchanged = TextFileAnalysis(name="b.py", file_content="y = 2\n", parent=root)
+        binary = TextFileAnalysis(name="c.bin", file_content="[Non-text file]", parent=root)
+        ignored = TextFileAnalysis(name="d.py", file_content=MIT_HEADER, is_ignored=True, parent=root)
+        with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False) as f:
+            f.write(MIT_HEADER)
+        self.addCleanup(os.remove, f.name)
+        mapped = MappedTextFileAnalysis(name="e.py", file_path=f.name, byte_size=len(MIT_HEADER), parent=root)
+        root.children = [changed, unchanged, binary, ignored, mapped]
+
+        tokens_before = changed.count_tokens("estimate") + unchanged.count_tokens("estimate")
+        normalizer = ContentNormalizer(strip_license_headers=True, strip_comments=True)
+        report = normalizer.normalize_tree(root, "estimate")
+
+        self.assertEqual(changed.file_content, "x = 1\n")
+        self.assertEqual(ignored.file_content, MIT_HEADER)
+        self.assertEqual((report.files, report.changed_files, report.skipped_files), (3, 1, 1))
+        self.assertEqual(report.license_headers, 1)
+        self.assertEqual(report.tokens_before - report.tokens_after,
+                         tokens_before - changed.count_tokens("estimate") - unchanged.count_tokens("estimate"))
+        self.assertLess(report.tokens_after, report.tokens_before)
+        summary = generate_normalization_string(report, "estimate")
+        self.assertIn("Normalized 1 of 3 files, stripped 1 license headers (1 distinct)", summary)
+        self.assertIn("Tokens (estimate)", summary)
+
+
+if __name__ == "__main__":
+    unittest.main()
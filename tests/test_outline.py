@@ -0,0 +1,137 @@
+import unittest
+from unittest.mock import patch
+from codebase_dump.core.models import DirectoryAnalysis, TextFileAnalysis
+from codebase_dump.core.outline import CONTENT_OUTLINE, create_outline_executor, outline, outline_many, outline_python
+from codebase_dump.core.output_formatter import PlainTextOutputFormatter
+
+PYTHON_SOURCE = '''"""Payments module."""
+import os
+from typing import List
+
+TIMEOUT = 30
+LARGE_TABLE = {
+    "a": 1,
+    "b": 2,
+    "c": 3,
+}
+
+
+@dataclass
+class Payment(Base):
+    """A single payment."""
+    amount: int = 0
+
+    def refund(self,
+               reason: str) -> "Payment":
+        """Refunds the payment."""
+        if reason:
+            return Payment(-self.amount)
+        raise ValueError(reason)
+
+    async def sync(self): await self.save()
+
+
+def total(payments: List[Payment]) -> int:
+    return sum(payment.amount for payment in payments)
+
+
+if __name__ == "__main__":
+    print(total([]))
+'''
+
+PYTHON_OUTLINE = '''"""Payments module."""
+import os
+from typing import List
+TIMEOUT = 30
+@dataclass
+class Payment(Base):
+    """A single payment."""
+    amount: int = 0
+    def refund(self,
+               reason: str) -> "Payment":
+        """Refunds the payment."""
+        ...
+    async def sync(self): await self.save()
+def total(payments: List[Payment]) -> int:
+    ...'''
+
+
+class TestOutline(unittest.TestCase):
+
+    def test_python_outline(self):
+        self.assertEqual(outline_python(PYTHON_SOURCE), PYTHON_OUTLINE)
+
+    def test_python_syntax_error(self):
+        self.assertIsNone(outline_python("def broken(:\n"))
+
+    def test_regex_outline(self):
+        source = ("package main\n\nimport \"fmt\"\n\ntype Server struct {\n\tport int\n}\n\n"
+                  "func (s *Server) Start() error {\n\tfmt.Println(s.port)\n\treturn nil\n}\n")
+        self.assertEqual(outline("main.go", source),
+                         "package main\nimport \"fmt\"\ntype Server struct {\nfunc (s *Server) Start() error {")
+
+    def test_typescript_outline(self):
+        source = ("import { db } from './db';\n\nexport class Repo {\n  async find(id: string): Promise<Row> {\n"
+                  "    if (id) {\n      return db.get(id);\n    }\n  }\n}\n\nexport const load = async (id) => {\n  return 1;\n};\n")
+        self.assertEqual(outline("repo.ts", source),
+                         "import { db } from './db';\nexport class Repo {\n  async find(id: string): Promise<Row> {\n"
+                         "export const load = async (id) => {")
+
+    def test_file_without_declarations_is_not_outlined(self):
+        self.assertIsNone(outline("app.js", 'console.log("hi")\n'))
+        self.assertIsNone(outline("run.py", "print('hi')\n"))
+        self.assertEqual(list(outline_many([("app.js", "console.log(1)\n"), ("main.go", "package main\n")], workers=1)),
+                         [None, "package main"])
+
+    def test_unsupported_language(self):
+        self.assertIsNone(outline("data.json", "{}"))
+
+    def test_outline_many_keeps_order(self):
+        files = [("a.py", "def a():\n    return 1\n"), ("b.json", "{}"), ("c.rb", "class C\n  def c\n    1\n  end\nend\n")]
+        self.assertEqual(list(outline_many(files, workers=1)), ["def a():\n    ...", None, "class C\n  def c"])
+
+    def test_outline_many_in_processes(self):
+        files = [(f"m{i}.py", f"def f{i}():\n    return {i}\n") for i in range(4)]
+        self.assertEqual(list(outline_many(files, workers=2, min_parallel_files=2)),
+                         [f"def f{i}():\n    ..." for i in range(4)])
+
+    def test_formatter_writes_outlines(self):
+        root = DirectoryAnalysis(name="project")
+        root.children = [TextFileAnalysis(name="payments.py", file_content=PYTHON_SOURCE, parent=root),
+                         TextFileAnalysis(name="config.json", file_content='{"a": 1}', parent=root)]
+        formatter = PlainTextOutputFormatter(count_tokens=False, content_mode=CONTENT_OUTLINE)
+        output = formatter.format(root, set())
+
+        self.assertIn("File: project/payments.py\n---\nContent:\n" + PYTHON_OUTLINE + "\n\n", output)
+        self.assertIn("File: project/config.json\n---\nContent:\n{\"a\": 1}\n\n", output)
+        self.assertIn("- File contents: outlines", output)
+
+
+    def test_formatter_outlines_in_batches_by_default(self):
+        files = [(f"m{i}.py", TextFileAnalysis(name=f"m{i}.py", file_content="x" * 10)) for i in range(5)]
+        formatter = PlainTextOutputFormatter(count_tokens=False, content_mode=CONTENT_OUTLINE)
+        with patch.object(PlainTextOutputFormatter, "DEFAULT_OUTLINE_BATCH_BYTES", 25):
+            batches = list(formatter._iter_outline_batches(files))
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+
+    def test_formatter_shares_one_process_pool_across_batches(self):
+        root = DirectoryAnalysis(name="project")
+        root.children = [TextFileAnalysis(name=f"m{i}.py", file_content=f"def f{i}():\n    return {i}\n", parent=root)
+                         for i in range(4)]
+        formatter = PlainTextOutputFormatter(count_tokens=False, content_mode=CONTENT_OUTLINE, outline_workers=2,
+                                             max_buffered_bytes=1)
+        with patch("codebase_dump.core.output_formatter.create_outline_executor",
+                   wraps=create_outline_executor) as create_executor, \
+                patch("codebase_dump.core.output_formatter.outline_many",
+                      side_effect=lambda files, workers, executor: outline_many(files, workers, 1, executor)) as mock_outline_many:
+            output = formatter.format(root, set())
+
+        create_executor.assert_called_once_with(2)
+        executors = {id(call.kwargs["executor"]) for call in mock_outline_many.call_args_list}
+        self.assertEqual((mock_outline_many.call_count, len(executors)), (4, 1))
+        for i in range(4):
+            self.assertIn(f"def f{i}():\n    ...", output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from codebase_dump.core.codebase_analysis import CodebaseAnalysis
+from codebase_dump.core.ignore_patterns_manager import IgnorePatternManager
+from codebase_dump.core.path_filter import PathFilter
+
+
+class TestPathFilter(unittest.TestCase):
+
+    def test_matches(self):
+        path_filter = PathFilter(["src/payments/**", "setup.cfg", "**/*.toml", "./docs/"])
+        self.assertTrue(path_filter.matches("src/payments/api.py"))
+        self.assertTrue(path_filter.matches("src/payments/gateways/stripe.py"))
+        self.assertFalse(path_filter.matches("src/orders/api.py"))
+        self.assertTrue(path_filter.matches("setup.cfg"))
+        self.assertFalse(path_filter.matches("tools/setup.cfg"))
+        self.assertTrue(path_filter.matches("pyproject.toml"))
+        self.assertTrue(path_filter.matches("tools/lint/ruff.toml"))
+        self.assertTrue(path_filter.matches("docs/index.md"))
+        self.assertFalse(path_filter.matches("docsite/index.md"))
+
+    def test_wildcards_stay_within_segment(self):
+        path_filter = PathFilter(["src/*.py", "test_?.py", "[ab].txt"])
+        self.assertTrue(path_filter.matches("src/main.py"))
+        self.assertFalse(path_filter.matches("src/sub/main.py"))
+        self.assertTrue(path_filter.matches("test_1.py"))
+        self.assertTrue(path_filter.matches("a.txt"))
+        self.assertFalse(path_filter.matches("c.txt"))
+
+    def test_could_contain_matches(self):
+        path_filter = PathFilter(["src/payments/**", "setup.cfg"])
+        self.assertTrue(path_filter.could_contain_matches("src"))
+        self.assertTrue(path_filter.could_contain_matches("src/payments"))
+        self.assertTrue(path_filter.could_contain_matches("src/payments/gateways"))
+        self.assertFalse(path_filter.could_contain_matches("src/orders"))
+        self.assertFalse(path_filter.could_contain_matches("node_modules"))
+
+    def test_recursive_pattern_can_match_anywhere(self):
+        self.assertTrue(PathFilter(["**/*.toml"]).could_contain_matches("any/dir"))
+
+
+class TestPartialDump(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = self.temp_dir.name
+        for path in ["src/payments/api.py", "src/payments/gateways/stripe.py", "src/orders/api.py",
+                     "setup.cfg", "vendor/lib/big.py", "README.md"]:
+            full_path = os.path.join(self.root, path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, "w") as f:
+                f.write(path)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_only_selected_files_are_analyzed(self):
+        ignore_manager = IgnorePatternManager(self.root, load_default_ignore_patterns=False)
+        analysis = CodebaseAnalysis(path_filter=PathFilter(["src/payments", "setup.cfg"]))
+        result = analysis.analyze_directory(self.root, ignore_manager, self.root)
+
+        paths = sorted(os.path.relpath(file.get_full_path(), result.name) for file in result.get_all_non_ignored_files())
+        self.assertEqual(paths, [os.path.join("setup.cfg"),
+                                 os.path.join("src", "payments", "api.py"),
+                                 os.path.join("src", "payments", "gateways", "stripe.py")])
+        self.assertEqual(sorted(child.name for child in result.children), ["setup.cfg", "src"])
+
+    def test_unselected_directories_are_not_listed(self):
+        ignore_manager = IgnorePatternManager(self.root, load_default_ignore_patterns=False)
+        analysis = CodebaseAnalysis(path_filter=PathFilter(["src/payments/**"]))
+        listed = []
+        original_list = analysis._list_directory_items
+
+        def list_directory_items(path):
+            listed.append(os.path.relpath(path, self.root))
+            return original_list(path)
+
+        with patch.object(analysis, "_list_directory_items", side_effect=list_directory_items):
+            analysis.analyze_directory(self.root, ignore_manager, self.root)
+
+        self.assertEqual(sorted(listed), [".", "src", os.path.join("src", "payments"), os.path.join("src", "payments", "gateways")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import io
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+from codebase_dump.core.codebase_analysis import CodebaseAnalysis
+from codebase_dump.core.ignore_patterns_manager import IgnorePatternManager
+from codebase_dump.core.pipeline import PipelinedCodebaseAnalysis, QueueStream, TeeStream, BackgroundUpload
+
+
+class TestPipelinedCodebaseAnalysis(unittest.TestCase):
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.root = os.path.join(temp_dir.name, "project")
+        files = {
+            "a.py": "print('a')\n",
+            "b.log": "ignored\n",
+            "src/c.py": "import a\n",
+            "src/nested/d.txt": "d" * 100,
+            "src/e.bin": b"\x00\xff\xfe",
+        }
+        for relative_path, content in files.items():
+            path = os.path.join(self.root, relative_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(content if isinstance(content, bytes) else content.encode())
+
+    def _describe(self, node):
+        description = [(node.get_full_path(), node.is_ignored, getattr(node, "file_content", None))]
+        for child in getattr(node, "children", []):
+            description.extend(self._describe(child))
+        return description
+
+    def test_same_tree_as_sequential_analysis(self):
+        ignore_manager = IgnorePatternManager(self.root, load_default_ignore_patterns=False, extra_ignore_patterns={"*.log"})
+        expected = CodebaseAnalysis().analyze_directory(self.root, ignore_manager, self.root)
+        result = PipelinedCodebaseAnalysis(workers=3, max_pending=2, tokenizers=["estimate"]).analyze_directory(
+            self.root, ignore_manager, self.root)
+
+        self.assertEqual(self._describe(result), self._describe(expected))
+
+    def test_completed_files_are_released_during_the_walk(self):
+        ignore_manager = IgnorePatternManager(self.root, load_default_ignore_patterns=False)
+        in_flight_sizes = []
+        wait_for_slot = PipelinedCodebaseAnalysis._wait_for_slot
+
+        def record_wait(in_flight):
+            in_flight_sizes.append(len(in_flight))
+            wait_for_slot(in_flight)
+
+        with patch.object(PipelinedCodebaseAnalysis, "_wait_for_slot", side_effect=record_wait):
+            PipelinedCodebaseAnalysis(workers=2, max_pending=2, tokenizers=["estimate"]).analyze_directory(
+                self.root, ignore_manager, self.root)
+        self.assertTrue(in_flight_sizes)
+        self.assertTrue(all(size == 2 for size in in_flight_sizes))
+
+    def test_tokens_are_counted_by_workers(self):
+        ignore_manager = IgnorePatternManager(self.root, load_default_ignore_patterns=False)
+        analysis = PipelinedCodebaseAnalysis(workers=2, tokenizers=["estimate"])
+        result = analysis.analyze_directory(self.root, ignore_manager, self.root)
+
+        with patch("codebase_dump.core.models.get_tokenizer", side_effect=AssertionError("tokenized twice")):
+            self.assertEqual(result.get_total_tokens("estimate"), sum(
+                file.count_tokens("estimate") for file in result.get_all_non_ignored_files()))
+
+    def test_ignore_top_files(self):
+        ignore_manager = IgnorePatternManager(self.root, load_default_ignore_patterns=False)
+        with patch("builtins.print"):
+            result = PipelinedCodebaseAnalysis(workers=2, tokenizers=["estimate"]).analyze_directory(
+                self.root, ignore_manager, self.root, ignore_top_files=1)
+        ignored = [file.name for file in result.get_all_ignored_files()]
+        self.assertEqual(ignored, ["d.txt"])
+
+
+class TestStreams(unittest.TestCase):
+
+    def test_queue_stream_hands_chunks_to_consumer(self):
+        stream = QueueStream(max_chunks=1)
+        stream.MAX_CHUNK_SIZE = 4
+        received = []
+        consumer = threading.Thread(target=lambda: received.extend(stream))
+        consumer.start()
+        stream.write(b"0123456789")
+        stream.write(memoryview(b"ab"))
+        stream.close()
+        consumer.join()
+        self.assertEqual(received, [b"0123", b"4567", b"89", b"ab"])
+
+    def test_queue_stream_raises_error_on_close(self):
+        stream = QueueStream()
+        stream.write(b"data")
+        stream.close(RuntimeError("formatting failed"))
+        with self.assertRaises(RuntimeError):
+            list(stream)
+
+    def test_tee_stream(self):
+        first, second = io.BytesIO(), io.BytesIO()
+        TeeStream(first, second).write(b"data")
+        self.assertEqual(first.getvalue(), b"data")
+        self.assertEqual(second.getvalue(), b"data")
+
+    def test_background_upload(self):
+        class FakeUploader:
+            def upload_audit_chunks(self, chunks):
+                self.body = b"".join(chunks)
+
+        uploader = FakeUploader()
+        upload = BackgroundUpload(uploader, max_chunks=1).start()
+        for i in range(10):
+            upload.stream.write(b"chunk%d;" % i)
+        self.assertIsNone(upload.finish())
+        self.assertEqual(uploader.body, b"".join(b"chunk%d;" % i for i in range(10)))
+
+    def test_background_upload_failure_does_not_block_writer(self):
+        class FailingUploader:
+            def upload_audit_chunks(self, chunks):
+                raise ValueError("Failed to upload audit")
+
+        upload = BackgroundUpload(FailingUploader(), max_chunks=1).start()
+        for i in range(10):
+            upload.stream.write(b"chunk")
+        error = upload.finish()
+        self.assertIsInstance(error, ValueError)
@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from codebase_dump.core.models import DirectoryAnalysis, MappedTextFileAnalysis, TextFileAnalysis
+from codebase_dump.core.relevance import RelevanceRanker, apply_selection, iter_candidate_files, select_relevant_files
+
+
+def build_tree(files):
+    root = DirectoryAnalysis(name="shop")
+    for path, content in files.items():
+        directory = root
+        *dirs, name = path.split("/")
+        for dir_name in dirs:
+            child = next((child for child in directory.children if child.name == dir_name), None)
+            if child is None:
+                child = DirectoryAnalysis(name=dir_name, parent=directory)
+                directory.children.append(child)
+            directory = child
+        directory.children.append(TextFileAnalysis(name=name, file_content=content, parent=directory))
+    return root
+
+
+class TestRelevance(unittest.TestCase):
+
+    def setUp(self):
+        self.data = build_tree({
+            "payments/retry.py": "from payments.backoff import delay\n\ndef retry_payment(payment):\n    return delay(payment.attempts)\n",
+            "payments/backoff.py": "def delay(attempts):\n    return 2 ** attempts\n",
+            "orders/cart.py": "class Cart:\n    items = []\n",
+            "README.md": "# Shop\nA shop with carts and orders.\n",
+        })
+
+    def test_identifiers_and_paths_are_split(self):
+        ranker = RelevanceRanker(iter_candidate_files(self.data))
+        ranked = ranker.rank("Payment retry")
+
+        self.assertEqual(ranked[0].path, os.path.join("payments", "retry.py"))
+        self.assertNotIn("orders/cart.py", [ranked_file.path for ranked_file in ranked])
+
+    def test_imports_are_boosted(self):
+        ranked = RelevanceRanker(iter_candidate_files(self.data)).rank("retry")
+
+        self.assertEqual([ranked_file.path for ranked_file in ranked],
+                         [os.path.join("payments", "retry.py"), os.path.join("payments", "backoff.py")])
+        self.assertAlmostEqual(ranked[1].score, ranked[0].score * 0.5)
+
+    def test_no_match(self):
+        self.assertEqual(RelevanceRanker(iter_candidate_files(self.data)).rank("kubernetes"), [])
+
+    def test_files_without_identifiers(self):
+        data = build_tree({"1": "123 456\n"})
+        self.assertEqual(RelevanceRanker(iter_candidate_files(data)).rank("payment"), [])
+
+    def test_selection_fits_budget(self):
+        selection = select_relevant_files(self.data, "cart order payment", max_tokens=25)
+
+        self.assertLessEqual(selection.tokens, 25)
+        self.assertEqual(selection.tokens, sum(ranked_file.node.count_tokens("estimate") for ranked_file in selection.selected))
+        self.assertGreater(selection.matched, len(selection.selected))
+
+    def test_apply_selection(self):
+        selection = select_relevant_files(self.data, "retry")
+        apply_selection(self.data, selection)
+
+        files = {file.get_full_path(): file for file in self.data.get_all_children() if isinstance(file, TextFileAnalysis)}
+        self.assertFalse(files[os.path.join("shop", "payments", "retry.py")].name_only)
+        self.assertTrue(files[os.path.join("shop", "orders", "cart.py")].name_only)
+        self.assertEqual(files[os.path.join("shop", "orders", "cart.py")].get_content(), "")
+        self.assertEqual(self.data.get_total_tokens("estimate"), selection.tokens)
+
+    def test_mapped_files_are_read_in_chunks(self):
+        retry = next(node for path, node in iter_candidate_files(self.data) if node.name == "retry.py")
+        with tempfile.NamedTemporaryFile("wb", suffix=".py", delete=False) as f:
+            f.write(retry.file_content.replace("\n", "\r\n").encode("utf-8"))
+        self.addCleanup(os.remove, f.name)
+        mapped = MappedTextFileAnalysis(name="retry.py", file_path=f.name, byte_size=os.path.getsize(f.name),
+                                        normalize_newlines=True, parent=retry.parent)
+        expected = RelevanceRanker(iter_candidate_files(self.data)).rank("retry payment")
+        retry.parent.children[retry.parent.children.index(retry)] = mapped
+
+        with patch.object(MappedTextFileAnalysis, "WRITE_CHUNK_SIZE", 40), \
+                patch.object(MappedTextFileAnalysis, "get_content", side_effect=AssertionError("decoded whole")):
+            ranked = RelevanceRanker(iter_candidate_files(self.data)).rank("retry payment")
+        self.assertEqual([(ranked_file.path, ranked_file.score) for ranked_file in ranked],
+                         [(ranked_file.path, ranked_file.score) for ranked_file in expected])
+
+
+if __name__ == "__main__":
+    unittest.main()
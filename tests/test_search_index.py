@@ -0,0 +1,104 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from codebase_dump.core.codebase_analysis import CodebaseAnalysis
+from codebase_dump.core.dump_index import DumpIndex
+from codebase_dump.core.ignore_patterns_manager import IgnorePatternManager
+from codebase_dump.core.models import MappedTextFileAnalysis
+from codebase_dump.core.output_formatter import PlainTextOutputFormatter
+from codebase_dump.core.path_filter import PathFilter
+from codebase_dump.core.search_index import SearchIndex
+
+
+class TestSearchIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.temp_dir.name, "project")
+        self.write_files({
+            "src/payments.py": "class PaymentGateway:\n    def refund(self):\n        pass\n",
+            "src/orders.py": "from payments import PaymentGateway\n",
+            "README.md": "# Shop\n",
+            "debug.log": "PaymentGateway failed\n",
+        })
+        self.index_path = os.path.join(self.temp_dir.name, "dump.txt.search.db")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write_files(self, files):
+        for path, content in files.items():
+            full_path = os.path.join(self.root, path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, "w", encoding="utf-8") as f:
+                f.write(content)
+
+    def analyze(self, path_filter=None, mmap_threshold=CodebaseAnalysis.DEFAULT_MMAP_THRESHOLD):
+        ignore_manager = IgnorePatternManager(self.root, load_default_ignore_patterns=False, extra_ignore_patterns={"*.log"})
+        analysis = CodebaseAnalysis(path_filter=path_filter, mmap_threshold=mmap_threshold)
+        return analysis.analyze_directory(self.root, ignore_manager, self.root)
+
+    def test_search(self):
+        with SearchIndex(self.index_path) as index:
+            update = index.update(self.analyze())
+            self.assertEqual(update.added, 3)
+
+            paths = [result.path for result in index.search("PaymentGateway")]
+            self.assertEqual(sorted(paths), [os.path.join("project", "src", "orders.py"), os.path.join("project", "src", "payments.py")])
+            self.assertEqual([result.path for result in index.search("PaymentGateway refund")], [os.path.join("project", "src", "payments.py")])
+            self.assertEqual(index.search("nothing like this"), [])
+            self.assertEqual(index.search("   "), [])
+
+    def test_raw_query(self):
+        with SearchIndex(self.index_path) as index:
+            index.update(self.analyze())
+            self.assertEqual([result.path for result in index.search("PaymentGateway NOT refund", raw=True)],
+                             [os.path.join("project", "src", "orders.py")])
+            with self.assertRaises(ValueError):
+                index.search("AND (", raw=True)
+
+    def test_incremental_update(self):
+        with SearchIndex(self.index_path) as index:
+            index.update(self.analyze())
+
+        self.write_files({"README.md": "# Shop with refunds\n", "src/cart.py": "cart = []\n"})
+        os.remove(os.path.join(self.root, "src", "orders.py"))
+        with SearchIndex(self.index_path) as index:
+            update = index.update(self.analyze())
+
+            self.assertEqual((update.added, update.updated, update.removed, update.unchanged), (1, 1, 1, 1))
+            self.assertEqual(len(index), 3)
+            self.assertEqual(sorted(result.path for result in index.search("refund")), [os.path.join("project", "README.md"), os.path.join("project", "src", "payments.py")])
+
+    def test_partial_update_keeps_other_files(self):
+        with SearchIndex(self.index_path) as index:
+            index.update(self.analyze())
+            self.write_files({"README.md": "# Shop with carts\n"})
+            update = index.update(self.analyze(PathFilter(["README.md"])), remove_missing=False)
+
+            self.assertEqual((update.updated, update.removed), (1, 0))
+            self.assertEqual(len(index), 3)
+            self.assertEqual([result.path for result in index.search("carts")], [os.path.join("project", "README.md")])
+
+    def test_indexed_while_the_dump_is_written(self):
+        data = self.analyze(mmap_threshold=1)
+        section_index = DumpIndex(root_name=data.name)
+        with SearchIndex(self.index_path) as index, \
+                patch.object(MappedTextFileAnalysis, "get_content", side_effect=AssertionError("decoded whole")):
+            PlainTextOutputFormatter(count_tokens=False).write(data, set(), io.BytesIO(), section_index, search_index=index)
+            update = index.finish_update(data)
+
+            self.assertEqual((update.added, update.removed), (3, 0))
+            paths = [result.path for result in index.search("PaymentGateway")]
+            self.assertEqual(sorted(paths), [os.path.join("project", "src", "orders.py"), os.path.join("project", "src", "payments.py")])
+            self.assertTrue(all(section_index.find(path) is not None for path in paths))
+
+        with SearchIndex(self.index_path) as index:
+            update = index.update(self.analyze())
+            self.assertEqual((update.added, update.updated, update.removed, update.unchanged), (0, 0, 0, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import tempfile
+import unittest
+from codebase_dump.core.codebase_analysis import CodebaseAnalysis
+from codebase_dump.core.ignore_patterns_manager import IgnorePatternManager
+from codebase_dump.core.output_formatter import MarkdownOutputFormatter, PlainTextOutputFormatter
+from codebase_dump.core.snapshot import CONTENT_NOT_STORED, SnapshotDirectoryAnalysis, load_snapshot, save_snapshot
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.temp_dir.name, "project")
+        files = {
+            "src/app.py": "print('zażółć')\n",
+            "src/lib/util.py": "def util():\n    return 1\n",
+            "README.md": "# Project\n",
+            "logo.png": "\x89PNG",
+            "debug.log": "ignored\n",
+        }
+        for path, content in files.items():
+            full_path = os.path.join(self.root, path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, "w", encoding="utf-8") as f:
+                f.write(content)
+
+        self.ignore_manager = IgnorePatternManager(self.root, load_default_ignore_patterns=False, extra_ignore_patterns={"*.log"})
+        self.data = CodebaseAnalysis().analyze_directory(self.root, self.ignore_manager, self.root)
+        self.snapshot_path = os.path.join(self.temp_dir.name, "project.snap")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_round_trip_renders_the_same_output(self):
+        save_snapshot(self.data, self.snapshot_path, tokenizers=["estimate"], ignore_patterns=self.ignore_manager.ignore_patterns_as_str)
+        snapshot = load_snapshot(self.snapshot_path)
+
+        self.assertEqual(snapshot.tokenizers, ["estimate"])
+        self.assertEqual(snapshot.ignore_patterns, {"*.log"})
+        for formatter in [PlainTextOutputFormatter(tokenizers=["estimate"]), MarkdownOutputFormatter(tokenizers=["estimate"])]:
+            self.assertEqual(formatter.format(snapshot.data, snapshot.ignore_patterns),
+                             formatter.format(self.data, self.ignore_manager.ignore_patterns_as_str))
+
+    def test_aggregates_are_precomputed(self):
+        save_snapshot(self.data, self.snapshot_path, tokenizers=["estimate"])
+        data = load_snapshot(self.snapshot_path).data
+
+        self.assertIsInstance(data, SnapshotDirectoryAnalysis)
+        self.assertEqual(data.stored_tokens, {"estimate": self.data.get_total_tokens("estimate")})
+        self.assertEqual(data.size, self.data.size)
+        src = data.children[[child.name for child in data.children].index("src")]
+        self.assertEqual(src.get_total_tokens("estimate"), 11)
+
+    def test_without_content(self):
+        save_snapshot(self.data, self.snapshot_path, tokenizers=["estimate"], include_content=False)
+        data = load_snapshot(self.snapshot_path).data
+
+        self.assertEqual(data.get_total_tokens("estimate"), self.data.get_total_tokens("estimate"))
+        self.assertEqual(data.get_non_ignored_text_content_size(), self.data.get_non_ignored_text_content_size())
+        files = [file for file in data.get_all_non_ignored_files() if file.file_content != "[Non-text file]"]
+        self.assertTrue(all(file.get_content() == CONTENT_NOT_STORED and not file.has_content() for file in files))
+        self.assertFalse(load_snapshot(self.snapshot_path).has_content)
+
+        output = PlainTextOutputFormatter(count_tokens=False).format(data, set())
+        self.assertIn("Content:\n" + CONTENT_NOT_STORED + "\n", output)
+        self.assertNotIn("print(", output)
+
+    def test_flags_are_kept(self):
+        save_snapshot(self.data, self.snapshot_path)
+        files = {file.name: file for file in load_snapshot(self.snapshot_path).data.get_all_children()}
+
+        self.assertTrue(files["debug.log"].is_ignored)
+        self.assertEqual(files["logo.png"].file_content, "[Non-text file]")
+        self.assertEqual(files["app.py"].get_content(), "print('zażółć')\n")
+
+    def test_not_a_snapshot(self):
+        with open(self.snapshot_path, "wb") as f:
+            f.write(b"\0" * 64)
+        with self.assertRaises(ValueError):
+            load_snapshot(self.snapshot_path)
+
+    def test_empty_and_truncated_snapshots(self):
+        save_snapshot(self.data, self.snapshot_path)
+        with open(self.snapshot_path, "rb") as f:
+            snapshot = f.read()
+        for length, message in [(0, "Not a codebase-dump snapshot"), (20, "header is incomplete"),
+                                (64, "do not hold the stored columns"), (len(snapshot) - 1, "string table is incomplete")]:
+            with open(self.snapshot_path, "wb") as f:
+                f.write(snapshot[:length])
+            with self.assertRaisesRegex(ValueError, message):
+                load_snapshot(self.snapshot_path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+# Generous budget for `import codebase_dump.app`, far above the expected cost but well below
+# what tiktoken and requests add. It guards against heavy imports creeping back in at module level.
+IMPORT_TIME_BUDGET_US = 400_000
+
+
+def run_with_importtime(args, cwd=None):
+    """Runs Python with -X importtime and returns (imported module names, cumulative import times by module)."""
+    completed = subprocess.run([sys.executable, "-X", "importtime"] + args, cwd=cwd,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    modules = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(cumulative)
+    return completed, modules
+
+
+class TestStartup(unittest.TestCase):
+
+    def test_app_import_does_not_load_heavy_dependencies(self):
+        completed, modules = run_with_importtime(["-c", "import codebase_dump.app"])
+
+        self.assertEqual(completed.returncode, 0, completed.stderr)
+        self.assertNotIn("tiktoken", modules)
+        self.assertNotIn("requests", modules)
+        self.assertLess(modules["codebase_dump.app"], IMPORT_TIME_BUDGET_US)
+
+    def test_no_tokens_run_never_loads_tiktoken(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with open(os.path.join(temp_dir, "main.py"), "w") as f:
+                f.write("print('hello')\n")
+            output_file = os.path.join(temp_dir, "out", "dump.txt")
+            completed, modules = run_with_importtime(
+                ["-m", "codebase_dump.app", temp_dir, "--no-tokens", "-f", output_file])
+
+            self.assertEqual(completed.returncode, 0, completed.stderr)
+            self.assertNotIn("tiktoken", modules)
+            self.assertNotIn("requests", modules)
+            with open(output_file) as f:
+                output = f.read()
+            self.assertNotIn("Total tokens", output)
+            self.assertIn("print('hello')", output)
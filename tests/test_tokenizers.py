@@ -0,0 +1,85 @@
+import unittest
+from unittest.mock import patch
+from codebase_dump.core import tokenizers
+from codebase_dump.core.tokenizers import Tokenizer, EstimateTokenizer, get_tokenizer, register_tokenizer, count_tokens, normalize_tokenizer_names, \
+    unregister_tokenizer, validate_tokenizer_name
+from codebase_dump.core.models import DirectoryAnalysis, TextFileAnalysis
+
+
+class WordTokenizer(Tokenizer):
+    name = "words"
+
+    def __init__(self):
+        self.calls = 0
+
+    def count(self, text):
+        self.calls += 1
+        return len(text.split())
+
+
+class TestTokenizers(unittest.TestCase):
+
+    def setUp(self):
+        register_tokenizer("words", WordTokenizer)
+        self.addCleanup(unregister_tokenizer, "words")
+
+    def test_estimate_tokenizer(self):
+        tokenizer = get_tokenizer("estimate")
+        self.assertIsInstance(tokenizer, EstimateTokenizer)
+        self.assertEqual(tokenizer.count(""), 0)
+        self.assertEqual(tokenizer.count("abcd"), 1)
+        self.assertEqual(tokenizer.count("abcde"), 2)
+
+    def test_tokenizer_is_loaded_once(self):
+        with patch.object(tokenizers, "_create_tokenizer", wraps=tokenizers._create_tokenizer) as create:
+            register_tokenizer("words", WordTokenizer)
+            first = get_tokenizer("words")
+            second = get_tokenizer("words")
+        self.assertIs(first, second)
+        create.assert_called_once_with("words")
+
+    def test_unregister_tokenizer(self):
+        register_tokenizer("lines", WordTokenizer)
+        self.assertIsInstance(get_tokenizer("lines"), WordTokenizer)
+        unregister_tokenizer("lines")
+        self.assertNotIn("lines", tokenizers._custom_factories)
+        self.assertNotIn("lines", tokenizers._tokenizers_cache)
+
+    def test_count_tokens_for_several_tokenizers(self):
+        counts = count_tokens("one two three four", ["words", "estimate"])
+        self.assertEqual(counts, {"words": 4, "estimate": 5})
+
+    def test_hf_tokenizer_without_package(self):
+        with patch.dict("sys.modules", {"tokenizers": None}):
+            with self.assertRaises(ValueError) as context:
+                get_tokenizer("hf:/tmp/missing-tokenizer.json")
+        self.assertIn("pip install tokenizers", str(context.exception))
+
+    def test_normalize_tokenizer_names(self):
+        self.assertEqual(normalize_tokenizer_names(None), ["cl100k_base"])
+        self.assertEqual(normalize_tokenizer_names(["estimate", "words", "estimate"]), ["estimate", "words"])
+
+    def test_validate_tokenizer_name(self):
+        for name in ["estimate", "words", "hf:tokenizer.json", "cl100k_base", "o200k_base"]:
+            self.assertEqual(validate_tokenizer_name(name), name)
+        for name in ["bogus", "hf:"]:
+            with self.assertRaises(ValueError):
+                validate_tokenizer_name(name)
+
+    def test_file_token_counts_are_cached(self):
+        text_file = TextFileAnalysis("test", file_content="one two three")
+        self.assertEqual(text_file.count_tokens_multi(["words", "estimate"]), {"words": 3, "estimate": 4})
+        self.assertEqual(text_file.count_tokens("words"), 3)
+        self.assertEqual(get_tokenizer("words").calls, 1)
+
+        text_file.file_content = "one two"
+        self.assertEqual(text_file.count_tokens("words"), 2)
+
+    def test_directory_total_tokens_multi(self):
+        root = DirectoryAnalysis("root")
+        sub = DirectoryAnalysis("sub", parent=root)
+        root.children = [TextFileAnalysis("a.txt", file_content="one two", parent=root), sub]
+        sub.children = [TextFileAnalysis("b.txt", file_content="three", parent=sub),
+                        TextFileAnalysis("c.txt", file_content="ignored words", parent=sub, is_ignored=True)]
+        self.assertEqual(root.get_total_tokens_multi(["words", "estimate"]), {"words": 3, "estimate": 4})
+        self.assertEqual(root.get_total_tokens("words"), 3)
@@ -0,0 +1,36 @@
+import unittest
+from codebase_dump.core.top_k import TopK
+
+
+class TestTopK(unittest.TestCase):
+
+    def test_keeps_largest_items_in_order(self):
+        top = TopK(3)
+        for key in [5, 1, 9, 3, 7, 2]:
+            top.push(key, f"item{key}")
+        self.assertEqual(top.items(), ["item9", "item7", "item5"])
+        self.assertEqual(len(top), 3)
+
+    def test_less_items_than_k(self):
+        top = TopK(10)
+        top.push(1, "a")
+        top.push(2, "b")
+        self.assertEqual(top.items(), ["b", "a"])
+
+    def test_zero_k(self):
+        top = TopK(0)
+        top.push(1, "a")
+        self.assertEqual(top.items(), [])
+
+    def test_ties_keep_first_pushed(self):
+        top = TopK(2)
+        for name in ["a", "b", "c", "d"]:
+            top.push(1, name)
+        self.assertEqual(top.items(), ["a", "b"])
+
+    def test_items_are_not_compared(self):
+        top = TopK(2)
+        top.push(1, {"not": "comparable"})
+        top.push(1, {"also": "not comparable"})
+        top.push(1, {"third": "dict"})
+        self.assertEqual(len(top.items()), 2)